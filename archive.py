@@ -0,0 +1,282 @@
+# Local columnar archive of processed tweets (Parquet, partitioned by product and date)
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import pandas as pd
+
+# pyarrow is imported on first use, so pages that never touch the archive do not load it
+
+# --------------------
+# Configuration
+# --------------------
+
+ARCHIVE_DIR = "tweet_archive"           # Root directory of the Parquet dataset
+PARTITION_COLUMNS = ["product", "date"]
+BATCH_SIZE = 64 * 1024                  # Rows per record batch when streaming the archive
+COMPACT_FILES = 16                      # A partition is merged into one file once it holds this many
+ROW_GROUP_SIZE = 128 * 1024             # Rows per row group of a merged file
+COMPACT_LOCK = ".compact.lock"          # Lock file of a partition being merged (hidden, so readers skip it)
+STALE_LOCK_SECONDS = 600                # A lock left this long by a crashed writer is broken
+READ_RETRIES = 3                        # Scans restarted when a compaction removed a file mid-read
+
+# Types of the non-numeric columns in an empty read; every other column is float64
+EMPTY_DTYPES = {
+    "timestamp": "datetime64[ns, UTC]",
+    "observed_at": "datetime64[ns, UTC]",
+    "tweet_id": "object",
+    "text": "object",
+    "user_location": "category",
+    "hashtags": "object",
+    "location_city": "object",
+    "location_region": "object",
+    "location_country": "object",
+    "product": "object",
+    "date": "object",
+}
+
+@lru_cache(maxsize=None)
+def local_fs():
+    """Local filesystem that memory-maps the Parquet files instead of reading them into buffers."""
+    from pyarrow import fs
+    return fs.LocalFileSystem(use_mmap=True)
+
+# --------------------
+# Writing
+# --------------------
+
+def append_to_archive(df, product, archive_dir=ARCHIVE_DIR):
+    """Append processed tweets of `product` to the archive as new Parquet files.
+
+    Every call adds one file per date partition; a partition that has
+    collected COMPACT_FILES files is merged into one. `observed_at` records
+    when the tweets were stored, so readers can keep the latest observation
+    of each tweet.
+    """
+    if df.empty:
+        return
+
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    df["observed_at"] = pd.Timestamp(datetime.now(timezone.utc))
+    df["product"] = product
+    df["date"] = df["timestamp"].dt.strftime("%Y-%m-%d")
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    written = []
+    ds.write_dataset(
+        table,
+        archive_dir,
+        format="parquet",
+        partitioning=PARTITION_COLUMNS,
+        partitioning_flavor="hive",
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        filesystem=local_fs(),
+        file_visitor=lambda written_file: written.append(written_file.path),
+    )
+
+    for partition_dir in {os.path.dirname(path) for path in written}:
+        if len(partition_files(partition_dir)) >= COMPACT_FILES:
+            compact_partition(partition_dir)
+
+# --------------------
+# Compaction
+# --------------------
+
+def partition_files(partition_dir):
+    """Parquet files of one partition directory, skipping hidden files being written."""
+    return sorted(
+        os.path.join(partition_dir, name) for name in os.listdir(partition_dir)
+        if name.endswith(".parquet") and not name.startswith((".", "_"))
+    )
+
+def create_lock(lock_path):
+    """Create the lock file, or return False if it exists and is not stale."""
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) < STALE_LOCK_SECONDS:
+                    return False
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+@contextmanager
+def partition_lock(partition_dir):
+    """Hold the compaction lock file of a partition, shared by every process writing the archive.
+
+    Yields False without waiting when another writer holds the lock; a lock
+    older than STALE_LOCK_SECONDS was left by a crashed writer and is removed.
+    """
+    lock_path = os.path.join(partition_dir, COMPACT_LOCK)
+    if not create_lock(lock_path):
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        os.remove(lock_path)
+
+def compact_partition(partition_dir):
+    """Merge the files of one partition into a single file sorted by timestamp.
+
+    Every row is kept, so readers still pick the latest observation of each
+    tweet. The merged file is written under a hidden name and renamed before
+    the small files are removed. A partition another process is merging is
+    skipped. Returns the number of files merged.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with partition_lock(partition_dir) as locked:
+        if not locked:
+            return 0
+        files = partition_files(partition_dir)
+        if len(files) < 2:
+            return 0
+
+        # Files written before a column was added lack it; it is filled with nulls
+        table = pa.concat_tables([pq.ParquetFile(path).read() for path in files], promote_options="default")
+        table = table.sort_by("timestamp")
+        name = f"compacted-{uuid.uuid4().hex}.parquet"
+        tmp_path = os.path.join(partition_dir, "." + name)
+        pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, os.path.join(partition_dir, name))
+        for path in files:
+            os.remove(path)
+    return len(files)
+
+def compact_archive(archive_dir=ARCHIVE_DIR, min_files=2):
+    """Merge every partition holding at least `min_files` files into one file."""
+    partitions = merged = 0
+    for partition_dir, _, names in os.walk(archive_dir):
+        if not any(name.endswith(".parquet") for name in names):
+            continue
+        if len(partition_files(partition_dir)) >= min_files:
+            merged += compact_partition(partition_dir)
+            partitions += 1
+    print(f"🗜️ Merged {merged} files into {partitions} in '{archive_dir}'.")
+    return partitions, merged
+
+# --------------------
+# Reading
+# --------------------
+
+def open_archive(archive_dir=ARCHIVE_DIR):
+    """Open the archive as a dataset, or return None if nothing has been archived yet."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    try:
+        dataset = ds.dataset(archive_dir, format="parquet", partitioning="hive", filesystem=local_fs())
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+    return dataset if dataset.files else None
+
+def to_utc(value):
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
+
+def build_filter(product=None, start=None, end=None):
+    """Filter on the partition columns (pruning whole directories) and on the timestamp."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    conditions = []
+    if product is not None:
+        conditions.append(ds.field("product") == product)
+    if start is not None:
+        start = to_utc(start)
+        conditions.append(ds.field("date") >= start.strftime("%Y-%m-%d"))
+        conditions.append(ds.field("timestamp") >= pa.scalar(start.to_pydatetime(), pa.timestamp("us", tz="UTC")))
+    if end is not None:
+        end = to_utc(end)
+        conditions.append(ds.field("date") <= end.strftime("%Y-%m-%d"))
+        conditions.append(ds.field("timestamp") < pa.scalar(end.to_pydatetime(), pa.timestamp("us", tz="UTC")))
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def scan_partition(partition_dir, schema, columns, expression, archive_dir):
+    """Record batches of one partition, read again if a compaction replaced its files meanwhile."""
+    import pyarrow.dataset as ds
+
+    for attempt in range(READ_RETRIES):
+        try:
+            partition = ds.dataset(partition_files(partition_dir), schema=schema, format="parquet",
+                                   partitioning="hive", partition_base_dir=archive_dir, filesystem=local_fs())
+            return partition.to_table(columns=columns, filter=expression).to_batches(BATCH_SIZE)
+        except FileNotFoundError:
+            if attempt == READ_RETRIES - 1:
+                raise
+
+def iter_archive_chunks(columns, product=None, start=None, end=None, archive_dir=ARCHIVE_DIR):
+    """Yield the selected columns of the archived tweets as frames of bounded size.
+
+    Only the requested columns are read, and partitions outside the product
+    or date range are skipped without opening their files. Each partition is
+    read whole before its frames are yielded, so a concurrent compaction can
+    only make a partition be read again, never be seen twice or in part.
+    """
+    dataset = open_archive(archive_dir)
+    if dataset is None:
+        return
+    expression = build_filter(product, start, end)
+    partition_dirs = sorted({os.path.dirname(fragment.path) for fragment in dataset.get_fragments(filter=expression)})
+    for partition_dir in partition_dirs:
+        for batch in scan_partition(partition_dir, dataset.schema, columns, expression, archive_dir):
+            if batch.num_rows:
+                yield localize(batch.to_pandas())
+
+def read_archive(columns, product=None, start=None, end=None, latest=True, archive_dir=ARCHIVE_DIR):
+    """Read the selected columns of the archived tweets into one frame.
+
+    With `latest`, only the most recent observation of each tweet is kept.
+    The archive is opened again if a compaction removed a file mid-read.
+    """
+    read_columns = list(columns)
+    if latest:
+        read_columns += [column for column in ["tweet_id", "observed_at"] if column not in read_columns]
+
+    for attempt in range(READ_RETRIES):
+        dataset = open_archive(archive_dir)
+        if dataset is None:
+            return empty_frame(columns)
+        try:
+            table = dataset.to_table(columns=read_columns, filter=build_filter(product, start, end))
+            break
+        except FileNotFoundError:
+            if attempt == READ_RETRIES - 1:
+                raise
+
+    df = localize(table.to_pandas())
+    if latest and not df.empty:
+        df = df.sort_values("observed_at").drop_duplicates("tweet_id", keep="last").sort_index()
+    return df[list(columns)].reset_index(drop=True)
+
+def empty_frame(columns):
+    """A frame without rows whose columns have the types of archived tweets."""
+    df = pd.DataFrame({column: pd.Series(dtype=EMPTY_DTYPES.get(column, "float64")) for column in columns})
+    return localize(df)
+
+def localize(df):
+    """Drop the UTC zone of the timestamp column, like the Elasticsearch loaders do."""
+    if "timestamp" in df:
+        df["timestamp"] = df["timestamp"].dt.tz_convert(None)
+    return df
@@ -0,0 +1,99 @@
+"""Compare accuracy and latency of the forecasting backends on recorded series.
+
+Usage (from the project root):
+    python -m benchmarks.bench_forecasting series1.csv series2.csv ...
+    python -m benchmarks.bench_forecasting --from-es
+
+CSV files need "ds" and "y" columns. With --from-es every engagement metric
+currently stored in Elasticsearch is used as a recorded series.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecasting import FORECAST_FREQ, fit_and_predict, holt_forecast_batch, to_regular_grid
+
+METRICS = [
+    "sentiment_score",
+    "regular_engagement",
+    "high_follower_engagement",
+    "adjusted_engagement",
+    "engagement_including_sentiment",
+    "engagement_final",
+]
+
+def load_csv_series(paths):
+    series = {}
+    for path in paths:
+        df = pd.read_csv(path, parse_dates=["ds"])
+        series[path] = df[["ds", "y"]]
+    return series
+
+def load_es_series():
+    from tweet_loader import load_tweet_frame
+
+    snapshot = load_tweet_frame(["timestamp"] + METRICS)
+    return {
+        metric: snapshot[["timestamp", metric]].dropna().rename(columns={"timestamp": "ds", metric: "y"})
+        for metric in METRICS
+    }
+
+def split_series(series, holdout, freq):
+    """Put each series on the forecast grid and hold out its last points."""
+    train, test = {}, {}
+    for name, df in series.items():
+        grid = to_regular_grid(df, freq).dropna()
+        n_test = max(1, int(len(grid) * holdout))
+        if len(grid) - n_test < 2:
+            print(f"Skipping {name}: too few points")
+            continue
+        train[name] = grid.iloc[:-n_test].rename("y").rename_axis("ds").reset_index()
+        test[name] = grid.iloc[-n_test:]
+    return train, test
+
+def score(forecast, actual):
+    predicted = forecast.set_index("ds")["yhat"].reindex(actual.index)
+    errors = (predicted - actual).to_numpy()
+    return float(np.nanmean(np.abs(errors)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="*", help="Recorded series with ds and y columns")
+    parser.add_argument("--from-es", action="store_true", help="Use the metrics stored in Elasticsearch")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of each series used for scoring")
+    parser.add_argument("--freq", default=FORECAST_FREQ)
+    args = parser.parse_args()
+
+    series = load_es_series() if args.from_es else load_csv_series(args.csv)
+    train, test = split_series(series, args.holdout, args.freq)
+    if not train:
+        parser.error("no usable series")
+    periods = max(len(actual) for actual in test.values())
+
+    results = []
+
+    start = time.perf_counter()
+    holt = holt_forecast_batch(train, periods, args.freq)
+    holt_seconds = time.perf_counter() - start
+    for name in train:
+        results.append({"series": name, "backend": "Holt", "mae": score(holt[name], test[name]),
+                        "seconds": holt_seconds / len(train)})
+
+    prophet_seconds = 0.0
+    for name, df in train.items():
+        start = time.perf_counter()
+        _, forecast = fit_and_predict(df, periods, args.freq)
+        elapsed = time.perf_counter() - start
+        prophet_seconds += elapsed
+        results.append({"series": name, "backend": "Prophet", "mae": score(forecast, test[name]),
+                        "seconds": elapsed})
+
+    table = pd.DataFrame(results).pivot(index="series", columns="backend", values=["mae", "seconds"])
+    print(table.to_string(float_format=lambda value: f"{value:.4f}"))
+    print(f"\nTotal fit time: Holt {holt_seconds:.3f}s (one batch), Prophet {prophet_seconds:.3f}s "
+          f"({prophet_seconds / holt_seconds:.0f}x)")
+
+if __name__ == "__main__":
+    main()
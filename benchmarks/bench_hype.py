@@ -0,0 +1,67 @@
+"""Throughput of the hype engine on interest matrices of a daily scan.
+
+Usage (from the project root):
+    python -m benchmarks.bench_hype --days 90 --products 1000 10000 50000
+
+Scores synthetic (days x products) interest matrices with hype.rank_products
+and compares it with scoring every product on its own with pandas, the way
+calculate_percentage_increase handled a single product. The per-product
+loop is only timed on the first 1,000 products and extrapolated.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from hype import GROWTH_PERIODS, WINDOW, Z_THRESHOLD, rank_products
+
+LOOP_SAMPLE = 1000
+
+def synthetic_interest(days, products, seed=0):
+    """Random-walk interest in 0..100 with a burst in the last days of 1% of the products."""
+    rng = np.random.default_rng(seed)
+    walk = rng.normal(0, 3, (days, products)).cumsum(axis=0)
+    walk -= walk.min(axis=0)
+    values = walk * 100 / np.maximum(walk.max(axis=0), 1)
+    hyped = rng.choice(products, max(1, products // 100), replace=False)
+    values[-3:, hyped] += np.array([[20], [40], [60]])
+    return pd.DataFrame(
+        np.clip(values, 0, 100).round(),
+        index=pd.date_range(end="2025-05-01", periods=days, freq="D"),
+        columns=[f"product {i}" for i in range(products)],
+    )
+
+def score_one(series):
+    """Per-product pandas scoring of the latest step."""
+    growth = series.pct_change(GROWTH_PERIODS, fill_method=None) * 100
+    previous = series.shift(1)
+    z = (series - previous.rolling(WINDOW, min_periods=1).mean()) / previous.rolling(WINDOW, min_periods=2).std()
+    acceleration = growth - growth.shift(GROWTH_PERIODS)
+    burst = z.iloc[-1] >= Z_THRESHOLD
+    return growth.iloc[-1], z.iloc[-1], acceleration.iloc[-1], burst
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--products", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'products':>10} {'engine s':>10} {'loop s (est.)':>14} {'speed-up':>9} {'bursts':>7}")
+    for products in args.products:
+        matrix = synthetic_interest(args.days, products)
+
+        start = time.perf_counter()
+        ranking = rank_products(matrix)
+        engine_s = time.perf_counter() - start
+
+        sample = matrix.iloc[:, :min(products, LOOP_SAMPLE)]
+        start = time.perf_counter()
+        for column in sample:
+            score_one(sample[column])
+        loop_s = (time.perf_counter() - start) * products / sample.shape[1]
+
+        print(f"{products:>10,} {engine_s:>10.3f} {loop_s:>14.2f} {loop_s / engine_s:>8.0f}x {int(ranking['burst'].sum()):>7}")
+
+if __name__ == "__main__":
+    main()
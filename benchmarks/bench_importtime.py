@@ -0,0 +1,130 @@
+"""Import-time budget of the entry points, measured with python -X importtime.
+
+Usage (from the project root):
+    python -m benchmarks.bench_importtime
+    python -m benchmarks.bench_importtime --repeat 5 --budget cli=50 --budget dashboard=600
+
+Every target is imported --repeat times in a fresh interpreter and the median
+of its cumulative import time is compared with its budget. Each target also
+lists heavy packages that must only be imported where they are used (Prophet
+when forecasting, matplotlib when rendering, Elasticsearch when querying, ...);
+loading one of them at import is a violation whatever the time. The run exits
+with status 1 on any violation. Targets whose dependencies are not installed
+are skipped.
+
+The dashboard target imports what dashboard.py imports at module level except
+streamlit, since importing the page itself runs it.
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+from functools import lru_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages with a noticeable import cost of their own. pyarrow is not among them:
+# pandas imports it on its own import.
+HEAVY = ["prophet", "matplotlib", "elasticsearch", "elasticsearch_dsl", "mysql", "tweepy", "textblob", "pytrends"]
+
+# Target -> (budget in ms, packages it must not import)
+TARGETS = {
+    "cli": (150, HEAVY + ["pandas", "numpy"]),
+    "dashboard": (1000, HEAVY),
+    "main": (1000, HEAVY),
+    "pipeline": (1500, ["prophet", "matplotlib", "mysql", "tweepy", "textblob", "pytrends"]),
+    "pytrendData": (1000, HEAVY),
+    "forecasting": (1000, HEAVY),
+    "charts": (1000, HEAVY),
+    "archive": (1000, HEAVY),
+    "tweet_loader": (1500, ["prophet", "matplotlib", "mysql", "tweepy", "textblob", "pytrends"]),
+}
+
+def top_level_imports(path, exclude=("streamlit",)):
+    """Modules imported at the top level of a file, as one import statement."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return "import " + ", ".join(dict.fromkeys(module for module in modules if module not in exclude))
+
+def import_statement(target):
+    if target == "dashboard":
+        return top_level_imports(os.path.join(ROOT, "dashboard.py"))
+    return f"import {target}"
+
+def parse_importtime(stderr):
+    """(module, depth, cumulative µs) of every line of -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("| imported package"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative)))
+    return entries
+
+@lru_cache(maxsize=None)
+def startup_modules():
+    """Modules every interpreter imports before running -c (encodings, site, ...)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], capture_output=True, text=True)
+    return frozenset(name for name, _, _ in parse_importtime(result.stderr))
+
+def measure(statement):
+    """Milliseconds spent importing `statement` and every module it loaded."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+    entries = [entry for entry in parse_importtime(result.stderr) if entry[0] not in startup_modules()]
+    total = sum(cumulative for _, depth, cumulative in entries if depth == 0) / 1000
+    return total, {name for name, _, _ in entries}
+
+def loaded_heavy(modules, forbidden):
+    return sorted(package for package in forbidden
+                  if any(name == package or name.startswith(package + ".") for name in modules))
+
+def parse_budget(text):
+    target, _, ms = text.partition("=")
+    if target not in TARGETS or not ms:
+        raise argparse.ArgumentTypeError(f"expected TARGET=MS with TARGET one of {', '.join(TARGETS)}")
+    return target, float(ms)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=parse_budget, action="append", default=[],
+                        help="Override the budget of a target, e.g. --budget cli=50 (repeatable)")
+    args = parser.parse_args(argv)
+    budgets = {target: budget for target, (budget, _) in TARGETS.items()}
+    budgets.update(args.budget)
+
+    violations = []
+    print(f"{'target':<14} {'ms':>8} {'budget':>8}  heavy imports")
+    for target in args.targets:
+        statement = import_statement(target)
+        try:
+            runs = [measure(statement) for _ in range(args.repeat)]
+        except ImportError as e:
+            print(f"{target:<14} {'skipped':>8} {budgets[target]:>8.0f}  ({e})")
+            continue
+        ms = statistics.median(total for total, _ in runs)
+        heavy = loaded_heavy(set().union(*(modules for _, modules in runs)), TARGETS[target][1])
+        over = ms > budgets[target]
+        if over or heavy:
+            violations.append(target)
+        print(f"{target:<14} {ms:>8.0f} {budgets[target]:>8.0f}  {', '.join(heavy) or '-'}{'  OVER BUDGET' if over else ''}")
+
+    if violations:
+        print(f"\n{len(violations)} import-time violations: {', '.join(violations)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Throughput and peak memory of the engagement metric engine.
+
+Usage (from the project root):
+    python -m benchmarks.bench_metrics --rows 1000000 --chunk-size 100000
+
+Compares the NumPy engine in metrics.py with the previous pandas
+implementation of add_engagement_metrics on synthetic tweets, and checks
+that chunked processing gives the same result as one frame.
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from metrics import METRICS, add_metrics, iter_metrics
+
+LOCATIONS = ["Berlin", "London", "New York", "Unknown", "Paris", "Tokyo"]
+
+def synthetic_tweets(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "likes": rng.poisson(20, rows),
+        "retweets": rng.poisson(5, rows),
+        "replies": rng.poisson(3, rows),
+        "clicks": rng.poisson(2, rows),
+        "followers": rng.lognormal(7, 2, rows).astype(np.int64),
+        "sentiment_score": rng.uniform(-1, 1, rows),
+        "user_location": rng.choice(LOCATIONS, rows),
+    })
+
+def pandas_metrics(df, amp=1.5):
+    """The pandas implementation add_engagement_metrics used before the engine."""
+    df["regular_engagement"] = df[["likes", "retweets", "replies", "clicks"]].sum(axis=1)
+    df["google_engagement"] = 0.0
+    df["high_follower_engagement"] = df["regular_engagement"] * (df["followers"] >= 10000) * amp
+    df["adjusted_engagement"] = df["regular_engagement"] + df["high_follower_engagement"]
+    df["engagement_including_sentiment"] = df["adjusted_engagement"] * (1 + df["sentiment_score"])
+    df["engagement_final"] = (
+        df["regular_engagement"] +
+        df["google_engagement"] +
+        df["high_follower_engagement"] +
+        df["adjusted_engagement"] +
+        df["engagement_including_sentiment"]
+    )
+    return df
+
+def measure(name, func, df, rows):
+    """Run func on a copy of df and report rows/s and peak traced memory."""
+    df = df.copy()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(df)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<22} {rows / elapsed:>14,.0f} rows/s {peak / 2**20:>10.1f} MiB peak "
+          f"{result.memory_usage(deep=True).sum() / 2**20:>10.1f} MiB result")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = synthetic_tweets(args.rows)
+    print(f"{args.rows:,} synthetic tweets\n")
+
+    measure("pandas (previous)", pandas_metrics, df, args.rows)
+    whole = measure("engine, one frame", add_metrics, df, args.rows)
+    chunked = measure(
+        "engine, chunked",
+        lambda frame: pd.concat(
+            iter_metrics(frame.iloc[start:start + args.chunk_size].copy() for start in range(0, len(frame), args.chunk_size)),
+            ignore_index=True,
+        ),
+        df,
+        args.rows,
+    )
+
+    identical = all(np.array_equal(whole[name].to_numpy(), chunked[name].to_numpy()) for name, _, _ in METRICS)
+    print(f"\nChunked results identical to one frame: {identical}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Keyset vs OFFSET pagination of shared plots, and pooled vs fresh connections.
+
+Usage (from the project root):
+    python -m benchmarks.bench_shared_plots --database user_plot_bench --plots 200000
+    python -m benchmarks.bench_shared_plots --sqlite --plots 200000
+
+The MySQL/MariaDB run recreates the users and shared_plots tables (with the
+indexes of DB.sql) in the given scratch database, so never point it at the
+app database. --sqlite runs the same statements against an in-memory SQLite
+database with the same indexes as a stand-in when no server is available.
+"""
+import argparse
+import sqlite3
+import statistics
+import time
+
+import numpy as np
+
+import user_db
+from user_db import SELECT_SENT_PLOTS, SELECT_USER_ID
+
+PAGE_DEPTHS = [0, 1000, 10000, 100000]     # Rows skipped before the measured page
+
+OFFSET_SENT_PLOTS = """
+    SELECT p.id, u.username, p.shared_at
+    FROM shared_plots p LEFT JOIN users u ON u.id = p.receiverId
+    WHERE p.senderId = %s
+    ORDER BY p.id DESC LIMIT %s OFFSET %s
+"""
+
+MYSQL_SCHEMA = [
+    "DROP TABLE IF EXISTS shared_plots",
+    "DROP TABLE IF EXISTS users",
+    """CREATE TABLE users (
+        id int(11) NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        username varchar(50) NOT NULL UNIQUE,
+        email varchar(100) NOT NULL UNIQUE,
+        password_hash varchar(255) NOT NULL,
+        created_at timestamp NOT NULL DEFAULT current_timestamp()
+    ) ENGINE=InnoDB""",
+    """CREATE TABLE shared_plots (
+        id int(11) NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        senderId int(11) NOT NULL,
+        receiverId int(11) DEFAULT NULL,
+        xAxis text NOT NULL,
+        yAxis text NOT NULL,
+        shared_at timestamp NOT NULL DEFAULT current_timestamp(),
+        KEY senderId (senderId),
+        KEY receiverId (receiverId)
+    ) ENGINE=InnoDB""",
+]
+
+SQLITE_SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL UNIQUE,
+        email TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE shared_plots (
+        id INTEGER PRIMARY KEY,
+        senderId INTEGER NOT NULL,
+        receiverId INTEGER,
+        xAxis TEXT NOT NULL,
+        yAxis TEXT NOT NULL,
+        shared_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )""",
+    "CREATE INDEX senderId ON shared_plots (senderId)",
+    "CREATE INDEX receiverId ON shared_plots (receiverId)",
+]
+
+def seed(conn, placeholder, n_users, n_plots, seed=0):
+    """Create n_users users and n_plots plots; user 1 sends half of all plots."""
+    rng = np.random.default_rng(seed)
+    cursor = conn.cursor()
+    insert_user = "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)".replace("%s", placeholder)
+    cursor.executemany(insert_user, [(f"user{i}", f"user{i}@example.com", "x" * 64) for i in range(1, n_users + 1)])
+
+    senders = np.where(rng.random(n_plots) < 0.5, 1, rng.integers(1, n_users + 1, n_plots))
+    receivers = rng.integers(1, n_users + 1, n_plots)
+    insert_plot = user_db.INSERT_SHARED_PLOT.replace("%s", placeholder)
+    x_axis, y_axis = '["2025-05-01 10:00:00"]', "[1.0]"
+    for start in range(0, n_plots, 10000):
+        cursor.executemany(insert_plot, [
+            (int(sender), int(receiver), x_axis, y_axis)
+            for sender, receiver in zip(senders[start:start + 10000], receivers[start:start + 10000])
+        ])
+    conn.commit()
+    cursor.close()
+    return int((senders == 1).sum())
+
+def timed(run, repeat):
+    """Median seconds of `repeat` calls of run()."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+def bench_pagination(execute, sent_by_user, page_size, repeat):
+    # Plot ids of user 1, newest first, to find the keyset cursor of every depth
+    ids = [row[0] for row in execute("SELECT id FROM shared_plots WHERE senderId = %s ORDER BY id DESC", (1,))]
+
+    print(f"{'depth':>8} {'OFFSET ms':>12} {'keyset ms':>12}")
+    for depth in PAGE_DEPTHS:
+        if depth >= sent_by_user:
+            break
+        cursor = user_db.FIRST_PAGE if depth == 0 else ids[depth - 1]
+        offset_rows = execute(OFFSET_SENT_PLOTS, (1, page_size, depth))
+        keyset_rows = execute(SELECT_SENT_PLOTS, (1, cursor, page_size))
+        assert [row[0] for row in offset_rows] == [row[0] for row in keyset_rows]
+
+        offset_s = timed(lambda: execute(OFFSET_SENT_PLOTS, (1, page_size, depth)), repeat)
+        keyset_s = timed(lambda: execute(SELECT_SENT_PLOTS, (1, cursor, page_size)), repeat)
+        print(f"{depth:>8} {offset_s * 1000:>12.2f} {keyset_s * 1000:>12.2f}")
+
+def run_sqlite(args):
+    conn = sqlite3.connect(":memory:")
+    for statement in SQLITE_SCHEMA:
+        conn.execute(statement)
+    sent_by_user = seed(conn, "?", args.users, args.plots)
+    print(f"SQLite stand-in: {args.plots:,} plots, {sent_by_user:,} sent by user1\n")
+
+    bench_pagination(lambda sql, params: conn.execute(sql.replace("%s", "?"), params).fetchall(),
+                     sent_by_user, args.page_size, args.repeat)
+
+def run_mysql(args):
+    import mysql.connector
+
+    config = {"host": args.host, "user": args.user, "password": args.password, "database": args.database}
+    conn = mysql.connector.connect(**config)
+    cursor = conn.cursor()
+    for statement in MYSQL_SCHEMA:
+        cursor.execute(statement)
+    cursor.close()
+    sent_by_user = seed(conn, "%s", args.users, args.plots)
+    conn.close()
+    print(f"MySQL {args.host}/{args.database}: {args.plots:,} plots, {sent_by_user:,} sent by user1\n")
+
+    db = user_db.UserDB(user_db.create_pool(config))
+
+    def execute(sql, params):
+        with db.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    bench_pagination(execute, sent_by_user, args.page_size, args.repeat)
+
+    # One user lookup through the pool vs a new connection per lookup (the previous connect_to_db)
+    def fresh_lookup():
+        conn = mysql.connector.connect(**config)
+        cursor = conn.cursor()
+        cursor.execute(SELECT_USER_ID, ("user1",))
+        cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+    pooled_s = timed(lambda: db.find_user_id("user1"), args.repeat)
+    fresh_s = timed(fresh_lookup, args.repeat)
+    print(f"\nUser lookup: pooled {pooled_s * 1000:.2f} ms, fresh connection {fresh_s * 1000:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sqlite", action="store_true", help="Use an in-memory SQLite stand-in")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="user_plot_bench")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--plots", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=user_db.PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.sqlite:
+        run_sqlite(args)
+    else:
+        run_mysql(args)
+
+if __name__ == "__main__":
+    main()
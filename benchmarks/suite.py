@@ -0,0 +1,371 @@
+"""End-to-end benchmark suite on seeded synthetic tweets, against in-process fakes.
+
+Usage (from the project root):
+    python -m benchmarks.suite --rows 100000 --output results.json
+    python -m benchmarks.suite --rows 100000 --baseline results.json --threshold 0.2
+
+Every scenario runs --repeat times and its median is reported. Results are
+written as JSON; with --baseline each scenario is compared with the same
+scenario of an earlier result file, and the run exits with status 1 when a
+scenario is slower than the baseline by more than its threshold. Only
+results of the same --rows and --ingest-rows are compared.
+
+The scale scenarios handle 10M rows in a few GB of memory, except
+loader.elasticsearch, whose fake keeps every document as a dict; leave it
+out with --scenarios above a few million rows.
+
+Ingest scenarios read the Twitter API through FakeTwitterClient and write to
+FakeElasticsearch, so they time the client side of the pipeline (parsing,
+sentiment, metrics, serialization) without a network. Aggregations run in
+Elasticsearch itself and are not covered; the hashtag scenarios time the
+local archive path and the live Space-Saving counter instead.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+
+import pandas as pd
+
+from archive import append_to_archive, read_archive
+from fakes import FakeElasticsearch, FakeTwitterClient, synthetic_tweet_frame, to_api_tweets
+from hashtags import SpaceSaving, aggregate_hashtag_engagement, extract_hashtags
+from metrics import add_metrics
+from models import INDEX_NAME
+from timeseries import bin_chunks, resample_series, series_from_bins
+from tweet_loader import iter_tweet_chunks
+
+# --------------------
+# Configuration
+# --------------------
+
+ROWS = 100_000              # Synthetic tweets of the scale scenarios (10k to 10M)
+INGEST_ROWS = 20_000        # Tweets of the ingest scenarios, which score sentiment and are much slower
+REPEAT = 3
+THRESHOLD = 0.2             # A scenario regresses when it is more than 20% slower than the baseline
+FORECAST_SERIES = 6         # Series forecasted at once, like the metrics of one dashboard page
+FORECAST_PERIODS = 100
+FORECAST_FREQ = "60s"
+
+# Fields the dashboard time series read from each tweet (same as in dashboard.py)
+SNAPSHOT_FIELDS = [
+    "timestamp",
+    "sentiment_score",
+    "regular_engagement",
+    "google_engagement",
+    "high_follower_engagement",
+    "adjusted_engagement",
+    "engagement_including_sentiment",
+    "engagement_final",
+]
+
+# --------------------
+# Scenarios
+# --------------------
+
+# A scenario prepares its input from the context and returns (rows, run);
+# only run() is timed.
+SCENARIOS = {}
+
+def scenario(name, threshold=THRESHOLD):
+    def register(setup):
+        SCENARIOS[name] = (setup, threshold)
+        return setup
+    return register
+
+class Context:
+    """Synthetic data shared by the scenarios, built on first use."""
+
+    def __init__(self, rows, ingest_rows, seed, directory):
+        self.rows = rows
+        self.ingest_rows = ingest_rows
+        self.seed = seed
+        self.directory = directory
+        self._cache = {}
+
+    def _get(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def tweets(self):
+        return self._get("tweets", lambda: synthetic_tweet_frame(self.rows, seed=self.seed))
+
+    @property
+    def processed(self):
+        """Tweets with sentiment and metrics, as stored by the ingest."""
+        def build():
+            df = self.tweets.drop(columns=["author_id"])
+            df.insert(3, "sentiment_score", (df["likes"] % 21 - 10) / 10)
+            return add_metrics(df)
+        return self._get("processed", build)
+
+    @property
+    def api(self):
+        return self._get("api", lambda: to_api_tweets(synthetic_tweet_frame(self.ingest_rows, seed=self.seed)))
+
+    @property
+    def es(self):
+        """A fake Elasticsearch holding every processed tweet."""
+        def build():
+            es = FakeElasticsearch()
+            sources = self.processed.drop(columns=["product"])
+            sources = sources.assign(timestamp=sources["timestamp"].map(pd.Timestamp.isoformat))
+            es.add_documents(INDEX_NAME, dict(zip(sources["tweet_id"], sources.to_dict("records"))))
+            return es
+        return self._get("es", build)
+
+    @property
+    def archive_dir(self):
+        """An archive holding every processed tweet."""
+        def build():
+            path = f"{self.directory}/archive"
+            for product, group in self.processed.groupby("product"):
+                append_to_archive(group.drop(columns=["product"]), product, path)
+            return path
+        return self._get("archive", build)
+
+def use_fakes(es):
+    # The save and load functions use the default connection
+    from elasticsearch_dsl import connections
+    connections.add_connection("default", es)
+
+def fresh_harvester(api):
+    from harvester import RateLimitBucket, TweetHarvester
+    tweets, users = api
+    return TweetHarvester(FakeTwitterClient(tweets, users, limit=10**9), RateLimitBucket())
+
+@scenario("fetch")
+def bench_fetch(ctx):
+    api = ctx.api
+
+    def run():
+        harvester = fresh_harvester(api)
+        return sum(1 for product in api[0] for _ in harvester.harvest(product))
+    return ctx.ingest_rows, run
+
+@scenario("ingest.serial", threshold=0.3)
+def bench_ingest_serial(ctx):
+    from pipeline import prepare_tweets, store_tweets
+    from sentiment import SentimentStage
+    api = ctx.api
+
+    def run():
+        # One product after the other, like main.py without --daemon
+        use_fakes(FakeElasticsearch())
+        harvester = fresh_harvester(api)
+        sentiment_stage = SentimentStage()
+        with tempfile.TemporaryDirectory(dir=ctx.directory) as archive_dir:
+            for product in api[0]:
+                df = prepare_tweets(pd.DataFrame(harvester.harvest(product)), sentiment_stage)
+                store_tweets(add_metrics(df), product, archive_dir)
+        sentiment_stage.close()
+    return ctx.ingest_rows, run
+
+@scenario("ingest.pipeline", threshold=0.3)
+def bench_ingest_pipeline(ctx):
+    from checkpoints import CheckpointStore
+    from pipeline import TweetPipeline, run_daemon
+    from sentiment import SentimentStage
+    api = ctx.api
+
+    def run():
+        use_fakes(FakeElasticsearch())
+        sentiment_stage = SentimentStage(min_parallel_texts=0)
+        with tempfile.TemporaryDirectory(dir=ctx.directory) as tmp:
+            pipeline = TweetPipeline(fresh_harvester(api), sentiment_stage, CheckpointStore(f"{tmp}/checkpoints.json"),
+                                     SpaceSaving(), list(api[0]), archive_dir=f"{tmp}/archive",
+                                     topk_file=f"{tmp}/topk.json")
+            run_daemon(pipeline, once=True)
+        sentiment_stage.close()
+    return ctx.ingest_rows, run
+
+@scenario("metrics")
+def bench_metrics(ctx):
+    tweets = ctx.tweets.assign(sentiment_score=0.5)
+    return ctx.rows, lambda: add_metrics(tweets.copy())
+
+@scenario("loader.elasticsearch")
+def bench_loader_elasticsearch(ctx):
+    es = ctx.es
+
+    def run():
+        # The dashboard's pass over the index into per-bin totals, then one binned metric of it
+        bins = bin_chunks(iter_tweet_chunks(SNAPSHOT_FIELDS, es=es), SNAPSHOT_FIELDS[1:], "60s")
+        return series_from_bins(bins, "engagement_final")
+    return ctx.rows, run
+
+@scenario("loader.archive")
+def bench_loader_archive(ctx):
+    archive_dir = ctx.archive_dir
+
+    def run():
+        snapshot = read_archive(SNAPSHOT_FIELDS, archive_dir=archive_dir)
+        series = snapshot[["timestamp", "engagement_final"]].rename(columns={"timestamp": "ds", "engagement_final": "y"})
+        return resample_series(series, "60s")
+    return ctx.rows, run
+
+@scenario("hashtags.extract")
+def bench_hashtags_extract(ctx):
+    texts = ctx.tweets["text"].tolist()
+    return ctx.rows, lambda: [extract_hashtags(text) for text in texts]
+
+@scenario("hashtags.space_saving")
+def bench_hashtags_space_saving(ctx):
+    hashtags = ctx.processed["hashtags"].tolist()
+    engagement = ctx.processed["engagement_including_sentiment"].tolist()
+
+    def run():
+        counter = SpaceSaving()
+        counter.update(hashtags, engagement)
+        return counter.top(100)
+    return ctx.rows, run
+
+@scenario("hashtags.archive")
+def bench_hashtags_archive(ctx):
+    archive_dir = ctx.archive_dir
+
+    def run():
+        df = read_archive(["hashtags", "engagement_including_sentiment"], archive_dir=archive_dir)
+        return aggregate_hashtag_engagement([df], top=100)
+    return ctx.rows, run
+
+def forecast_series(ctx):
+    snapshot = ctx.processed
+    return {
+        metric: snapshot[["timestamp", metric]].rename(columns={"timestamp": "ds", metric: "y"})
+        for metric in SNAPSHOT_FIELDS[1:FORECAST_SERIES + 1]
+    }
+
+@scenario("forecast.holt")
+def bench_forecast_holt(ctx):
+    from forecasting import holt_forecast_batch
+    series = forecast_series(ctx)
+    return ctx.rows, lambda: holt_forecast_batch(series, FORECAST_PERIODS, FORECAST_FREQ)
+
+@scenario("forecast.prophet", threshold=0.5)
+def bench_forecast_prophet(ctx):
+    import prophet  # Skips the scenario without Prophet, which forecasting only imports when fitting
+    from forecasting import fit_and_predict, to_regular_grid
+    series = ctx.processed[["timestamp", "engagement_final"]].rename(columns={"timestamp": "ds", "engagement_final": "y"})
+    grid = to_regular_grid(series, FORECAST_FREQ).dropna()
+    df = grid.rename("y").rename_axis("ds").reset_index()
+    return len(df), lambda: fit_and_predict(df, FORECAST_PERIODS, FORECAST_FREQ)
+
+# --------------------
+# Running and Comparing
+# --------------------
+
+def run_scenario(name, ctx, repeat):
+    setup, threshold = SCENARIOS[name]
+    try:
+        with redirect_stdout(StringIO()):
+            rows, run = setup(ctx)
+    except ImportError as e:
+        # Optional backends (e.g. Prophet) that are not installed
+        return {"status": "skipped", "reason": str(e), "threshold": threshold}
+
+    runs = []
+    for _ in range(repeat):
+        with redirect_stdout(StringIO()):
+            start = time.perf_counter()
+            run()
+            runs.append(time.perf_counter() - start)
+    seconds = statistics.median(runs)
+    return {"status": "ok", "rows": rows, "seconds": seconds, "rows_per_s": rows / seconds, "runs": runs,
+            "threshold": threshold}
+
+def compare(results, baseline, threshold=None):
+    """Flag every scenario that is slower than in the baseline by more than its threshold."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("scenarios", {}).get(name)
+        if result["status"] != "ok" or not before or before.get("status") != "ok":
+            continue
+        allowed = result["threshold"] if threshold is None else threshold
+        change = result["seconds"] / before["seconds"] - 1
+        result["baseline_seconds"] = before["seconds"]
+        result["change"] = change
+        result["regression"] = change > allowed
+        if result["regression"]:
+            regressions.append(name)
+    return regressions
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+def print_table(results):
+    print(f"{'scenario':<24} {'rows':>10} {'median s':>10} {'rows/s':>14} {'vs baseline':>12}")
+    for name, result in results.items():
+        if result["status"] != "ok":
+            print(f"{name:<24} skipped: {result['reason']}")
+            continue
+        change = f"{result['change']:+.1%}" if "change" in result else ""
+        flag = " REGRESSION" if result.get("regression") else ""
+        print(f"{name:<24} {result['rows']:>10,} {result['seconds']:>10.4f} {result['rows_per_s']:>14,.0f} "
+              f"{change:>12}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=ROWS, help="Synthetic tweets of the scale scenarios")
+    parser.add_argument("--ingest-rows", type=int, default=INGEST_ROWS, help="Synthetic tweets of the ingest scenarios")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, help="Allowed slowdown for every scenario (default: per scenario)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        ctx = Context(args.rows, args.ingest_rows, args.seed, directory)
+        results = {}
+        for name in args.scenarios:
+            print(f"Running {name}…", file=sys.stderr)
+            results[name] = run_scenario(name, ctx, args.repeat)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        scale = {key: baseline["meta"].get(key) for key in ("rows", "ingest_rows")}
+        if scale != {"rows": args.rows, "ingest_rows": args.ingest_rows}:
+            parser.error(f"the baseline was measured with {scale}, run with the same sizes to compare")
+        regressions = compare(results, baseline, args.threshold)
+    print_table(results)
+
+    if args.output:
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "rows": args.rows,
+                "ingest_rows": args.ingest_rows,
+                "seed": args.seed,
+                "repeat": args.repeat,
+            },
+            "scenarios": results,
+            "regressions": regressions,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# Chart rendering for the dashboard: cached server-side PNGs or client-side Vega-Lite specs
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# --------------------
+# Configuration
+# --------------------
+
+FIGSIZE = (10, 6)
+DPI = 100
+RENDER_CACHE_BYTES = 64 * 2**20     # Rendered PNGs kept in memory before the oldest are dropped
+
+# Chart output modes offered by the dashboard
+SERVER = "Server (PNG)"
+CLIENT = "Client (interactive)"
+CHART_MODES = [SERVER, CLIENT]
+
+# --------------------
+# Drawing
+# --------------------
+
+# Every chart kind draws a dict of frames with `ds` timestamps onto an axes.
+
+def draw_past(ax, frames, params):
+    df = frames["data"]
+    ax.plot(df["ds"], df["y"], marker="o", linestyle="-")
+
+def draw_forecast(ax, frames, params):
+    df, forecast = frames["data"], frames["forecast"]
+    ax.plot(df["ds"], df["y"], marker="o", label="Past Data")
+    ax.plot(forecast["ds"], forecast["yhat"], linestyle="dashed", label="Forecast")
+    ax.fill_between(forecast["ds"], forecast["yhat_lower"], forecast["yhat_upper"], alpha=0.3)
+    ax.legend()
+
+def draw_band(ax, frames, params):
+    # Mean line with the min/max range of every bucket
+    df = frames["data"]
+    ax.plot(df["ds"], df["y"], marker="o", linestyle="-")
+    ax.fill_between(df["ds"], df["y_min"], df["y_max"], alpha=0.3)
+
+DRAWERS = {
+    "past": draw_past,
+    "forecast": draw_forecast,
+    "band": draw_band,
+}
+
+def chart_key(kind, frames, params):
+    """Hash of the chart kind, its data and its parameters."""
+    digest = hashlib.sha256(kind.encode())
+    for name in sorted(frames):
+        digest.update(name.encode())
+        digest.update(pd.util.hash_pandas_object(frames[name], index=False).to_numpy().tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+class ChartRenderer:
+    """Render charts to PNG bytes, caching the output by data hash and parameters.
+
+    Figures are created with matplotlib's object API, so they are never
+    registered with pyplot. Each thread reuses one figure and clears it after
+    every render, so a rerun neither leaks figures nor allocates a new one.
+    The cache is an LRU bounded by total PNG size and is safe to share
+    between sessions.
+    """
+
+    def __init__(self, max_bytes=RENDER_CACHE_BYTES, figsize=FIGSIZE, dpi=DPI):
+        self.max_bytes = max_bytes
+        self.figsize = figsize
+        self.dpi = dpi
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _figure(self):
+        fig = getattr(self._local, "figure", None)
+        if fig is None:
+            # matplotlib is only loaded once a chart is rendered on the server
+            from matplotlib.figure import Figure
+            fig = self._local.figure = Figure(figsize=self.figsize, dpi=self.dpi)
+        return fig
+
+    def render(self, kind, frames, title="", xlabel="Timestamp", ylabel="Metric"):
+        """Return the chart as PNG bytes, from the cache when the same chart was drawn before."""
+        params = {"title": title, "xlabel": xlabel, "ylabel": ylabel, "figsize": self.figsize, "dpi": self.dpi}
+        key = chart_key(kind, frames, params)
+        with self._lock:
+            png = self._cache.get(key)
+            if png is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return png
+            self.misses += 1
+
+        fig = self._figure()
+        try:
+            ax = fig.add_subplot()
+            DRAWERS[kind](ax, frames, params)
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel(ylabel)
+            ax.set_title(title)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format="png")
+            png = buffer.getvalue()
+        finally:
+            fig.clear()
+
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = png
+                self._size += len(png)
+            while self._size > self.max_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._size -= len(evicted)
+        return png
+
+# --------------------
+# Client-side Charts
+# --------------------
+
+def vega_lite(kind, frames, title="", xlabel="Timestamp", ylabel="Metric"):
+    """Build (data, spec) for st.vega_lite_chart from already downsampled frames.
+
+    The browser draws the chart, so only the points are sent and the chart
+    can be zoomed and hovered.
+    """
+    x = {"field": "ds", "type": "temporal", "title": xlabel}
+    if kind == "forecast":
+        past = frames["data"][["ds", "y"]].assign(series="Past Data")
+        forecast = frames["forecast"][["ds", "yhat", "yhat_lower", "yhat_upper"]].rename(columns={"yhat": "y"})
+        data = pd.concat([past, forecast.assign(series="Forecast")], ignore_index=True)
+        layers = [
+            {
+                "transform": [{"filter": "datum.series == 'Forecast'"}],
+                "mark": {"type": "area", "opacity": 0.3},
+                "encoding": {"x": x, "y": {"field": "yhat_lower", "type": "quantitative"}, "y2": {"field": "yhat_upper"}},
+            },
+            {
+                "mark": {"type": "line", "point": True},
+                "encoding": {
+                    "x": x,
+                    "y": {"field": "y", "type": "quantitative", "title": ylabel},
+                    "color": {"field": "series", "type": "nominal", "title": None},
+                    "strokeDash": {"field": "series", "type": "nominal", "legend": None},
+                },
+            },
+        ]
+    else:
+        data = frames["data"]
+        layers = []
+        if kind == "band":
+            layers.append({
+                "mark": {"type": "area", "opacity": 0.3},
+                "encoding": {"x": x, "y": {"field": "y_min", "type": "quantitative"}, "y2": {"field": "y_max"}},
+            })
+        layers.append({
+            "mark": {"type": "line", "point": True},
+            "encoding": {"x": x, "y": {"field": "y", "type": "quantitative", "title": ylabel}},
+        })
+
+    spec = {"title": title, "width": "container", "height": 400, "layer": layers}
+    return data, spec
@@ -0,0 +1,41 @@
+# Per-product ingestion checkpoints (newest tweet id already stored)
+import json
+import os
+import tempfile
+
+CHECKPOINT_FILE = "ingest_checkpoints.json"
+
+class CheckpointStore:
+    """Remember the newest stored tweet id per product in a small JSON file.
+
+    The id is passed as since_id on the next run, so only newer tweets are
+    requested from the API.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+        try:
+            with open(path) as f:
+                self._since_ids = json.load(f)
+        except (OSError, ValueError):
+            self._since_ids = {}
+
+    def get(self, product):
+        return self._since_ids.get(product)
+
+    def advance(self, product, tweet_ids):
+        """Move the checkpoint of `product` to the newest of `tweet_ids` and save it."""
+        newest = max((int(tweet_id) for tweet_id in tweet_ids), default=None)
+        current = self.get(product)
+        if newest is None or (current is not None and newest <= int(current)):
+            return
+        self._since_ids[product] = str(newest)
+        self._save()
+
+    def _save(self):
+        # Write to a temporary file first so a crash never leaves a truncated checkpoint
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._since_ids, f, indent=2)
+        os.replace(tmp_path, self.path)
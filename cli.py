@@ -0,0 +1,74 @@
+# One command line entry point for the ingest, trends, maintenance and dashboard scripts
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+
+# Each command's module is imported only when that command runs, so `python cli.py --help`
+# and every command start without the dependencies of the others
+
+# --------------------
+# Commands
+# --------------------
+
+# Command -> (module whose main(argv) runs it, help)
+SCRIPTS = {
+    "ingest": ("main", "Fetch tweets into Elasticsearch, once or with --daemon until stopped"),
+    "demo": ("pipeline", "Run the ingestion pipeline against an in-memory Twitter API and Elasticsearch"),
+    "trends": ("pytrendData", "Fetch Google Trends data of a product into the trends store"),
+    "importtime": ("benchmarks.bench_importtime", "Check the import time of the entry points against their budgets"),
+}
+
+def backfill(argv):
+    """Add fields introduced since tweets were stored to the tweets already in the index."""
+    parser = argparse.ArgumentParser(prog="cli.py backfill", description=backfill.__doc__)
+    parser.add_argument("field", choices=["hashtags", "locations"])
+    args = parser.parse_args(argv)
+
+    import save_dsl
+
+    getattr(save_dsl, f"backfill_{args.field}")()
+
+def compact(argv):
+    """Merge the small Parquet files of every archive partition into one file."""
+    parser = argparse.ArgumentParser(prog="cli.py compact", description=compact.__doc__)
+    parser.add_argument("--archive-dir", help="Root directory of the archive (default: archive.ARCHIVE_DIR)")
+    parser.add_argument("--min-files", type=int, default=2, help="Only merge partitions with at least this many files")
+    args = parser.parse_args(argv)
+
+    import archive
+
+    archive.compact_archive(args.archive_dir or archive.ARCHIVE_DIR, args.min_files)
+
+def dashboard(argv):
+    """Start the Streamlit dashboard; further arguments are passed to `streamlit run`."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard.py")
+    return subprocess.call([sys.executable, "-m", "streamlit", "run", path, *argv])
+
+# Command -> (function called with the remaining arguments, help)
+COMMANDS = {
+    "backfill": (backfill, "Add hashtags or canonical locations to the tweets already stored"),
+    "compact": (compact, "Merge the small files of the tweet archive"),
+    "dashboard": (dashboard, "Start the Streamlit dashboard"),
+}
+
+def main(argv=None):
+    commands = {**SCRIPTS, **COMMANDS}
+    parser = argparse.ArgumentParser(
+        description="Collect tweets and Google Trends data and explore them.",
+        epilog="commands:\n" + "\n".join(f"  {name:<12}{help_text}" for name, (_, help_text) in commands.items())
+        + "\n\nOptions after the command are parsed by the command itself: python cli.py ingest --help",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=list(commands), metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments of the command")
+    args = parser.parse_args(argv)
+
+    if args.command in SCRIPTS:
+        module = importlib.import_module(SCRIPTS[args.command][0])
+        return module.main(args.args)
+    return COMMANDS[args.command][0](args.args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,41 @@
 # Import required libraries
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from prophet import Prophet
-from elasticsearch_dsl import Document, Date, Float, Integer, Keyword, Text, connections
-from collections import defaultdict, Counter
-import re
-import sqlite3
-
-import mysql.connector
+
 import hashlib
-from datetime import datetime
+import json
+from collections import deque
+
+from archive import read_archive
+from charts import CHART_MODES, CLIENT, SERVER, ChartRenderer, vega_lite
+from favourites import DB_FILE, PAGE_SIZE, FavouriteStore
+from forecasting import FORECAST_COLUMNS, FORECASTERS, ForecastCache, ProphetForecaster
+from hashtags import SpaceSaving, aggregate_hashtag_engagement
+from locations import add_location_fields
+from hype import rank_products
+from spans import RECORDER, span, summarize, timed_iter
+from timeseries import (
+    BIN_AGGREGATIONS,
+    BIN_SECONDS,
+    MAX_PLOT_POINTS,
+    bin_chunks,
+    downsample_for_plot,
+    resample_series,
+    series_from_bins,
+)
+from trends_store import TrendsStore
+from user_db import PAGE_SIZE as SHARED_PAGE_SIZE, UserDB, create_pool
+
+# MySQL connection pool shared by all sessions of the app
+@st.cache_resource
+def create_user_db():
+    return UserDB(create_pool())
+
+def get_user_db():
+    import mysql.connector  # Only the account pages need it
 
-# Connect to MySQL database
-def connect_to_db():
     try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="",
-            database="user_plot_app"
-        )
+        return create_user_db()
     except mysql.connector.Error as err:
         st.error(f"MySQL connection failed: {err}")
         st.stop()
@@ -28,196 +43,276 @@ def connect_to_db():
 # --------------------
 # Elasticsearch Configuration
 # --------------------
-ES_HOST = "http://localhost:9200"  # Elasticsearch server URL
 ES_INDEX = "twitter_datav7"        # Index name for tweets in Elasticsearch
 
-# Connect to the Elasticsearch server
-connections.create_connection(hosts=[ES_HOST])
+# Search over the tweet index. elasticsearch_dsl and the tweet model (models.py, which
+# registers the server URL) are imported on first use, and the client connects on the
+# first request, so pages that never query Elasticsearch start without either.
+def tweet_search():
+    from models import TweetDocument
+
+    return TweetDocument.search(index=ES_INDEX)
 
 # --------------------
-# Define Elasticsearch ORM Model
+# Favourites Store (SQLite)
 # --------------------
-# This class defines the structure of documents (tweets) stored in Elasticsearch
-class Tweet(Document):
-    tweet_id = Keyword()
-    timestamp = Date()
-    sentiment_score = Float()
-    likes = Integer()
-    retweets = Integer()
-    replies = Integer()
-    clicks = Integer()
-    text = Text()
-    user_location = Text()
-    followers = Integer()
-    regular_engagement = Integer()
-    google_engagement = Float()
-    high_follower_engagement = Float()
-    adjusted_engagement = Float()
-    engagement_including_sentiment = Float()
-    engagement_final = Float()
-        
-    class Index:
-        name = ES_INDEX
-        settings = {
-            "number_of_shards": 3,
-            "number_of_replicas": 2
-        }
+
+# Store shared by all sessions of the app
+@st.cache_resource
+def get_favourite_store():
+    return FavouriteStore(DB_FILE)
 
 # --------------------
-# SQLite Database Setup
+# Google Trends Store (SQLite)
 # --------------------
-DB_FILE = "engagement_data.db"  # SQLite database file
-
-# Create the database table if it doesn't exist
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS engagement_metrics5 (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            xAxis TEXT,
-            yAxis REAL
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-# Save data (x, y values) into the database
-def save_to_db(x_values, y_values):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    for x, y in zip(x_values, y_values):
-        cursor.execute(
-            "INSERT INTO engagement_metrics5 (xAxis, yAxis) VALUES (?, ?)",
-            (x, y)
-        )
-    conn.commit()
-    conn.close()
 
-# Fetch all saved engagement data from the database
-def get_saved_data():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM engagement_metrics5")
-    data = cursor.fetchall()
-    conn.close()
-    return data
+# Store filled by pytrendData.py; pages only read from it and never call Google
+@st.cache_resource
+def get_trends_store():
+    return TrendsStore()
+
+TRENDS_TTL = 600    # Seconds stored trends are cached by the dashboard
 
-# Initialize the database on app start
-init_db()
+@st.cache_data(ttl=TRENDS_TTL)
+def list_trend_series():
+    return get_trends_store().list_series()
+
+@st.cache_data(ttl=TRENDS_TTL)
+def load_trend_interest(product, geo, start, end):
+    return get_trends_store().load_interest(product, geo, start, end)
+
+@st.cache_data(ttl=TRENDS_TTL)
+def load_trend_ranking(geo, start, end):
+    return rank_products(get_trends_store().load_matrix(geo, start, end))
 
 # --------------------
 # Load Data Functions
 # --------------------
 
-# Load Twitter sentiment data (timestamp and sentiment score)
-@st.cache_data
-def load_twitter_data():
-    query = Tweet.search()[:10000]
-    response = query.execute()
-
-    records = []
-    for hit in response:
-        if hasattr(hit, 'timestamp') and hasattr(hit, 'sentiment_score'):
-            records.append({"ds": hit.timestamp, "y": hit.sentiment_score})
-    df = pd.DataFrame(records)
-    if not df.empty:
-        df["ds"] = pd.to_datetime(df["ds"]).dt.tz_localize(None)
-    return df
+# Engagement metrics stored on every tweet
+METRIC_FIELDS = [
+    "sentiment_score",
+    "regular_engagement",
+    "google_engagement",
+    "high_follower_engagement",
+    "adjusted_engagement",
+    "engagement_including_sentiment",
+    "engagement_final",
+]
+
+# Fields the dashboard time series read from each tweet
+SNAPSHOT_FIELDS = ["timestamp"] + METRIC_FIELDS
+
+# Maximum number of locations offered in the location filter
+MAX_LOCATIONS = 500
+
+# Canonical location fields the engagement views can be filtered on
+LOCATION_LEVELS = {
+    "Country": "location_country",
+    "Region": "location_region",
+    "City": "location_city",
+}
+
+# Hashtags shown in the hashtag engagement table
+HASHTAG_TABLE_SIZE = 100
+
+# Reruns whose timings are kept for the Performance page
+SPAN_RUNS = 20
+
+# Data sources of the tweet views
+ELASTICSEARCH = "Elasticsearch"
+LOCAL_ARCHIVE = "Local archive"     # Parquet copy written by main.py, works without Elasticsearch
+
+# Check whether Elasticsearch answers (checked again at most every 30 seconds)
+@st.cache_data(ttl=30)
+def elasticsearch_available():
+    try:
+        from elasticsearch_dsl import connections
+
+        import models  # Registers the Elasticsearch server URL
+        return connections.get_connection().ping()
+    except Exception:
+        return False
 
-# Load engagement data for a specific metric (optionally filtered by location)
+# Load one columnar snapshot of the archived tweets that every local archive view slices.
+# The archive is read memory-mapped, with canonical locations for filtering.
 @st.cache_data
-def load_engagement_data(metric, location=None):
-    query = Tweet.search()[:10000]
-    response = query.execute()
-
-    records = []
-    for hit in response:
-        if hasattr(hit, 'timestamp') and hasattr(hit, metric):
-            loc = getattr(hit, "user_location", "").strip().lower()
-            if location is None or loc == location:
-                records.append({"ds": hit.timestamp, "y": getattr(hit, metric)})
-    df = pd.DataFrame(records)
-    if not df.empty:
-        df["ds"] = pd.to_datetime(df["ds"]).dt.tz_localize(None)
-    return df
+def load_archive_snapshot():
+    with span("archive.read") as timing:
+        df = read_archive(SNAPSHOT_FIELDS + ["user_location"])
+        timing.items = len(df)
+    df[METRIC_FIELDS] = df[METRIC_FIELDS].astype("float64")
+    return add_location_fields(df)
+
+# Bin every metric of the whole tweet index. The index is paged through with a point-in-time,
+# so no tweets are cut off, and every page is folded into per-bin sums and counts before the
+# next one is read, so memory grows with the number of bins instead of the number of tweets.
+@st.cache_data
+def load_tweet_bins(bin_seconds):
+    from tweet_loader import iter_tweet_chunks
+
+    return bin_chunks(iter_tweet_chunks(SNAPSHOT_FIELDS, index=ES_INDEX), METRIC_FIELDS, f"{bin_seconds}s")
+
+# Select one metric from the snapshot as a (ds, y) frame aggregated into fixed time bins
+def select_series(snapshot, metric, bin_seconds, how="mean"):
+    df = snapshot[["timestamp", metric]].dropna()
+    df = df.rename(columns={"timestamp": "ds", metric: "y"})
+    if df.empty:
+        return df.reset_index(drop=True)
+    return resample_series(df, f"{bin_seconds}s", how)
+
+# Load one binned metric of all tweets from the archive snapshot or the streamed index
+def load_metric_series(metric, bin_seconds, how="mean", source=ELASTICSEARCH):
+    if source == LOCAL_ARCHIVE:
+        return select_series(load_archive_snapshot(), metric, bin_seconds, how)
+    return series_from_bins(load_tweet_bins(bin_seconds), metric, how)
+
+# Load Twitter sentiment data (timestamp and sentiment score)
+def load_twitter_data(bin_seconds, how="mean", source=ELASTICSEARCH):
+    return load_metric_series("sentiment_score", bin_seconds, how, source)
 
 # Load final engagement metric data
+def load_engagement_final(bin_seconds, how="mean", source=ELASTICSEARCH):
+    return load_metric_series("engagement_final", bin_seconds, how, source)
+
+# Bucket all engagement metrics over time in Elasticsearch (optionally for one location).
+# Each bucket carries a mean and a sum per metric, so one request serves every chart.
+# A location is a (field, value) pair; the exact-term filter is cached by Elasticsearch.
 @st.cache_data
-def load_engagement_final():
-    query = Tweet.search()[:10000]
-    response = query.execute()
-
-    records = []
-    for hit in response:
-        if hasattr(hit, 'timestamp') and hasattr(hit, 'engagement_final'):
-            records.append({"ds": hit.timestamp, "y": hit.engagement_final})
-    df = pd.DataFrame(records)
-    if not df.empty:
-        df["ds"] = pd.to_datetime(df["ds"]).dt.tz_localize(None)
+def load_engagement_buckets(bin_seconds, location=None):
+    search = tweet_search().extra(size=0)
+    if location is not None:
+        field, value = location
+        search = search.filter("term", **{field: value})
+
+    over_time = search.aggs.bucket(
+        "over_time", "date_histogram", field="timestamp", fixed_interval=f"{bin_seconds}s", min_doc_count=1
+    )
+    for metric in METRIC_FIELDS:
+        over_time.metric(f"{metric}_mean", "avg", field=metric)
+        over_time.metric(f"{metric}_sum", "sum", field=metric)
+
+    with span("es.search"):
+        response = search.execute()
+    rows = []
+    with span("es.hydrate") as timing:
+        for bucket in response.aggregations.over_time.buckets:
+            row = {"ds": bucket.key, "count": bucket.doc_count}
+            for metric in METRIC_FIELDS:
+                row[f"{metric}_mean"] = bucket[f"{metric}_mean"].value
+                row[f"{metric}_sum"] = bucket[f"{metric}_sum"].value
+            rows.append(row)
+        timing.items = len(rows)
+
+    columns = ["ds", "count"] + [f"{metric}_{how}" for metric in METRIC_FIELDS for how in ("mean", "sum")]
+    df = pd.DataFrame(rows, columns=columns)
+    df["ds"] = pd.to_datetime(df["ds"], unit="ms")
     return df
 
-# Get a list of unique user locations with counts
+# Load binned engagement data for a specific metric (optionally filtered by location)
+def load_engagement_data(metric, bin_seconds, location=None, how="mean", source=ELASTICSEARCH):
+    if source == LOCAL_ARCHIVE:
+        snapshot = load_archive_snapshot()
+        if location is not None:
+            field, value = location
+            snapshot = snapshot[snapshot[field] == value]
+        return select_series(snapshot, metric, bin_seconds, how)
+
+    buckets = load_engagement_buckets(bin_seconds, location)
+    column = "count" if how == "count" else f"{metric}_{how}"
+    df = buckets[["ds", column]].dropna()
+    return df.rename(columns={column: "y"}).astype({"y": "float64"}).reset_index(drop=True)
+
+# Get the canonical locations of one level with their tweet counts, most frequent first
 @st.cache_data
-def get_unique_user_locations():
-    query = Tweet.search()[:10000]
-    response = query.execute()
-    locations = [getattr(hit, "user_location", "").strip().lower() for hit in response if hasattr(hit, "user_location")]
-    location_counts = Counter(locations)
-    cleaned_locations = sorted(location_counts.items(), key=lambda x: x[1], reverse=True)
-    return [f"{loc.title()} ({count})" for loc, count in cleaned_locations]
+def get_unique_user_locations(field, source=ELASTICSEARCH):
+    if source == LOCAL_ARCHIVE:
+        location_counts = load_archive_snapshot()[field].value_counts().head(MAX_LOCATIONS)
+        return [(location, count) for location, count in location_counts.items() if count > 0]
+
+    search = tweet_search().extra(size=0)
+    search.aggs.bucket("locations", "terms", field=field, size=MAX_LOCATIONS)
+    with span("es.search"):
+        response = search.execute()
+    with span("es.hydrate") as timing:
+        locations = [(bucket.key, bucket.doc_count) for bucket in response.aggregations.locations.buckets]
+        timing.items = len(locations)
+    return locations
 
 # --------------------
 # Hashtag Engagement Table
 # --------------------
 
-# Extract hashtags from tweets and calculate their average engagement
+# Extract hashtags from tweets and calculate their average engagement.
+# Tweets are streamed in chunks, so only running sums and counts are kept in memory.
 @st.cache_data
-def get_hashtag_engagement_data():
-    query = Tweet.search()[:10000]
-    response = query.execute()
-
-    hashtag_engagement = defaultdict(list)
-
-    for hit in response:
-        text = getattr(hit, "text", "")
-        engagement = getattr(hit, "engagement_including_sentiment", None)
-        if not text or engagement is None:
-            continue
-
-        hashtags = re.findall(r"#\w+", text)
-        for tag in hashtags:
-            hashtag_engagement[tag.lower()].append(engagement)
-
-    # Create DataFrame of average engagement per hashtag
-    table_data = [{"Hashtag": tag, "Avg Engagement": sum(vals) / len(vals)} for tag, vals in hashtag_engagement.items() if vals]
-    df = pd.DataFrame(table_data).sort_values("Avg Engagement", ascending=False)
-    return df
+def get_hashtag_engagement_data(source=ELASTICSEARCH):
+    if source == ELASTICSEARCH:
+        # Hashtags are extracted at ingest, so Elasticsearch aggregates them over all tweets
+        search = tweet_search().extra(size=0)
+        search.aggs.bucket(
+            "hashtags", "terms", field="hashtags", size=HASHTAG_TABLE_SIZE, order={"avg_engagement": "desc"}
+        ).metric("avg_engagement", "avg", field="engagement_including_sentiment")
+        with span("es.search"):
+            response = search.execute()
+        with span("es.hydrate") as timing:
+            buckets = response.aggregations.hashtags.buckets
+            timing.items = len(buckets)
+            return pd.DataFrame(
+                [("#" + b.key, b.avg_engagement.value, b.doc_count) for b in buckets],
+                columns=["Hashtag", "Avg Engagement", "Tweets"],
+            )
+
+    with span("archive.hashtags"):
+        # Only the latest observation of each tweet, like the terms aggregation over the index
+        df = read_archive(["hashtags", "engagement_including_sentiment"])
+        return aggregate_hashtag_engagement([df], top=HASHTAG_TABLE_SIZE)
+
+# Most frequent hashtags of the live ingest stream (Space-Saving counter saved by main.py)
+@st.cache_data(ttl=30)
+def get_live_top_hashtags(k=20):
+    df = pd.DataFrame(SpaceSaving.load().top(k))
+    return df.rename(columns={"hashtag": "Hashtag", "count": "Tweets", "error": "Overcount", "avg_engagement": "Avg Engagement"})
+
+# Forecasting backend shared by all sessions of the app (Prophet fits go through a disk cache)
+@st.cache_resource
+def get_forecaster(name):
+    if name == ProphetForecaster.name:
+        return ProphetForecaster(cache=ForecastCache())
+    return FORECASTERS[name]()
 
 # --------------------
 # Plotting Functions
 # --------------------
 
-# Plot historical data
+# Renderer shared by all sessions, so identical charts are drawn only once
+@st.cache_resource
+def get_chart_renderer():
+    return ChartRenderer()
+
+# Show a chart as a cached PNG, or send its points to the browser in client mode
+def show_chart(kind, frames, title, ylabel="Metric"):
+    if st.session_state.get("chart_mode", SERVER) == CLIENT:
+        with span("chart.spec") as timing:
+            data, spec = vega_lite(kind, frames, title=title, ylabel=ylabel)
+            timing.items = len(data)
+        st.vega_lite_chart(data, spec)
+    else:
+        with span("chart.render") as timing:
+            png = get_chart_renderer().render(kind, frames, title=title, ylabel=ylabel)
+            timing.nbytes = len(png)
+        st.image(png)
+
+# Plot historical data (long series are thinned, keeping every bin's extremes)
 def plot_past_data(df, title, ylabel):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(df["ds"], df["y"], marker="o", linestyle="-")
-    ax.set_xlabel("Timestamp")
-    ax.set_ylabel(ylabel)
-    ax.set_title(title)
-    st.pyplot(fig)
-
-# Plot forecast with Prophet results
+    df = downsample_for_plot(df, method="minmax")
+    show_chart("past", {"data": df[["ds", "y"]]}, title, ylabel)
+
+# Plot forecast results (long series are thinned with LTTB)
 def plot_forecast_data(df, forecast, title):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(df["ds"], df["y"], marker="o", label="Past Data")
-    ax.plot(forecast["ds"], forecast["yhat"], linestyle="dashed", label="Forecast")
-    ax.fill_between(forecast["ds"], forecast["yhat_lower"], forecast["yhat_upper"], alpha=0.3)
-    ax.set_xlabel("Timestamp")
-    ax.set_ylabel("Metric")
-    ax.set_title(title)
-    ax.legend()
-    st.pyplot(fig)
+    df = downsample_for_plot(df)
+    forecast = downsample_for_plot(forecast, y="yhat")
+    show_chart("forecast", {"data": df[["ds", "y"]], "forecast": forecast[FORECAST_COLUMNS]}, title)
 
 # --------------------
 # Streamlit App Interface
@@ -229,91 +324,130 @@ def hash_password(password):
 
 # Save user to database
 def register_user(username, email, password):
-    try:
-        conn = connect_to_db()
-        cursor = conn.cursor()
-
-        password_hashed = hash_password(password)
-        query = """
-            INSERT INTO users (username, email, password_hash, created_at)
-            VALUES (%s, %s, %s, %s)
-        """
-        values = (username, email, password_hashed, datetime.now())
+    return get_user_db().register_user(username, email, hash_password(password))
 
-        cursor.execute(query, values)
-        conn.commit()
-
-        return True, "User registered successfully!"
-    except mysql.connector.Error as err:
-        return False, f"Error: {err}"
-    finally:
-        cursor.close()
-        conn.close()
 st.title("📊 Future Trend & Sentiment Prediction")
 
 # Sidebar options to select the type of data
 dataset_choice = st.sidebar.radio(
     "Select Dataset:",
-    ["Google Trends", "Twitter Sentiment", "Engagement Overview", "Favourite Overview", "Register and Login", "Shared plots"]
+    ["Google Trends", "Twitter Sentiment", "Engagement Overview", "Favourite Overview", "Register and Login", "Shared plots",
+     "Performance"]
 )
 
+# Time the Elasticsearch queries, forecasts and charts of every rerun of this session.
+# Nothing is recorded while the box is unticked, which keeps the timing code almost free.
+if st.sidebar.checkbox("Record timings", key="record_spans") and dataset_choice != "Performance":
+    st.session_state.setdefault("span_runs", deque(maxlen=SPAN_RUNS)).append(
+        {"page": dataset_choice, "started": pd.Timestamp.now(), "spans": RECORDER.collect()}
+    )
+else:
+    RECORDER.stop_collecting()
+
+# Charts are rendered on the server by default; client mode sends the downsampled points instead
+st.sidebar.radio("Charts:", CHART_MODES, key="chart_mode")
+
 # Show slider only for datasets that require forecasting
-if dataset_choice in ["Google Trends", "Twitter Sentiment", "Engagement Overview"]:
+if dataset_choice == "Google Trends":
+    forecast_days = st.sidebar.slider("Select number of days to predict:", 1, 90, 14)
+    forecaster = get_forecaster(st.sidebar.selectbox("Forecasting model:", list(FORECASTERS)))
+
+if dataset_choice in ["Twitter Sentiment", "Engagement Overview"]:
     forecast_seconds = st.sidebar.slider("Select number of seconds to predict:", 30, 3600, 1800, 30)
+    forecaster = get_forecaster(st.sidebar.selectbox("Forecasting model:", list(FORECASTERS)))
+
+    # Tweets are aggregated into fixed time bins before plotting and forecasting
+    bin_seconds = st.sidebar.select_slider("Time bin (seconds):", BIN_SECONDS, BIN_SECONDS[0])
+    bin_how = st.sidebar.selectbox("Aggregate tweets per bin:", BIN_AGGREGATIONS)
+    forecast_freq = f"{bin_seconds}s"
+    forecast_periods = max(1, forecast_seconds // bin_seconds)
+
+    # Tweet pages read from Elasticsearch, or from the local archive when it is not running
+    data_source = st.sidebar.radio(
+        "Data source:", [ELASTICSEARCH, LOCAL_ARCHIVE], index=0 if elasticsearch_available() else 1
+    )
+    if data_source == LOCAL_ARCHIVE and load_archive_snapshot().empty:
+        st.info("No archived tweets yet. Run `python cli.py ingest` (or `python cli.py demo`) to collect some.")
+        st.stop()
 
-# Placeholder if Google Trends data were to be added
+# Show and forecast stored Google Trends interest
 if dataset_choice == "Google Trends":
-    pass
+    st.subheader("🔎 Google Trends Interest")
+
+    trend_series = list_trend_series()
+    if trend_series.empty:
+        st.warning("No Google Trends data stored yet. Run pytrendData.py to fetch some.")
+        st.stop()
+
+    selected_trend = st.selectbox(
+        "Product and country:",
+        trend_series.to_dict("records"),
+        format_func=lambda series: f"{series['product']} ({series['geo'] or 'Worldwide'}, {series['n_days']} days)"
+    )
+
+    # Only the selected date range is read from the store
+    date_range = st.date_input(
+        "Time range:",
+        (selected_trend["start"].date(), selected_trend["end"].date()),
+        min_value=selected_trend["start"].date(),
+        max_value=selected_trend["end"].date(),
+    )
+    if len(date_range) != 2:
+        st.stop()
+    range_start = pd.Timestamp(date_range[0])
+    range_end = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
+
+    product, geo = selected_trend["product"], selected_trend["geo"]
+    df = load_trend_interest(product, geo, range_start, range_end)
+    if df.empty:
+        st.warning("No data available in the selected time range.")
+    else:
+        with span("forecast", items=len(df)):
+            _, forecast, error = next(forecaster.forecast_many({product: df}, forecast_days, "D", location=geo))
+        if error is not None:
+            st.error(f"Forecast failed: {error}")
+            st.stop()
+
+        plot_forecast_data(df, forecast, f"Predicted Search Interest in '{product}' for the Next {forecast_days} Days")
+        st.write(f"### Forecasted Data (Next {forecast_days} Days)")
+        st.dataframe(forecast[FORECAST_COLUMNS].tail(forecast_days))
+
+    # Rank every stored product of the same country by current hype
+    st.subheader("🚀 Emerging Products")
+    st.dataframe(load_trend_ranking(geo, range_start, range_end))
 
 # Process and forecast Twitter sentiment
 elif dataset_choice == "Twitter Sentiment":
-    df = load_twitter_data()
+    df = load_twitter_data(bin_seconds, bin_how, data_source)
     st.subheader("💬 Predicting Twitter Sentiment for iPhone Tweets")
 
     if df.empty:
         st.warning("No data available for Twitter Sentiment.")
     else:
-        model = Prophet()
-        model.fit(df)
-        future = model.make_future_dataframe(periods=forecast_seconds, freq="30S")
-        forecast = model.predict(future)
+        with span("forecast", items=len(df)):
+            _, forecast, error = next(forecaster.forecast_many({"sentiment_score": df}, forecast_periods, forecast_freq))
+        if error is not None:
+            st.error(f"Forecast failed: {error}")
+            st.stop()
 
         plot_forecast_data(df, forecast, f"Predicted Twitter Sentiment for the Next {forecast_seconds} Seconds")
         st.write(f"### Forecasted Data (Next {forecast_seconds} Seconds)")
-        st.dataframe(forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].tail(forecast_seconds))
+        st.dataframe(forecast[FORECAST_COLUMNS].tail(forecast_periods))
 
 # Show and forecast various engagement metrics
 elif dataset_choice == "Engagement Overview":
     st.subheader("📣 Past Engagement Metrics for iPhone Tweets")
 
-    user_locations = get_unique_user_locations()
-    selected_display = st.selectbox("Filter by User Location", ["All"] + user_locations)
-    selected_location = None if selected_display == "All" else selected_display.split(" (")[0].strip().lower()
+    location_field = LOCATION_LEVELS[st.radio("Location level", list(LOCATION_LEVELS), horizontal=True)]
+    user_locations = get_unique_user_locations(location_field, data_source)
+    selected_option = st.selectbox(
+        "Filter by User Location",
+        [None] + user_locations,
+        format_func=lambda option: "All" if option is None else f"{option[0]} ({option[1]})"
+    )
+    selected_location = None if selected_option is None else (location_field, selected_option[0])
 
-    df_final = load_engagement_final()
-    if df_final.empty:
-        st.warning("No data available for Engagement Final.")
-    else:
-        plot_past_data(df_final, "Engagement Final Over Time", "Engagement Final")
-
-        # Button to save current data into the SQLite database
-        if st.button("🔍 Save Engagement Final Data to Database"):
-            x_values = df_final["ds"].astype(str)
-            y_values = df_final["y"]
-            save_to_db(x_values, y_values)
-            st.success("Data successfully saved to the database!")
-
-        # Forecast engagement_final
-        model = Prophet()
-        model.fit(df_final)
-        future = model.make_future_dataframe(periods=forecast_seconds, freq="30S")
-        forecast = model.predict(future)
-
-        plot_forecast_data(df_final, forecast, f"Forecasted Engagement Final for the Next {forecast_seconds} Seconds")
-        st.write(f"### Forecasted Data (Next {forecast_seconds} Seconds) for Engagement Final")
-        st.dataframe(forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].tail(forecast_seconds))
-
-    # Loop through and display other engagement metrics
+    # Engagement metrics shown after Engagement Final
     metrics = [
         "regular_engagement",
         "google_engagement",
@@ -322,56 +456,122 @@ elif dataset_choice == "Engagement Overview":
         "high_follower_engagement"
     ]
 
+    # Draw the past data of every metric first, each in its own section of the page
+    sections = {}
+    series = {}
+
+    df_final = load_engagement_final(bin_seconds, bin_how, data_source)
+    if df_final.empty:
+        st.warning("No data available for Engagement Final.")
+    else:
+        sections["engagement_final"] = st.container()
+        series["engagement_final"] = df_final
+        with sections["engagement_final"]:
+            plot_past_data(df_final, "Engagement Final Over Time", "Engagement Final")
+
+            # Save the current series as a favourite in the SQLite database
+            favourite_label = st.text_input("Favourite label:", f"Engagement Final ({bin_seconds}s {bin_how})")
+            if st.button("🔍 Save Engagement Final Data to Database"):
+                get_favourite_store().save_series(favourite_label, "engagement_final", df_final["ds"], df_final["y"])
+                st.success("Data successfully saved to the database!")
+
     for metric in metrics:
-        df_metric = load_engagement_data(metric, selected_location)
+        df_metric = load_engagement_data(metric, bin_seconds, selected_location, bin_how, data_source)
         if df_metric.empty:
             st.warning(f"No data available for {metric.replace('_', ' ').title()} at the selected location.")
         else:
-            plot_past_data(df_metric, f"{metric.replace('_', ' ').title()} Over Time", metric.replace('_', ' ').title())
-
-            model = Prophet()
-            model.fit(df_metric)
-            future = model.make_future_dataframe(periods=forecast_seconds, freq="30S")
-            forecast = model.predict(future)
-
-            plot_forecast_data(df_metric, forecast, f"Forecasted {metric.replace('_', ' ').title()} for the Next {forecast_seconds} Seconds")
-            st.write(f"### Forecasted Data (Next {forecast_seconds} Seconds) for {metric.replace('_', ' ').title()}")
-            st.dataframe(forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].tail(forecast_seconds))
+            sections[metric] = st.container()
+            series[metric] = df_metric
+            with sections[metric]:
+                plot_past_data(df_metric, f"{metric.replace('_', ' ').title()} Over Time", metric.replace('_', ' ').title())
+
+    # Fit all forecasts in parallel and add each one to its section as soon as it is ready
+    # (the wait for every forecast is timed on its own, without the plotting in between)
+    with st.spinner("Forecasting engagement metrics..."):
+        for metric, forecast, error in timed_iter("forecast", forecaster.forecast_many(
+            series, forecast_periods, forecast_freq, location=selected_location
+        )):
+            label = metric.replace('_', ' ').title()
+            with sections[metric]:
+                if error is not None:
+                    st.error(f"Forecast for {label} failed: {error}")
+                    continue
+
+                plot_forecast_data(series[metric], forecast, f"Forecasted {label} for the Next {forecast_seconds} Seconds")
+                st.write(f"### Forecasted Data (Next {forecast_seconds} Seconds) for {label}")
+                st.dataframe(forecast[FORECAST_COLUMNS].tail(forecast_periods))
 
     # Display top hashtags by engagement
     st.subheader("🏷️ Hashtag Engagement Table")
-    df_hashtags = get_hashtag_engagement_data()
+    df_hashtags = get_hashtag_engagement_data(data_source)
     if df_hashtags.empty:
         st.write("No hashtag data found.")
     else:
         st.dataframe(df_hashtags.reset_index(drop=True))
 
+    st.subheader("🔥 Live Top Hashtags")
+    df_live = get_live_top_hashtags()
+    if df_live.empty:
+        st.write("No hashtags counted by the ingest loop yet.")
+    else:
+        st.dataframe(df_live)
+
 # Show saved engagement data from SQLite
 elif dataset_choice == "Favourite Overview":
     st.subheader("🔖 Favourites Overview")
 
-    saved_data = get_saved_data()
+    store = get_favourite_store()
+    saved_series = store.list_series()
 
-    if saved_data:
-        df_saved_data = pd.DataFrame(saved_data, columns=["ID", "xAxis", "yAxis"])
-        df_saved_data['xAxis'] = pd.to_datetime(df_saved_data['xAxis'], errors='coerce')
-
-        if df_saved_data['xAxis'].isnull().any():
-            st.warning("Some xAxis values could not be converted to datetime.")
+    if saved_series.empty:
+        st.write("No data found in the database.")
+    else:
+        selected_series = st.selectbox(
+            "Saved series:",
+            saved_series.to_dict("records"),
+            format_func=lambda series: f"{series['label']} – {series['metric']} ({series['n_points']} points)"
+        )
+        series_id = selected_series["id"]
+
+        # Only the selected time range is read from the database
+        date_range = st.date_input(
+            "Time range:",
+            (selected_series["start_ts"].date(), selected_series["end_ts"].date()),
+            min_value=selected_series["start_ts"].date(),
+            max_value=selected_series["end_ts"].date(),
+        )
+        if len(date_range) != 2:
+            st.stop()
+        range_start = pd.Timestamp(date_range[0])
+        range_end = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
+
+        # Plot saved data, aggregated in SQLite to at most MAX_PLOT_POINTS buckets
+        df_plot = store.load_downsampled(series_id, range_start, range_end, MAX_PLOT_POINTS)
+        show_chart(
+            "band",
+            {"data": df_plot},
+            f"{selected_series['label']} Over Time",
+            selected_series["metric"].replace('_', ' ').title(),
+        )
 
+        # Raw points, one page at a time (the last timestamp of each page starts the next one)
         st.write("### Saved Engagement Data")
-        st.dataframe(df_saved_data)
+        n_points = store.count_points(series_id, range_start, range_end)
+        pages = st.session_state.setdefault(f"favourite_pages_{series_id}_{range_start}_{range_end}", [None])
 
-        # Plot saved data
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(df_saved_data['xAxis'], df_saved_data['yAxis'], marker="o", linestyle="-")
-        ax.set_xlabel("Timestamp")
-        ax.set_ylabel("Engagement Metric")
-        ax.set_title("Saved Engagement Metrics Over Time")
-        st.pyplot(fig)
+        col_previous, col_next = st.columns(2)
+        if col_previous.button("⬅️ Previous page", disabled=len(pages) == 1):
+            pages.pop()
+        if col_next.button("Next page ➡️", disabled=len(pages) * PAGE_SIZE >= n_points):
+            pages.append(store.load_page(series_id, range_start, range_end, after=pages[-1])["ts"].iloc[-1])
 
-    else:
-        st.write("No data found in the database.")
+        df_page = store.load_page(series_id, range_start, range_end, after=pages[-1])
+        st.caption(f"Page {len(pages)} of {max(1, -(-n_points // PAGE_SIZE))} ({n_points} points in range)")
+        st.dataframe(df_page[["ds", "y"]].rename(columns={"ds": "xAxis", "y": "yAxis"}))
+
+        if st.button("🗑️ Delete this series"):
+            store.delete_series(series_id)
+            st.rerun()
 
 elif dataset_choice == "Register and Login":
 
@@ -401,3 +601,91 @@ elif dataset_choice == "Register and Login":
     with tab2:
         st.subheader("Login (not implemented yet)")
         st.info("Login functionality will be added later.")
+
+# List the plots a user sent and received, one keyset-paginated page at a time
+elif dataset_choice == "Shared plots":
+    st.subheader("📤 Shared Plots")
+
+    user_db = get_user_db()
+    username = st.text_input("Username", key="shared_username")
+    if not username:
+        st.info("Enter a username to see the plots shared by and with them.")
+        st.stop()
+    user_id = user_db.find_user_id(username)
+    if user_id is None:
+        st.error(f"User '{username}' not found.")
+        st.stop()
+
+    tab_received, tab_sent = st.tabs(["Received", "Sent"])
+    for tab, direction, list_plots, other in [
+        (tab_received, "received", user_db.list_received_plots, "From"),
+        (tab_sent, "sent", user_db.list_sent_plots, "To"),
+    ]:
+        with tab:
+            # Cursor of every visited page: the smallest plot id of the page before it
+            pages = st.session_state.setdefault(f"shared_pages_{direction}_{user_id}", [None])
+            rows = list_plots(user_id, before=pages[-1])
+            if not rows:
+                st.write(f"No {direction} plots found.")
+            else:
+                df_plots = pd.DataFrame(rows, columns=["ID", other, "Shared At"])
+                st.dataframe(df_plots)
+
+                # Plain ints: MySQL's binary protocol (prepared cursors) rejects numpy scalars
+                plot_id = st.selectbox("Show plot:", df_plots["ID"].tolist(), key=f"shared_plot_{direction}")
+                try:
+                    plot = user_db.load_plot(plot_id, user_id)
+                except ValueError as e:
+                    st.warning(f"Plot {plot_id} cannot be shown: {e}")
+                    plot = None
+                if plot is not None:
+                    x_values, y_values = plot
+                    df_plot = pd.DataFrame({"ds": pd.to_datetime(x_values, errors="coerce", format="ISO8601"), "y": y_values})
+                    plot_past_data(df_plot, f"Shared Plot {plot_id}", "Engagement Metric")
+
+            col_previous, col_next = st.columns(2)
+            if col_previous.button("⬅️ Previous page", key=f"shared_previous_{direction}", disabled=len(pages) == 1):
+                pages.pop()
+                st.rerun()
+            if col_next.button("Next page ➡️", key=f"shared_next_{direction}", disabled=len(rows) < SHARED_PAGE_SIZE):
+                pages.append(rows[-1][0])
+                st.rerun()
+
+# Break down where the time of the recorded reruns went
+elif dataset_choice == "Performance":
+    st.subheader("⏱️ Performance")
+
+    runs = list(st.session_state.get("span_runs", []))
+    if not runs:
+        st.info("Tick 'Record timings' in the sidebar, then open another page to record its timings.")
+    else:
+        # Time per stage of every rerun, most recent first
+        history = pd.DataFrame([
+            {"rerun": f"{len(runs) - position}: {run['page']} ({run['started']:%H:%M:%S})", **row}
+            for position, run in enumerate(reversed(runs))
+            for row in summarize(run["spans"])
+        ], columns=["rerun", "name", "calls", "seconds", "items", "nbytes"])
+
+        if history.empty:
+            st.info("No instrumented stage ran in the recorded reruns; cached results are not timed.")
+        else:
+            selected_run = st.selectbox("Rerun:", history["rerun"].unique())
+            breakdown = history[history["rerun"] == selected_run].drop(columns="rerun")
+            st.write(f"### {breakdown['seconds'].sum():.3f}s in instrumented stages")
+            st.bar_chart(breakdown.set_index("name")["seconds"])
+            st.dataframe(breakdown.reset_index(drop=True))
+
+            st.write("### Reruns")
+            st.bar_chart(history.pivot_table(index="rerun", columns="name", values="seconds", aggfunc="sum", sort=False))
+
+            # Every span of this session's recorded reruns, one JSON object per line
+            jsonl = "\n".join(
+                json.dumps({"page": run["page"], **recorded.as_dict()}) for run in runs for recorded in run["spans"]
+            )
+            st.download_button("Download spans (JSON lines)", jsonl, file_name="spans.jsonl")
+
+    # Totals of every session of this server process
+    st.write("### Totals (Prometheus)")
+    prometheus = RECORDER.prometheus()
+    st.code(prometheus)
+    st.download_button("Download totals (Prometheus)", prometheus, file_name="spans.prom")
@@ -0,0 +1,446 @@
+# In-process stand-ins for external services, used to exercise the pipeline locally
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from elastic_transport import ObjectApiResponse
+from elasticsearch import Elasticsearch
+from tweepy.errors import TooManyRequests
+
+# --------------------
+# Clock
+# --------------------
+
+class FakeClock:
+    """Manual clock for code that takes `clock` and `sleep` callables; sleeping advances it at once."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+# --------------------
+# Twitter API
+# --------------------
+
+class FakeResponse:
+    """Minimal requests.Response look-alike."""
+
+    def __init__(self, payload, headers=None, status_code=200, reason="OK"):
+        self._payload = payload
+        self.headers = headers or {}
+        self.status_code = status_code
+        self.reason = reason
+
+    def json(self):
+        return self._payload
+
+    @property
+    def text(self):
+        return json.dumps(self._payload)
+
+class FakeTwitterClient:
+    """Stand-in for tweepy.Client(return_type=requests.Response).
+
+    Serves `tweets` (a dict of product -> list of tweet dicts in API JSON
+    format, newest first) through search_recent_tweets with next_token
+    paging, since_id filtering and x-rate-limit-* headers. Requests past the
+    limit of a window raise TooManyRequests like the real API.
+    """
+
+    def __init__(self, tweets, users=None, limit=450, window=900, clock=time.time):
+        self.tweets = tweets
+        self.users = users or {}
+        self.limit = limit
+        self.window = window
+        self.calls = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._window_start = clock()
+        self._used = 0
+
+    def _rate_limit_headers(self):
+        now = self._clock()
+        if now >= self._window_start + self.window:
+            self._window_start = now
+            self._used = 0
+        return {
+            "x-rate-limit-limit": str(self.limit),
+            "x-rate-limit-remaining": str(max(0, self.limit - self._used)),
+            "x-rate-limit-reset": str(int(self._window_start + self.window)),
+        }
+
+    def search_recent_tweets(self, query, max_results=10, since_id=None, next_token=None, **params):
+        with self._lock:
+            self.calls += 1
+            headers = self._rate_limit_headers()
+            if self._used >= self.limit:
+                raise TooManyRequests(FakeResponse({"title": "Too Many Requests"}, headers, 429, "Too Many Requests"))
+            self._used += 1
+            headers = self._rate_limit_headers()
+
+        product = query.split(" lang:")[0]
+        tweets = self.tweets.get(product, [])
+        if since_id is not None:
+            tweets = [t for t in tweets if int(t["id"]) > int(since_id)]
+
+        offset = int(next_token or 0)
+        page = tweets[offset:offset + max_results]
+        meta = {"result_count": len(page)}
+        if page:
+            meta["newest_id"] = page[0]["id"]
+            meta["oldest_id"] = page[-1]["id"]
+        if offset + max_results < len(tweets):
+            meta["next_token"] = str(offset + max_results)
+
+        payload = {"meta": meta}
+        if page:
+            author_ids = {t["author_id"] for t in page}
+            payload["data"] = page
+            payload["includes"] = {"users": [self.users[a] for a in author_ids if a in self.users]}
+        return FakeResponse(payload, headers)
+
+SAMPLE_PRODUCTS = ["iPhone", "Pixel", "Galaxy"]
+SAMPLE_WORDS = ["love", "great", "awful", "new", "price", "battery", "camera", "slow", "best", "broken", "deal"]
+SAMPLE_HASHTAGS = ["tech", "deal", "review", "launch", "unboxing", "fail", "gadget", "sale"]
+SAMPLE_LOCATIONS = ["Berlin", "London, UK", "New York, NY", "Unknown", "Paris, France", "Tokyo", "Munich, Germany", ""]
+
+def synthetic_tweet_frame(rows, products=SAMPLE_PRODUCTS, n_users=10_000, seed=0,
+                          start=datetime(2025, 5, 1, tzinfo=timezone.utc), interval=timedelta(seconds=1)):
+    """Seeded tweets as harvested rows (see harvester.page_to_rows), with product and author_id columns.
+
+    Built column by column, so millions of rows take seconds. Tweets are
+    `interval` apart and their ids increase with time.
+    """
+    rng = np.random.default_rng(seed)
+    user_locations = np.array(SAMPLE_LOCATIONS, dtype=object)[rng.integers(len(SAMPLE_LOCATIONS), size=n_users)]
+    user_followers = rng.lognormal(7, 2, n_users).astype(np.int64)
+    authors = rng.integers(n_users, size=rows)
+
+    product = pd.Series(np.array(products, dtype=object)[rng.integers(len(products), size=rows)])
+    words = np.array(SAMPLE_WORDS, dtype=object)[rng.integers(len(SAMPLE_WORDS), size=(rows, 4))]
+    tags = np.array(SAMPLE_HASHTAGS, dtype=object)[rng.integers(len(SAMPLE_HASHTAGS), size=rows)]
+    text = product.str.cat([pd.Series(words[:, i]) for i in range(4)] + [pd.Series("#" + tags)], sep=" ")
+    counts = rng.poisson([20, 5, 3], (rows, 3))
+
+    return pd.DataFrame({
+        "tweet_id": (np.arange(rows, dtype=np.int64) + 10**18).astype(str),
+        "timestamp": pd.Timestamp(start) + pd.to_timedelta(np.arange(rows) * interval.total_seconds(), unit="s"),
+        "text": text,
+        "hashtags": tags[:, None].tolist(),
+        "likes": counts[:, 0],
+        "retweets": counts[:, 1],
+        "replies": counts[:, 2],
+        "clicks": (counts[:, 0] * 0.1).astype(np.int64),
+        "user_location": user_locations[authors],
+        "followers": user_followers[authors],
+        "product": product,
+        "author_id": (authors + 1).astype(str),
+    })
+
+def to_api_tweets(frame):
+    """Turn a synthetic tweet frame into (tweets, users) in the JSON format of the recent search endpoint.
+
+    tweets is a dict of product -> tweet dicts, newest first, as served by
+    FakeTwitterClient.
+    """
+    tweets = {}
+    for product, group in frame.groupby("product", sort=False):
+        tweets[product] = [
+            {
+                "id": row["tweet_id"],
+                "text": row["text"],
+                "created_at": row["timestamp"].strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                "author_id": row["author_id"],
+                "public_metrics": {
+                    "like_count": row["likes"], "retweet_count": row["retweets"], "reply_count": row["replies"],
+                },
+            }
+            for row in group.iloc[::-1].to_dict("records")
+        ]
+    authors = frame.drop_duplicates("author_id")
+    users = {
+        row["author_id"]: {
+            "id": row["author_id"],
+            "location": row["user_location"],
+            "public_metrics": {"followers_count": row["followers"]},
+        }
+        for row in authors.to_dict("records")
+    }
+    return tweets, users
+
+def synthetic_api_tweets(products, tweets_per_product, n_users=1000, seed=0):
+    """Seeded tweets and users for FakeTwitterClient, about `tweets_per_product` per product."""
+    return to_api_tweets(synthetic_tweet_frame(len(products) * tweets_per_product, products, n_users, seed))
+
+# --------------------
+# Elasticsearch
+# --------------------
+
+def utc_naive(value):
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_convert(None) if timestamp.tzinfo is not None else timestamp
+
+class FakeIndices:
+    """The index settings calls save_dsl makes around large loads."""
+
+    def __init__(self, es):
+        self._es = es
+        self.settings = defaultdict(dict)
+
+    def get_settings(self, index, name=None):
+        return ObjectApiResponse(meta=None, body={index: {"settings": {"index": dict(self.settings[index])}}})
+
+    def put_settings(self, index, settings):
+        self.settings[index].update(settings.get("index", {}))
+        return ObjectApiResponse(meta=None, body={"acknowledged": True})
+
+    def refresh(self, index=None):
+        return ObjectApiResponse(meta=None, body={"_shards": {"failed": 0}})
+
+    def exists(self, index):
+        return index in self._es.docs
+
+class FakeElasticsearch(Elasticsearch):
+    """In-memory stand-in for the Elasticsearch client, for bulk writes, lookups by id and paging.
+
+    Understands the _bulk requests of helpers.streaming_bulk (index, create,
+    update and delete), mget, ping, and point-in-time searches sorted by
+    timestamp with search_after (match_all or a timestamp range, no
+    aggregations). Documents are kept per index as a dict of _id -> _source.
+    Every request waits `latency` seconds first, like a network round trip,
+    so concurrent clients overlap. The first `rejections` bulk items are
+    answered with 429, like a cluster whose write queue is full, and items
+    whose _id is in `invalid_ids` fail with a mapping error.
+    """
+
+    def __init__(self, latency=0.0, rejections=0, invalid_ids=()):
+        super().__init__("http://localhost:9200")
+        self.docs = defaultdict(dict)
+        self.indices = FakeIndices(self)
+        self.latency = latency
+        self.rejections = rejections
+        self.invalid_ids = set(invalid_ids)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._pits = {}
+
+    def options(self, **kwargs):
+        return self
+
+    def ping(self, **kwargs):
+        return True
+
+    def _round_trip(self):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def bulk(self, operations, **kwargs):
+        self._round_trip()
+        lines = iter(json.loads(line) for line in operations)
+        items = []
+        with self._lock:
+            for header in lines:
+                (op, meta), = header.items()
+                index, doc_id = meta.get("_index", kwargs.get("index")), meta.get("_id")
+                docs = self.docs[index]
+                if op == "delete":
+                    found = docs.pop(doc_id, None) is not None
+                    items.append({op: {"_index": index, "_id": doc_id, "status": 200 if found else 404}})
+                    continue
+
+                body = next(lines)
+                if self.rejections:
+                    self.rejections -= 1
+                    items.append({op: {"_index": index, "_id": doc_id, "status": 429,
+                                       "error": {"type": "es_rejected_execution_exception"}}})
+                elif doc_id in self.invalid_ids:
+                    items.append({op: {"_index": index, "_id": doc_id, "status": 400,
+                                       "error": {"type": "mapper_parsing_exception"}}})
+                elif op == "update":
+                    if doc_id not in docs:
+                        items.append({op: {"_index": index, "_id": doc_id, "status": 404,
+                                           "error": {"type": "document_missing_exception"}}})
+                        continue
+                    docs[doc_id].update(body["doc"])
+                    items.append({op: {"_index": index, "_id": doc_id, "status": 200, "result": "updated"}})
+                elif op == "create" and doc_id in docs:
+                    items.append({op: {"_index": index, "_id": doc_id, "status": 409,
+                                       "error": {"type": "version_conflict_engine_exception"}}})
+                else:
+                    created = doc_id not in docs
+                    docs[doc_id] = body
+                    items.append({op: {"_index": index, "_id": doc_id, "status": 201 if created else 200,
+                                       "result": "created" if created else "updated"}})
+        errors = any("error" in next(iter(item.values())) for item in items)
+        return ObjectApiResponse(meta=None, body={"took": 1, "errors": errors, "items": items})
+
+    def mget(self, index, ids, source=None, **kwargs):
+        self._round_trip()
+        docs = []
+        with self._lock:
+            stored = self.docs[index]
+            for doc_id in ids:
+                doc = stored.get(doc_id)
+                if doc is None:
+                    docs.append({"_index": index, "_id": doc_id, "found": False})
+                    continue
+                if source is not None:
+                    doc = {field: doc[field] for field in source if field in doc}
+                docs.append({"_index": index, "_id": doc_id, "found": True, "_source": dict(doc)})
+        return ObjectApiResponse(meta=None, body={"docs": docs})
+
+    def open_point_in_time(self, index, keep_alive=None, **kwargs):
+        self._round_trip()
+        with self._lock:
+            # The snapshot is sorted like sort=[timestamp, _shard_doc]
+            snapshot = sorted(self.docs[index].items(), key=lambda item: (item[1].get("timestamp") or "", item[0]))
+            pit_id = f"pit-{len(self._pits)}"
+            self._pits[pit_id] = snapshot
+        return ObjectApiResponse(meta=None, body={"id": pit_id})
+
+    def close_point_in_time(self, id, **kwargs):
+        with self._lock:
+            self._pits.pop(id, None)
+        return ObjectApiResponse(meta=None, body={"succeeded": True})
+
+    def search(self, pit, query=None, size=10, source=None, search_after=None, **kwargs):
+        self._round_trip()
+        snapshot = self._pits[pit["id"]]
+        start = 0 if search_after is None else search_after[1] + 1
+
+        time_range = (query or {}).get("range", {}).get("timestamp", {})
+        low = utc_naive(time_range["gte"]) if "gte" in time_range else None
+        high = utc_naive(time_range["lt"]) if "lt" in time_range else None
+
+        hits = []
+        position = start
+        while position < len(snapshot) and len(hits) < size:
+            doc_id, doc = snapshot[position]
+            if time_range:
+                timestamp = utc_naive(doc.get("timestamp"))
+                if (low is not None and timestamp < low) or (high is not None and timestamp >= high):
+                    position += 1
+                    continue
+            if source is not None:
+                doc = {field: doc[field] for field in source if field in doc}
+            hits.append({"_id": doc_id, "_source": doc, "sort": [doc.get("timestamp"), position]})
+            position += 1
+        return ObjectApiResponse(meta=None, body={"pit_id": pit["id"], "hits": {"hits": hits}})
+
+    def add_documents(self, index, sources):
+        """Store documents directly, without going through _bulk (dict of _id -> _source)."""
+        with self._lock:
+            self.docs[index].update(sources)
+
+    def doc_count(self, index):
+        with self._lock:
+            return len(self.docs[index])
+
+# --------------------
+# Google Trends
+# --------------------
+
+class FakeResponseError(Exception):
+    """Like pytrends.exceptions.ResponseError: carries the HTTP response."""
+
+    def __init__(self, message, response):
+        super().__init__(message)
+        self.response = response
+
+class FakeTrendReq:
+    """Stand-in for pytrends.request.TrendReq.
+
+    Responses are looked up in `recordings`, a dict of (kind, keywords, geo,
+    timeframe) -> response (for instance responses stored by a real run).
+    Requests without a recording get deterministic synthetic data. The first
+    `rate_limited` requests are answered with 429. `requests` counts every
+    request, so callers can check how many reached "Google".
+    """
+
+    def __init__(self, recordings=None, rate_limited=0, days=90):
+        self.recordings = recordings or {}
+        self.rate_limited = rate_limited
+        self.days = days
+        self.requests = 0
+        self.payloads = []
+        self._payload = None
+
+    def _count(self):
+        self.requests += 1
+        if self.requests <= self.rate_limited:
+            raise FakeResponseError("The request failed: Google returned a response with code 429",
+                                    FakeResponse({}, status_code=429, reason="Too Many Requests"))
+
+    def build_payload(self, kw_list, cat=0, timeframe="today 5-y", geo="", gprop=""):
+        if len(kw_list) > 5:
+            raise ValueError("Google Trends compares at most 5 keywords per payload")
+        self._count()
+        self._payload = (tuple(kw_list), geo, timeframe)
+        self.payloads.append(self._payload)
+
+    def _respond(self, kind, synthesize):
+        self._count()
+        keywords, geo, timeframe = self._payload
+        recorded = self.recordings.get((kind, keywords, geo, timeframe))
+        return recorded.copy() if recorded is not None else synthesize(keywords, geo)
+
+    def _rng(self, *parts):
+        return np.random.default_rng(int.from_bytes(hashlib.sha256(json.dumps(parts).encode()).digest()[:8], "little"))
+
+    def interest_over_time(self):
+        def synthesize(keywords, geo):
+            dates = pd.date_range(end=pd.Timestamp("2025-05-01"), periods=self.days, freq="D", name="date")
+            df = pd.DataFrame(index=dates)
+            for keyword in keywords:
+                walk = self._rng("time", keyword, geo).normal(0, 5, self.days).cumsum()
+                df[keyword] = walk - walk.min()
+            if keywords:
+                df = (df * 100 / max(df.to_numpy().max(), 1)).round().astype(int)
+            df["isPartial"] = False
+            return df
+
+        return self._respond("interest_over_time", synthesize)
+
+    def interest_by_region(self):
+        def synthesize(keywords, geo):
+            regions = pd.Index(["Bavaria", "Berlin", "Hamburg", "Hesse", "Saxony"], name="geoName")
+            return pd.DataFrame(
+                {keyword: self._rng("region", keyword, geo).integers(0, 101, len(regions)) for keyword in keywords},
+                index=regions,
+            )
+
+        return self._respond("interest_by_region", synthesize)
+
+    def related_queries(self):
+        def synthesize(keywords, geo):
+            return {
+                keyword: {
+                    "top": pd.DataFrame({"query": [f"{keyword} {suffix}" for suffix in ["price", "review", "deal"]],
+                                         "value": [100, 60, 30]}),
+                    "rising": pd.DataFrame({"query": [f"{keyword} release"], "value": [250]}),
+                }
+                for keyword in keywords
+            }
+
+        return self._respond("related_queries", synthesize)
+
+    def trending_searches(self, pn="united_states"):
+        self._count()
+        recorded = self.recordings.get(("trending_searches", (), pn, None))
+        if recorded is not None:
+            return recorded.copy()
+        return pd.DataFrame({0: [f"trend {i}" for i in range(1, 21)]})
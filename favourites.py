@@ -0,0 +1,189 @@
+# SQLite store of saved favourite time series
+import sqlite3
+import threading
+import time
+from itertools import repeat
+
+import pandas as pd
+
+from timeseries import from_epoch, to_epoch
+
+# --------------------
+# Configuration
+# --------------------
+
+DB_FILE = "engagement_data.db"  # SQLite database file
+SCHEMA_VERSION = 1              # Stored in PRAGMA user_version
+PAGE_SIZE = 500                 # Points per page of the raw data table
+LEGACY_TABLE = "engagement_metrics5"  # Points saved before series had a label and metric
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS favourite_series (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        label TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        n_points INTEGER NOT NULL,
+        start_ts INTEGER,
+        end_ts INTEGER
+    );
+
+    -- Points are clustered by (series_id, ts), so range queries read one contiguous slice
+    CREATE TABLE IF NOT EXISTS favourite_points (
+        series_id INTEGER NOT NULL REFERENCES favourite_series(id) ON DELETE CASCADE,
+        ts INTEGER NOT NULL,
+        value REAL NOT NULL,
+        PRIMARY KEY (series_id, ts)
+    ) WITHOUT ROWID;
+"""
+
+# --------------------
+# Store
+# --------------------
+
+class FavouriteStore:
+    """Saved series with a label and metric, and their points keyed by epoch seconds.
+
+    Each thread gets its own connection (Streamlit serves sessions from
+    several threads). The database runs in WAL mode, so readers are not
+    blocked while a series is written.
+    """
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            self._migrate(conn)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        conn.executescript(SCHEMA)
+
+        # Import points saved by earlier versions as one series (the old table is kept)
+        legacy = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (LEGACY_TABLE,)
+        ).fetchone()
+        if legacy:
+            rows = conn.execute(f"SELECT xAxis, yAxis FROM {LEGACY_TABLE}").fetchall()
+            df = pd.DataFrame(rows, columns=["ds", "y"])
+            df["ds"] = pd.to_datetime(df["ds"], errors="coerce", format="ISO8601")
+            df = df.dropna()
+            if not df.empty:
+                self._insert_series(conn, "Saved Engagement Final", "engagement_final", df["ds"], df["y"])
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+
+    def _insert_series(self, conn, label, metric, timestamps, values):
+        points = pd.DataFrame({"ts": to_epoch(timestamps).to_numpy(), "value": pd.Series(values).to_numpy(dtype=float)})
+        points = points.drop_duplicates("ts", keep="last")
+        cursor = conn.execute(
+            "INSERT INTO favourite_series (label, metric, created_at, n_points, start_ts, end_ts) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                label,
+                metric,
+                int(time.time()),
+                len(points),
+                int(points["ts"].min()) if len(points) else None,
+                int(points["ts"].max()) if len(points) else None,
+            ),
+        )
+        series_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO favourite_points (series_id, ts, value) VALUES (?, ?, ?)",
+            zip(repeat(series_id), points["ts"].tolist(), points["value"].tolist()),
+        )
+        return series_id
+
+    def save_series(self, label, metric, timestamps, values):
+        """Save one series in a single transaction and return its id."""
+        conn = self._connection()
+        with conn:
+            return self._insert_series(conn, label, metric, timestamps, values)
+
+    def delete_series(self, series_id):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM favourite_series WHERE id = ?", (series_id,))
+
+    def list_series(self):
+        """All saved series, newest first, with their point count and time range."""
+        df = pd.read_sql_query(
+            "SELECT id, label, metric, created_at, n_points, start_ts, end_ts FROM favourite_series ORDER BY id DESC",
+            self._connection(),
+        )
+        for column in ["created_at", "start_ts", "end_ts"]:
+            df[column] = from_epoch(df[column])
+        return df
+
+    def load_page(self, series_id, start=None, end=None, after=None, limit=PAGE_SIZE):
+        """Load up to `limit` points of a series in time order.
+
+        Pages are keyset-paginated: pass the last `ts` of the previous page as
+        `after`. The returned frame has the columns ts (epoch seconds), ds and y.
+        """
+        query, params = self._range_query("SELECT ts, value AS y FROM favourite_points", series_id, start, end)
+        if after is not None:
+            query += " AND ts > ?"
+            params.append(int(after))
+        query += " ORDER BY ts LIMIT ?"
+        params.append(limit)
+
+        df = pd.read_sql_query(query, self._connection(), params=params)
+        df.insert(1, "ds", from_epoch(df["ts"]))
+        return df
+
+    def load_downsampled(self, series_id, start=None, end=None, max_points=2000):
+        """Aggregate a series into at most `max_points` equally wide time buckets.
+
+        Every bucket keeps its mean and extremes (columns ds, y, y_min, y_max),
+        so the aggregation runs in SQLite and spikes stay visible.
+        """
+        conn = self._connection()
+        bounds = conn.execute(
+            *self._range_query("SELECT MIN(ts), MAX(ts) FROM favourite_points", series_id, start, end)
+        ).fetchone()
+        if bounds[0] is None:
+            return pd.DataFrame(columns=["ds", "y", "y_min", "y_max"])
+
+        first, last = bounds
+        width = max(1, -(-(last - first + 1) // max_points))
+        query, params = self._range_query(
+            "SELECT MIN(ts) AS ts, AVG(value) AS y, MIN(value) AS y_min, MAX(value) AS y_max FROM favourite_points",
+            series_id,
+            start,
+            end,
+        )
+        query += " GROUP BY (ts - ?) / ? ORDER BY ts"
+        params += [first, width]
+
+        df = pd.read_sql_query(query, conn, params=params)
+        df.insert(0, "ds", from_epoch(df.pop("ts")))
+        return df
+
+    def count_points(self, series_id, start=None, end=None):
+        query, params = self._range_query("SELECT COUNT(*) FROM favourite_points", series_id, start, end)
+        return self._connection().execute(query, params).fetchone()[0]
+
+    @staticmethod
+    def _range_query(select, series_id, start, end):
+        query = select + " WHERE series_id = ?"
+        params = [series_id]
+        if start is not None:
+            query += " AND ts >= ?"
+            params.append(int(to_epoch([start]).iloc[0]))
+        if end is not None:
+            query += " AND ts < ?"
+            params.append(int(to_epoch([end]).iloc[0]))
+        return query, params
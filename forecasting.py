@@ -0,0 +1,441 @@
+# Forecasting helpers shared by the dashboard pages
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+# Prophet is imported on first use (in the worker processes for fits), so
+# pages that only use the Holt backend never load it.
+
+# --------------------
+# Configuration
+# --------------------
+
+FORECAST_FREQ = "30s"       # Spacing of the forecasted points
+FORECAST_TIMEOUT = 300      # Seconds to wait for all forecasts of one page
+FORECAST_COLUMNS = ["ds", "yhat", "yhat_lower", "yhat_upper"]
+
+CACHE_DIR = "forecast_cache"            # Directory of the on-disk forecast cache
+CACHE_MAX_BYTES = 512 * 1024 * 1024     # Least recently used entries are evicted above this size
+WARM_START_MAX_GROWTH = 0.1             # Warm-start only if the series grew by at most 10%
+
+# Smoothing parameters searched by the Holt backend (every pair is tried per series)
+HOLT_ALPHAS = [0.1, 0.3, 0.5, 0.7, 0.9]
+HOLT_BETAS = [0.01, 0.05, 0.1, 0.3]
+INTERVAL_WIDTH = 0.8                    # Same default uncertainty interval as Prophet
+HOLT_MIN_POINTS = 2                     # Shorter series have no trend to fit and are skipped
+
+# --------------------
+# Functions
+# --------------------
+
+def available_cores():
+    """Number of CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def fit_and_predict(df, periods, freq=FORECAST_FREQ, init=None):
+    """Fit Prophet on a (ds, y) frame and forecast `periods` steps past its end.
+
+    `init` optionally holds parameters of an earlier fit to warm-start from.
+    Returns the fitted model serialized as JSON together with the forecast.
+    """
+    from prophet import Prophet
+    from prophet.serialize import model_to_json
+
+    model = Prophet()
+    if init is not None and len(init["delta"]) != changepoint_count(model, df):
+        # Short series get fewer changepoints, so the old delta does not fit the new model
+        init = None
+    if init is not None:
+        try:
+            model.fit(df, init=init)
+        except Exception:
+            # A fitted Prophet model cannot be fitted again, so start over cold
+            model = Prophet()
+            model.fit(df)
+    else:
+        model.fit(df)
+    future = model.make_future_dataframe(periods=periods, freq=freq)
+    return model_to_json(model), model.predict(future)[FORECAST_COLUMNS]
+
+def changepoint_count(model, df):
+    """Length of the delta parameter Prophet will fit on `df` (it caps changepoints on short histories)."""
+    history_size = int(np.floor(df["y"].notna().sum() * model.changepoint_range))
+    return max(1, min(model.n_changepoints, history_size - 1))
+
+def warm_start_params(model):
+    """Extract the fitted parameters of a Prophet model for use as `init`."""
+    params = {}
+    for name in ["k", "m", "sigma_obs"]:
+        if model.mcmc_samples == 0:
+            params[name] = model.params[name][0][0]
+        else:
+            params[name] = np.mean(model.params[name])
+    for name in ["delta", "beta"]:
+        if model.mcmc_samples == 0:
+            params[name] = model.params[name][0]
+        else:
+            params[name] = np.mean(model.params[name], axis=0)
+    return params
+
+# --------------------
+# Forecast Cache
+# --------------------
+
+class ForecastCache:
+    """On-disk cache of fitted Prophet models and their forecasts.
+
+    Entries are keyed by a hash of the input series, the metric, the location
+    and the horizon. The cache is trimmed to `max_bytes` by evicting the least
+    recently used entries.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, df, metric, location, periods, freq=FORECAST_FREQ):
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(df[["ds", "y"]], index=False).to_numpy().tobytes())
+        digest.update(json.dumps([metric, location, periods, freq]).encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _latest_path(self, metric, location, freq):
+        scope = hashlib.sha256(json.dumps([metric, location, freq]).encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"latest-{scope}.json")
+
+    def _write_atomic(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _load(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        os.utime(path)  # Mark as recently used
+        return entry
+
+    def get(self, key):
+        """Return the cached forecast for `key`, or None."""
+        entry = self._load(key)
+        return None if entry is None else entry["forecast"]
+
+    def put(self, key, metric, location, freq, model_json, forecast, n_points):
+        """Store a fitted model and its forecast, then trim the cache."""
+        entry = {"model": model_json, "forecast": forecast, "n_points": n_points}
+        self._write_atomic(self._entry_path(key), pickle.dumps(entry))
+        latest = {"key": key, "n_points": n_points}
+        self._write_atomic(self._latest_path(metric, location, freq), json.dumps(latest).encode())
+        self.evict()
+
+    def warm_start(self, metric, location, df, freq=FORECAST_FREQ):
+        """Return warm-start parameters from the last fit of this metric and location.
+
+        Only used when the series has grown by a few points since that fit;
+        otherwise None is returned and the model is fitted cold.
+        """
+        try:
+            with open(self._latest_path(metric, location, freq)) as f:
+                latest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        previous_points = latest["n_points"]
+        if not previous_points <= len(df) <= previous_points * (1 + WARM_START_MAX_GROWTH):
+            return None
+
+        entry = self._load(latest["key"])
+        if entry is None:
+            return None
+        from prophet.serialize import model_from_json
+        return warm_start_params(model_from_json(entry["model"]))
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+# --------------------
+# Worker Pool
+# --------------------
+
+_pools = {}                     # Worker count -> process pool shared by every rerun and session
+_pools_lock = threading.Lock()
+
+def get_pool(workers):
+    """Process pool with `workers` workers, created on first use and kept for later calls."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+def terminate_workers(pool):
+    """Shut a process pool down and kill its worker processes, running fits included.
+
+    ProcessPoolExecutor.terminate_workers only exists from Python 3.14; older
+    versions keep the processes in the private `_processes` mapping. Without
+    either, the pool is only shut down and its running fits finish in the
+    background.
+    """
+    if hasattr(pool, "terminate_workers"):
+        pool.terminate_workers()
+        return
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+def discard_pool(pool, terminate=False):
+    """Stop sharing a pool; with `terminate`, its worker processes are killed, running fits included."""
+    with _pools_lock:
+        for workers, shared in list(_pools.items()):
+            if shared is pool:
+                del _pools[workers]
+    if terminate:
+        terminate_workers(pool)
+    else:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def forecast_many(series, periods, freq=FORECAST_FREQ, timeout=FORECAST_TIMEOUT, max_workers=None,
+                  cache=None, location=None):
+    """Fit every named (ds, y) frame in `series` in parallel worker processes.
+
+    Yields (name, forecast, error) tuples in completion order, so callers can
+    show each result as soon as it is ready. A failed or timed-out fit yields
+    its exception as `error` and does not hold back the other series. With a
+    `cache`, known forecasts are returned without fitting and new fits are
+    warm-started from the previous model of the same metric and location.
+    """
+    jobs = {}
+    for name, df in series.items():
+        key = None
+        init = None
+        if cache is not None:
+            key = cache.key(df, name, location, periods, freq)
+            forecast = cache.get(key)
+            if forecast is not None:
+                yield name, forecast, None
+                continue
+            init = cache.warm_start(name, location, df, freq)
+        jobs[name] = (df, key, init)
+
+    if not jobs:
+        return
+
+    workers = max_workers or available_cores()
+    def submit(pool):
+        return {pool.submit(fit_and_predict, df, periods, freq, init): name for name, (df, key, init) in jobs.items()}
+
+    pool = get_pool(workers)
+    try:
+        futures = submit(pool)
+    except BrokenProcessPool:
+        # A worker of the shared pool died earlier (or was terminated after a timeout)
+        discard_pool(pool)
+        pool = get_pool(workers)
+        futures = submit(pool)
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            pending.discard(future)
+            name = futures[future]
+            error = future.exception()
+            if error is not None:
+                if isinstance(error, BrokenProcessPool):
+                    discard_pool(pool)
+                yield name, None, error
+                continue
+
+            model_json, forecast = future.result()
+            if cache is not None:
+                df, key, _ = jobs[name]
+                cache.put(key, name, location, freq, model_json, forecast, len(df))
+            yield name, forecast, None
+    except TimeoutError:
+        # Stuck fits would keep their workers busy for every later rerun, so the pool is
+        # replaced and its processes are killed (fits of other sessions fail with it)
+        discard_pool(pool, terminate=True)
+        for future in pending:
+            yield futures[future], None, TimeoutError(f"Forecast did not finish within {timeout}s")
+    finally:
+        # Fits of a page that stopped early are not started any more
+        for future in pending:
+            future.cancel()
+
+# --------------------
+# Holt Exponential Smoothing
+# --------------------
+
+def to_regular_grid(df, freq=FORECAST_FREQ):
+    """Average a (ds, y) frame into fixed bins of `freq`, interpolating empty bins."""
+    values = df.set_index("ds")["y"].sort_index().resample(freq).mean()
+    return values.interpolate(limit_area="inside")
+
+def holt_smooth(values, alpha, beta):
+    """Run Holt's linear smoothing along the rows of a (series x time) matrix.
+
+    Rows may start with NaN padding; each row starts smoothing at its first
+    value. Returns the final level and trend and the one-step-ahead fitted values.
+    """
+    rows, steps = values.shape
+    level = np.full(rows, np.nan)
+    trend = np.zeros(rows)
+    fitted = np.full(values.shape, np.nan)
+
+    for t in range(steps):
+        y = values[:, t]
+        prediction = level + trend
+        fitted[:, t] = prediction
+        started = ~np.isnan(level)
+        new_level = np.where(started, alpha * y + (1 - alpha) * prediction, y)
+        trend = np.where(started, beta * (new_level - level) + (1 - beta) * trend, 0.0)
+        level = new_level
+
+    return level, trend, fitted
+
+def holt_forecast_batch(series, periods, freq=FORECAST_FREQ, interval_width=INTERVAL_WIDTH):
+    """Forecast many (ds, y) frames with Holt's linear method in one vectorized pass.
+
+    Every series is put on a regular `freq` grid and right-aligned in one
+    matrix. Each (alpha, beta) pair of the search grid is run for all series at
+    once and the pair with the smallest one-step error is kept per series.
+    Intervals come from the empirical quantiles of the one-step residuals,
+    widened with the horizon. Returns a dict of frames shaped like Prophet's
+    ds/yhat/yhat_lower/yhat_upper output; series with fewer than
+    HOLT_MIN_POINTS values are left out.
+    """
+    grids = {name: to_regular_grid(series[name], freq) for name in series}
+    grids = {name: grid for name, grid in grids.items() if grid.notna().sum() >= HOLT_MIN_POINTS}
+    if not grids:
+        return {}
+    names, grids = list(grids), list(grids.values())
+    steps = max(len(grid) for grid in grids)
+
+    # Right-align the series so that they all end in the last column
+    values = np.full((len(names), steps), np.nan)
+    for row, grid in enumerate(grids):
+        values[row, steps - len(grid):] = grid.to_numpy(dtype="float64")
+
+    # Try every (alpha, beta) pair for every series in one batch
+    alphas, betas = np.meshgrid(HOLT_ALPHAS, HOLT_BETAS, indexing="ij")
+    alphas, betas = alphas.ravel(), betas.ravel()
+    n_params = len(alphas)
+    stacked = np.repeat(values, n_params, axis=0)
+    level, trend, fitted = holt_smooth(stacked, np.tile(alphas, len(names)), np.tile(betas, len(names)))
+
+    errors = np.nansum((stacked - fitted) ** 2, axis=1).reshape(len(names), n_params)
+    best = np.arange(len(names)) * n_params + errors.argmin(axis=1)
+    level, trend, fitted = level[best], trend[best], fitted[best]
+    alpha, beta = np.tile(alphas, len(names))[best], np.tile(betas, len(names))[best]
+
+    # Empirical residual quantiles, widened with the horizon like additive-error Holt
+    residuals = values - fitted
+    has_residuals = (~np.isnan(residuals)).sum(axis=1) > 0
+    low_q, high_q = (1 - interval_width) / 2, 1 - (1 - interval_width) / 2
+    quantiles = np.zeros((2, len(names)))
+    if has_residuals.any():
+        quantiles[:, has_residuals] = np.nanquantile(residuals[has_residuals], [low_q, high_q], axis=1)
+    horizon = np.arange(1, periods + 1)
+    slope_share = (alpha * beta)[:, None]
+    growth = np.sqrt(1 + (horizon - 1) * (
+        alpha[:, None] ** 2 + alpha[:, None] * slope_share * horizon + slope_share ** 2 * horizon * (2 * horizon - 1) / 6
+    ))
+    future = level[:, None] + trend[:, None] * horizon
+
+    forecasts = {}
+    for row, (name, grid) in enumerate(zip(names, grids)):
+        history = fitted[row, steps - len(grid):]
+        history = np.where(np.isnan(history), grid.to_numpy(dtype="float64"), history)
+        future_ds = pd.date_range(grid.index[-1], periods=periods + 1, freq=freq)[1:]
+
+        yhat = np.concatenate([history, future[row]])
+        spread_low = np.concatenate([np.full(len(grid), quantiles[0, row]), quantiles[0, row] * growth[row]])
+        spread_high = np.concatenate([np.full(len(grid), quantiles[1, row]), quantiles[1, row] * growth[row]])
+        forecasts[name] = pd.DataFrame({
+            "ds": grid.index.append(future_ds),
+            "yhat": yhat,
+            "yhat_lower": yhat + spread_low,
+            "yhat_upper": yhat + spread_high,
+        })
+    return forecasts
+
+# --------------------
+# Forecasting Backends
+# --------------------
+
+class ProphetForecaster:
+    """Prophet fits in a process pool, with an optional on-disk cache."""
+
+    name = "Prophet"
+
+    def __init__(self, cache=None, timeout=FORECAST_TIMEOUT, max_workers=None):
+        self.cache = cache
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+    def forecast_many(self, series, periods, freq=FORECAST_FREQ, location=None):
+        return forecast_many(
+            series, periods, freq, self.timeout, self.max_workers, cache=self.cache, location=location
+        )
+
+class HoltForecaster:
+    """NumPy-only Holt's linear smoothing, all series in one batched call."""
+
+    name = "Holt"
+
+    def forecast_many(self, series, periods, freq=FORECAST_FREQ, location=None):
+        if not series:
+            return
+        try:
+            forecasts = holt_forecast_batch(series, periods, freq)
+        except Exception as error:
+            for name in series:
+                yield name, None, error
+            return
+        for name in series:
+            if name in forecasts:
+                yield name, forecasts[name], None
+            else:
+                yield name, None, ValueError(f"Holt needs at least {HOLT_MIN_POINTS} points, the series is too short")
+
+# Forecasting backends selectable in the dashboard
+FORECASTERS = {
+    ProphetForecaster.name: ProphetForecaster,
+    HoltForecaster.name: HoltForecaster,
+}
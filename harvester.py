@@ -0,0 +1,237 @@
+# Paginated, rate-limit-aware tweet harvesting
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from hashtags import extract_hashtags
+
+# --------------------
+# Configuration
+# --------------------
+
+PAGE_SIZE = 100             # Largest page the recent search endpoint returns
+MIN_PAGE_SIZE = 10          # Smallest page the recent search endpoint accepts
+QUEUE_SIZE = 1000           # Rows buffered between harvesting threads and the consumer
+RESET_FALLBACK = 60         # Seconds to wait when the rate limit is hit without a known window reset
+
+TWEET_FIELDS = ["created_at", "public_metrics", "author_id", "entities"]
+USER_FIELDS = ["location", "public_metrics"]
+
+# --------------------
+# Rate Limiting
+# --------------------
+
+class RateLimitBucket:
+    """Token bucket fed by the x-rate-limit-* headers of the Twitter API.
+
+    Each request takes one token. The bucket is refilled from the
+    `remaining` header of every response and blocks callers once it is
+    empty until the window resets, so requests stop before a 429. When
+    it runs out before any response has named the reset time, it waits
+    RESET_FALLBACK seconds. It is thread safe and meant to be shared by
+    all requests on one token.
+    """
+
+    def __init__(self, limit=None, clock=time.time, sleep=time.sleep):
+        self.limit = limit
+        self.tokens = limit
+        self.reset_at = None
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, waiting for the window reset if none are left."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                if self.reset_at is not None and now >= self.reset_at:
+                    # New window: allow requests again until the next response says otherwise
+                    self.tokens = self.limit
+                    self.reset_at = None
+                if self.tokens is None or self.tokens > 0:
+                    if self.tokens is not None:
+                        self.tokens -= 1
+                    return
+                if self.reset_at is None:
+                    # No response has named the window yet: wait a fixed backoff, then refill
+                    self.reset_at = now + RESET_FALLBACK
+                wait = self.reset_at - now + 1
+            print(f"⏱ Rate limit reached, waiting {wait:.0f}s…")
+            self._sleep(wait)
+
+    def update(self, headers):
+        """Refill the bucket from the rate limit headers of a response."""
+        if "x-rate-limit-remaining" not in headers:
+            return
+        remaining = int(headers["x-rate-limit-remaining"])
+        reset_at = int(headers.get("x-rate-limit-reset", self._clock()))
+        with self._lock:
+            if "x-rate-limit-limit" in headers:
+                self.limit = int(headers["x-rate-limit-limit"])
+            if self.reset_at == reset_at and self.tokens is not None:
+                # Same window: responses may arrive out of order, keep the lower count
+                self.tokens = min(self.tokens, remaining)
+            else:
+                self.tokens = remaining
+            self.reset_at = reset_at
+
+    def rate_limited(self, headers):
+        """Empty the bucket after a 429, until the reset in `headers` or RESET_FALLBACK seconds from now."""
+        headers = dict(headers)
+        headers["x-rate-limit-remaining"] = "0"
+        headers.setdefault("x-rate-limit-reset", str(int(self._clock()) + RESET_FALLBACK))
+        self.update(headers)
+
+# --------------------
+# Harvester
+# --------------------
+
+class HarvestError(Exception):
+    """Searches of harvest_many that failed; `errors` maps each product to its exception."""
+
+    def __init__(self, errors):
+        super().__init__(", ".join(f"{product}: {error!r}" for product, error in errors.items()))
+        self.errors = errors
+
+def parse_created_at(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def page_to_rows(payload):
+    """Turn one JSON page of the recent search endpoint into tweet rows."""
+    users = {
+        u["id"]: {
+            "location": u.get("location") or "Unknown",
+            "followers": u.get("public_metrics", {}).get("followers_count", 0)
+        }
+        for u in payload.get("includes", {}).get("users", [])
+    }
+
+    rows = []
+    for t in payload.get("data", []):
+        u = users.get(t.get("author_id"), {"location": "Unknown", "followers": 0})
+        metrics = t.get("public_metrics", {})
+        rows.append({
+            "tweet_id":         str(t["id"]),
+            "timestamp":        parse_created_at(t["created_at"]),
+            "text":             t["text"],
+            "hashtags":         extract_hashtags(t["text"], t.get("entities")),
+            "likes":            metrics.get("like_count", 0),
+            "retweets":         metrics.get("retweet_count", 0),
+            "replies":          metrics.get("reply_count", 0),
+            "clicks":           int(metrics.get("like_count", 0) * 0.1),  # Estimate clicks
+            "user_location":    u["location"],
+            "followers":        u["followers"]
+        })
+    return rows
+
+class TweetHarvester:
+    """Page through recent tweets for one or more products.
+
+    `client` is a tweepy.Client created with return_type=requests.Response
+    (or a fake with the same search_recent_tweets method), so that the rate
+    limit headers of every page are visible.
+    """
+
+    def __init__(self, client, bucket=None, max_workers=4):
+        self.client = client
+        self.bucket = bucket or RateLimitBucket()
+        self.max_workers = max_workers
+
+    def _search(self, **params):
+        from tweepy.errors import TooManyRequests  # Handle Twitter rate limits
+
+        while True:
+            self.bucket.acquire()
+            try:
+                response = self.client.search_recent_tweets(**params)
+            except TooManyRequests as e:
+                # Another consumer of the token used up the window; wait for the reset
+                self.bucket.rate_limited(e.response.headers)
+                continue
+            self.bucket.update(response.headers)
+            return response.json()
+
+    def harvest(self, product, max_tweets=None, since_id=None):
+        """Yield tweet rows for `product`, following next_token until `max_tweets` or the end."""
+        next_token = None
+        fetched = 0
+        while max_tweets is None or fetched < max_tweets:
+            page_size = PAGE_SIZE if max_tweets is None else min(PAGE_SIZE, max_tweets - fetched)
+            params = {
+                "query": f"{product} lang:en -is:retweet",
+                "max_results": max(MIN_PAGE_SIZE, page_size),
+                "tweet_fields": TWEET_FIELDS,
+                "user_fields": USER_FIELDS,
+                "expansions": ["author_id"],
+            }
+            if since_id is not None:
+                params["since_id"] = since_id
+            if next_token is not None:
+                params["next_token"] = next_token
+
+            payload = self._search(**params)
+            for row in page_to_rows(payload)[:page_size]:
+                fetched += 1
+                yield row
+
+            next_token = payload.get("meta", {}).get("next_token")
+            if next_token is None:
+                break
+
+    def harvest_many(self, products, max_tweets=None, since_ids=None):
+        """Harvest several products concurrently and yield (product, row) pairs as they arrive.
+
+        `since_ids` optionally maps a product to the newest tweet id already stored.
+        A failing search is reported and the other products go on; once they
+        are all done, the failures are raised together as a HarvestError.
+        """
+        since_ids = since_ids or {}
+        rows = queue.Queue(maxsize=QUEUE_SIZE)
+        done = object()
+        stop = threading.Event()
+
+        def put(item):
+            # Give up once the consumer has stopped reading
+            while not stop.is_set():
+                try:
+                    rows.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker(product):
+            try:
+                for row in self.harvest(product, max_tweets, since_id=since_ids.get(product)):
+                    if not put((product, row)):
+                        return
+            except Exception as e:
+                put((product, e))
+            finally:
+                put((product, done))
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        for product in products:
+            executor.submit(worker, product)
+
+        errors = {}
+        try:
+            remaining = len(products)
+            while remaining:
+                product, item = rows.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    print(f"⚠️ Search for '{product}' failed, the other products go on: {item!r}")
+                    errors[product] = item
+                else:
+                    yield product, item
+        finally:
+            # Let blocked workers give up when the consumer stops early
+            stop.set()
+            executor.shutdown(wait=False)
+        if errors:
+            raise HarvestError(errors)
@@ -0,0 +1,132 @@
+# Hashtag extraction and a bounded-memory top-k counter of hashtag engagement
+import heapq
+import json
+import os
+import re
+import tempfile
+
+import pandas as pd
+
+HASHTAG_PATTERN = re.compile(r"#(\w+)")
+TOPK_FILE = "hashtag_topk.json"     # Live top hashtags written by the ingest loop
+TOPK_CAPACITY = 1000                # Hashtags monitored by the counter
+
+def extract_hashtags(text, entities=None):
+    """Lower-cased hashtags of a tweet, without duplicates, in order of appearance.
+
+    Uses the hashtag entities of the API response when present and falls
+    back to a regex over the text.
+    """
+    if entities and "hashtags" in entities:
+        tags = (tag["tag"] for tag in entities["hashtags"])
+    else:
+        tags = HASHTAG_PATTERN.findall(text or "")
+    return list(dict.fromkeys(tag.lower() for tag in tags))
+
+def aggregate_hashtag_engagement(chunks, top=None):
+    """Average engagement and tweet count per hashtag over frames of hashtags and engagement_including_sentiment.
+
+    The hashtags column holds the lists stored by `extract_hashtags`. The
+    frames are consumed one at a time, so only running sums and counts are
+    kept in memory. Returns Hashtag, Avg Engagement and Tweets columns,
+    highest average first.
+    """
+    totals = pd.Series(dtype="float64")
+    counts = pd.Series(dtype="int64")
+
+    for chunk in chunks:
+        chunk = chunk.dropna(subset=["engagement_including_sentiment"])
+
+        # One row per (tweet, hashtag) pair, keyed by the tweet's row label
+        hashtags = chunk["hashtags"].explode().dropna()
+        engagement = chunk.loc[hashtags.index, "engagement_including_sentiment"].groupby(("#" + hashtags).to_numpy())
+        totals = totals.add(engagement.sum(), fill_value=0)
+        counts = counts.add(engagement.count(), fill_value=0)
+
+    avg_engagement = totals / counts
+    df = pd.DataFrame({
+        "Hashtag": avg_engagement.index,
+        "Avg Engagement": avg_engagement.to_numpy(),
+        "Tweets": counts.reindex(avg_engagement.index).to_numpy(dtype="int64"),
+    })
+    df = df.sort_values("Avg Engagement", ascending=False)
+    return df if top is None else df.head(top)
+
+class SpaceSaving:
+    """Space-Saving heavy hitters over a stream of hashtags.
+
+    At most `capacity` hashtags are monitored. A new hashtag replaces the one
+    with the lowest count and inherits that count as its error bound, so
+    every hashtag seen more than N / capacity times (N = total count) is
+    guaranteed to be monitored. The engagement of every monitored hashtag is
+    summed as well, for its average.
+    """
+
+    def __init__(self, capacity=TOPK_CAPACITY):
+        self.capacity = capacity
+        self.total = 0
+        self._items = {}        # hashtag -> [count, error, engagement sum, engagement count]
+        self._heap = []         # (count, hashtag), with stale entries skipped lazily
+
+    def add(self, hashtag, engagement=0.0):
+        self.total += 1
+        item = self._items.get(hashtag)
+        if item is None:
+            if len(self._items) < self.capacity:
+                item = self._items[hashtag] = [0, 0, 0.0, 0]
+            else:
+                count = self._pop_min()
+                item = self._items[hashtag] = [count, count, 0.0, 0]
+        item[0] += 1
+        item[2] += engagement
+        item[3] += 1
+        heapq.heappush(self._heap, (item[0], hashtag))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(item[0], tag) for tag, item in self._items.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, hashtag = heapq.heappop(self._heap)
+            item = self._items.get(hashtag)
+            if item is not None and item[0] == count:
+                del self._items[hashtag]
+                return count
+
+    def update(self, hashtag_lists, engagement):
+        """Add the hashtags of many tweets with each tweet's engagement."""
+        for hashtags, value in zip(hashtag_lists, engagement):
+            for hashtag in hashtags:
+                self.add(hashtag, float(value))
+
+    def top(self, k=20):
+        """The k most frequent hashtags as dicts of hashtag, count, error and avg_engagement."""
+        ranked = heapq.nlargest(k, self._items.items(), key=lambda entry: entry[1][0])
+        return [
+            {"hashtag": tag, "count": count, "error": error, "avg_engagement": total / n if n else 0.0}
+            for tag, (count, error, total, n) in ranked
+        ]
+
+    def save(self, path=TOPK_FILE):
+        # Write to a temporary file first so readers never see a partial file
+        state = {"capacity": self.capacity, "total": self.total, "items": self._items}
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=TOPK_FILE, capacity=TOPK_CAPACITY):
+        """Load a saved counter, or start an empty one if there is none."""
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return cls(capacity)
+        counter = cls(state["capacity"])
+        counter.total = state["total"]
+        counter._items = state["items"]
+        counter._heap = [(item[0], tag) for tag, item in counter._items.items()]
+        heapq.heapify(counter._heap)
+        return counter
@@ -0,0 +1,133 @@
+# Vectorized hype detection over a wide time-by-product matrix of search interest
+import numpy as np
+import pandas as pd
+
+# --------------------
+# Configuration
+# --------------------
+
+GROWTH_PERIODS = 2      # Growth is measured over this many time steps (every 2 days on daily data)
+WINDOW = 14             # Time steps of the baseline that bursts are measured against
+Z_THRESHOLD = 3.0       # Z-score from which a value counts as a burst
+MIN_INTEREST = 1        # Products below this interest at the latest step are not ranked
+INTEREST_FLOOR = 1      # Smallest base and deviation used for growth and z-scores (Trends reports < 1 as 0)
+
+SIGNAL_COLUMNS = ["interest", "growth", "zscore", "acceleration", "burst", "breakout", "hype_score"]
+
+# --------------------
+# Signals
+# --------------------
+
+# Every signal is computed on the whole (time x product) array at once; each
+# column is scored on its own, so the scale of a column (Google Trends scales
+# every payload to its own peak) does not change the result.
+
+def lagged(values, periods):
+    """Shift a (time x product) array down by `periods` rows, filling with NaN."""
+    out = np.full_like(values, np.nan)
+    if periods < len(values):
+        out[periods:] = values[:len(values) - periods]
+    return out
+
+def rolling_growth(values, periods=GROWTH_PERIODS, floor=INTEREST_FLOOR):
+    """Percentage change over `periods` steps; NaN where there is no earlier value.
+
+    An earlier value below `floor` (0 for a product nobody searched yet)
+    counts as `floor`, so rising from nothing is strong finite growth.
+    """
+    base = lagged(values, periods)
+    return (values - base) / np.maximum(base, floor) * 100
+
+def rolling_baseline(values, window=WINDOW):
+    """Mean, standard deviation and maximum of the `window` steps before each step.
+
+    Mean and deviation come from running sums, so the cost does not depend
+    on the window length. Missing values are left out of the baseline.
+    """
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+
+    def window_sum(x):
+        # Sum over rows [t - window, t) for every row t
+        cumulative = np.zeros((len(x) + 1,) + x.shape[1:])
+        np.cumsum(x, axis=0, out=cumulative[1:])
+        rows = np.arange(len(x))
+        return cumulative[rows] - cumulative[np.maximum(rows - window, 0)]
+
+    count = window_sum(valid.astype(float))
+    total = window_sum(filled)
+    total_sq = window_sum(filled * filled)
+
+    mean = np.full_like(values, np.nan)
+    np.divide(total, count, out=mean, where=count > 0)
+    variance = np.full_like(values, np.nan)
+    np.divide(total_sq, count, out=variance, where=count > 1)
+    variance -= mean * mean
+    std = np.sqrt(np.clip(variance, 0, None) * np.divide(count, count - 1, out=np.ones_like(count), where=count > 1))
+
+    padded = np.vstack([np.full((window,) + values.shape[1:], np.nan), values[:-1]])
+    peak = np.fmax.reduce(np.lib.stride_tricks.sliding_window_view(padded, window, axis=0), axis=-1)
+    return mean, std, peak
+
+def zscores(values, mean, std, floor=INTEREST_FLOOR):
+    """Deviation from the baseline in units of its standard deviation, which counts as at least `floor`.
+
+    NaN while the baseline has fewer than two values.
+    """
+    return (values - mean) / np.maximum(std, floor)
+
+def hype_signals(matrix, growth_periods=GROWTH_PERIODS, window=WINDOW, z_threshold=Z_THRESHOLD):
+    """Compute every hype signal for all products of a wide interest matrix.
+
+    `matrix` has one row per time step and one column per product. Returns a
+    dict of frames shaped like `matrix`:
+      growth        % change over `growth_periods` steps
+      zscore        deviation from the mean of the previous `window` steps
+      acceleration  change of growth over `growth_periods` steps (percentage points)
+      burst         zscore >= z_threshold
+      breakout      burst that is also a new high of the window, with rising growth
+    """
+    values = matrix.to_numpy(dtype=np.float64)
+    growth = rolling_growth(values, growth_periods)
+    mean, std, peak = rolling_baseline(values, window)
+    z = zscores(values, mean, std)
+    acceleration = growth - lagged(growth, growth_periods)
+
+    with np.errstate(invalid="ignore"):
+        burst = z >= z_threshold
+        breakout = burst & (values > peak) & (growth > 0) & (acceleration > 0)
+
+    def frame(data):
+        return pd.DataFrame(data, index=matrix.index, columns=matrix.columns)
+
+    return {
+        "growth": frame(growth),
+        "zscore": frame(z),
+        "acceleration": frame(acceleration),
+        "burst": frame(burst),
+        "breakout": frame(breakout),
+    }
+
+def rank_products(matrix, top=None, growth_periods=GROWTH_PERIODS, window=WINDOW, z_threshold=Z_THRESHOLD,
+                  min_interest=MIN_INTEREST):
+    """Rank products by how strongly they are emerging at the latest time step.
+
+    The hype score is the positive part of the z-score, boosted by positive
+    growth. Breakouts come first, then products by descending hype score.
+    Returns one row per product with the SIGNAL_COLUMNS.
+    """
+    if matrix.empty:
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+
+    signals = hype_signals(matrix, growth_periods, window, z_threshold)
+    latest = {name: frame.iloc[-1] for name, frame in signals.items()}
+    ranking = pd.DataFrame({"interest": matrix.iloc[-1], **latest})
+    ranking.index.name = "product"
+
+    z = ranking["zscore"].fillna(0).clip(lower=0)
+    boost = 1 + ranking["growth"].fillna(0).clip(lower=0) / 100
+    ranking["hype_score"] = z * boost
+
+    ranking = ranking[ranking["interest"] >= min_interest]
+    ranking = ranking.sort_values(["breakout", "hype_score"], ascending=False)
+    return ranking[SIGNAL_COLUMNS] if top is None else ranking[SIGNAL_COLUMNS].head(top)
@@ -0,0 +1,435 @@
+# Canonical city, region and country of free-text user locations
+import re
+import unicodedata
+from functools import lru_cache
+
+LOCATION_FIELDS = ["location_city", "location_region", "location_country"]
+LOOKUP_CACHE_SIZE = 100_000     # Distinct raw locations remembered by the lookup
+
+# --------------------
+# Gazetteer
+# --------------------
+
+# Country;ISO code;aliases
+COUNTRIES = """
+Germany;DE;deutschland,de,ger,brd
+United States;US;usa,us,u.s.,u.s.a.,united states of america,america
+United Kingdom;GB;uk,u.k.,great britain,britain,gb
+France;FR;frankreich
+Spain;ES;españa,espana,spanien
+Italy;IT;italia,italien
+Netherlands;NL;the netherlands,holland,nederland
+Belgium;BE;belgien,belgique
+Switzerland;CH;schweiz,suisse,svizzera
+Austria;AT;österreich,oesterreich
+Poland;PL;polska,polen
+Sweden;SE;sverige,schweden
+Norway;NO;norge,norwegen
+Denmark;DK;danmark,dänemark
+Finland;FI;suomi
+Ireland;IE;éire
+Portugal;PT;
+Greece;GR;
+Turkey;TR;türkiye,turkiye
+Russia;RU;russian federation
+Ukraine;UA;
+Canada;CA;
+Mexico;MX;méxico
+Brazil;BR;brasil
+Argentina;AR;
+Chile;CL;
+Colombia;CO;
+India;IN;bharat
+Pakistan;PK;
+Bangladesh;BD;
+China;CN;prc
+Japan;JP;nippon
+South Korea;KR;korea,republic of korea
+Indonesia;ID;
+Philippines;PH;
+Vietnam;VN;viet nam
+Thailand;TH;
+Malaysia;MY;
+Singapore;SG;
+Australia;AU;
+New Zealand;NZ;aotearoa
+South Africa;ZA;
+Nigeria;NG;
+Kenya;KE;
+Egypt;EG;
+Morocco;MA;
+Saudi Arabia;SA;ksa
+United Arab Emirates;AE;uae,u.a.e.,emirates
+Israel;IL;
+"""
+
+# Region;country;abbreviation;aliases
+REGIONS = """
+Baden-Württemberg;Germany;BW;baden-wurttemberg,baden-wuerttemberg
+Bavaria;Germany;BY;bayern
+Berlin;Germany;BE;
+Brandenburg;Germany;BB;
+Hamburg;Germany;HH;
+Hesse;Germany;HE;hessen
+Lower Saxony;Germany;NI;niedersachsen
+North Rhine-Westphalia;Germany;NRW;nordrhein-westfalen,north rhine westphalia
+Saxony;Germany;SN;sachsen
+Schleswig-Holstein;Germany;SH;
+England;United Kingdom;;
+Scotland;United Kingdom;;
+Wales;United Kingdom;;
+Northern Ireland;United Kingdom;NI;
+Île-de-France;France;IDF;ile-de-france,ile de france
+Catalonia;Spain;;cataluña,catalunya
+Lombardy;Italy;;lombardia
+Ontario;Canada;ON;
+Quebec;Canada;QC;québec
+British Columbia;Canada;BC;
+Alberta;Canada;AB;
+New South Wales;Australia;NSW;
+Victoria;Australia;VIC;
+Queensland;Australia;QLD;
+Maharashtra;India;MH;
+Karnataka;India;KA;
+Delhi;India;DL;nct of delhi
+Alabama;United States;AL;
+Alaska;United States;AK;
+Arizona;United States;AZ;
+Arkansas;United States;AR;
+California;United States;CA;cali
+Colorado;United States;CO;
+Connecticut;United States;CT;
+Delaware;United States;DE;
+Florida;United States;FL;
+Georgia;United States;GA;
+Hawaii;United States;HI;
+Idaho;United States;ID;
+Illinois;United States;IL;
+Indiana;United States;IN;
+Iowa;United States;IA;
+Kansas;United States;KS;
+Kentucky;United States;KY;
+Louisiana;United States;LA;
+Maine;United States;ME;
+Maryland;United States;MD;
+Massachusetts;United States;MA;
+Michigan;United States;MI;
+Minnesota;United States;MN;
+Mississippi;United States;MS;
+Missouri;United States;MO;
+Montana;United States;MT;
+Nebraska;United States;NE;
+Nevada;United States;NV;
+New Hampshire;United States;NH;
+New Jersey;United States;NJ;
+New Mexico;United States;NM;
+New York State;United States;NY;
+North Carolina;United States;NC;
+North Dakota;United States;ND;
+Ohio;United States;OH;
+Oklahoma;United States;OK;
+Oregon;United States;OR;
+Pennsylvania;United States;PA;
+Rhode Island;United States;RI;
+South Carolina;United States;SC;
+South Dakota;United States;SD;
+Tennessee;United States;TN;
+Texas;United States;TX;
+Utah;United States;UT;
+Vermont;United States;VT;
+Virginia;United States;VA;
+Washington State;United States;WA;
+West Virginia;United States;WV;
+Wisconsin;United States;WI;
+Wyoming;United States;WY;
+District of Columbia;United States;DC;
+"""
+
+# City;region;country;aliases (when a name is ambiguous, the first entry is the default)
+CITIES = """
+Berlin;Berlin;Germany;
+Hamburg;Hamburg;Germany;
+Munich;Bavaria;Germany;münchen,muenchen,munchen
+Cologne;North Rhine-Westphalia;Germany;köln,koeln,koln
+Frankfurt;Hesse;Germany;frankfurt am main,frankfurt/main,ffm
+Stuttgart;Baden-Württemberg;Germany;
+Düsseldorf;North Rhine-Westphalia;Germany;dusseldorf,duesseldorf
+Leipzig;Saxony;Germany;
+Dresden;Saxony;Germany;
+Hanover;Lower Saxony;Germany;hannover
+Nuremberg;Bavaria;Germany;nürnberg,nuernberg,nurnberg
+Dortmund;North Rhine-Westphalia;Germany;
+Essen;North Rhine-Westphalia;Germany;
+Bremen;;Germany;
+London;England;United Kingdom;
+Manchester;England;United Kingdom;
+Birmingham;England;United Kingdom;
+Liverpool;England;United Kingdom;
+Leeds;England;United Kingdom;
+Bristol;England;United Kingdom;
+Edinburgh;Scotland;United Kingdom;
+Glasgow;Scotland;United Kingdom;
+Cardiff;Wales;United Kingdom;
+Belfast;Northern Ireland;United Kingdom;
+Dublin;;Ireland;
+Paris;Île-de-France;France;
+Lyon;;France;
+Marseille;;France;marseilles
+Toulouse;;France;
+Madrid;;Spain;
+Barcelona;Catalonia;Spain;
+Valencia;;Spain;
+Lisbon;;Portugal;lisboa
+Porto;;Portugal;
+Rome;;Italy;roma,rom
+Milan;Lombardy;Italy;milano,mailand
+Naples;;Italy;napoli
+Amsterdam;;Netherlands;
+Rotterdam;;Netherlands;
+The Hague;;Netherlands;den haag
+Brussels;;Belgium;bruxelles,brüssel,brussel
+Zurich;;Switzerland;zürich,zuerich
+Geneva;;Switzerland;genève,geneve,genf
+Vienna;;Austria;wien
+Warsaw;;Poland;warszawa,warschau
+Krakow;;Poland;kraków,krakau
+Prague;;Czechia;praha,prag
+Budapest;;Hungary;
+Copenhagen;;Denmark;københavn,kopenhagen
+Stockholm;;Sweden;
+Oslo;;Norway;
+Helsinki;;Finland;
+Athens;;Greece;athen
+Istanbul;;Turkey;
+Moscow;;Russia;moskva,moskau
+Kyiv;;Ukraine;kiev
+New York City;New York State;United States;new york,nyc,ny,manhattan,brooklyn,new york city
+Los Angeles;California;United States;la,l.a.
+San Francisco;California;United States;sf,san fran,bay area
+San Diego;California;United States;
+San Jose;California;United States;
+Chicago;Illinois;United States;chi-town
+Houston;Texas;United States;
+Dallas;Texas;United States;
+Austin;Texas;United States;
+San Antonio;Texas;United States;
+Phoenix;Arizona;United States;
+Philadelphia;Pennsylvania;United States;philly
+Seattle;Washington State;United States;
+Portland;Oregon;United States;
+Denver;Colorado;United States;
+Boston;Massachusetts;United States;
+Miami;Florida;United States;
+Orlando;Florida;United States;
+Atlanta;Georgia;United States;atl
+Washington;District of Columbia;United States;washington dc,washington d.c.,dc,d.c.
+Las Vegas;Nevada;United States;vegas
+Detroit;Michigan;United States;
+Minneapolis;Minnesota;United States;
+Nashville;Tennessee;United States;
+Toronto;Ontario;Canada;
+Montreal;Quebec;Canada;montréal
+Vancouver;British Columbia;Canada;
+Calgary;Alberta;Canada;
+Mexico City;;Mexico;cdmx,ciudad de méxico,ciudad de mexico
+São Paulo;;Brazil;sao paulo
+Rio de Janeiro;;Brazil;rio
+Buenos Aires;;Argentina;
+Santiago;;Chile;
+Bogotá;;Colombia;bogota
+Lima;;Peru;
+Mumbai;Maharashtra;India;bombay
+New Delhi;Delhi;India;delhi
+Bangalore;Karnataka;India;bengaluru
+Chennai;;India;madras
+Hyderabad;;India;
+Kolkata;;India;calcutta
+Karachi;;Pakistan;
+Lahore;;Pakistan;
+Dhaka;;Bangladesh;
+Beijing;;China;peking
+Shanghai;;China;
+Shenzhen;;China;
+Hong Kong;;China;hk
+Tokyo;;Japan;
+Osaka;;Japan;
+Seoul;;South Korea;
+Jakarta;;Indonesia;
+Manila;;Philippines;metro manila
+Bangkok;;Thailand;
+Kuala Lumpur;;Malaysia;kl
+Singapore;;Singapore;
+Sydney;New South Wales;Australia;
+Melbourne;Victoria;Australia;
+Brisbane;Queensland;Australia;
+Auckland;;New Zealand;
+Johannesburg;;South Africa;joburg
+Cape Town;;South Africa;
+Lagos;;Nigeria;
+Nairobi;;Kenya;
+Cairo;;Egypt;
+Dubai;;United Arab Emirates;
+Riyadh;;Saudi Arabia;
+Tel Aviv;;Israel;
+"""
+
+def normalize_text(text):
+    """Lower-case, accent-folded text with flags and symbols replaced by separators."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return "".join(
+        char if char.isalnum() or char in " ,/|.-'" else " "
+        for char in text
+    )
+
+def fold(text):
+    # "Düsseldorf" and "dusseldorf" share one key
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+TOKEN_PATTERN = re.compile(r"[\w.'-]+")
+
+def tokens(text):
+    return tuple(token.strip(".-'") for token in TOKEN_PATTERN.findall(fold(normalize_text(text))) if token.strip(".-'"))
+
+def flag_country_codes(text):
+    """ISO codes of flag emojis (pairs of regional indicator symbols) in the text."""
+    letters = [chr(ord(char) - 0x1F1E6 + ord("A")) for char in text if 0x1F1E6 <= ord(char) <= 0x1F1FF]
+    return ["".join(letters[i:i + 2]) for i in range(0, len(letters) - 1, 2)]
+
+SHORT_NAME_LENGTH = 3     # Names of at most this many letters ("de", "la", "usa") must be a whole part
+
+def location_parts(location):
+    """Comma-separated parts of a location string, without empty parts."""
+    return [part.strip() for part in location.split(",") if part.strip()]
+
+def is_short(key):
+    return len(key) == 1 and sum(char.isalnum() for char in key[0]) <= SHORT_NAME_LENGTH
+
+class Gazetteer:
+    """Hash index from place-name token sequences to canonical places.
+
+    Built once from the tables above. Lookups scan the tokens of a location
+    string for the longest known name at every position, so a string of n
+    tokens costs at most n * max_name_tokens dictionary lookups. Short names,
+    country codes and region abbreviations are common words in other
+    languages ("de", "la"), so they only count as a whole comma-separated
+    part ("Austin, TX", "Toronto, CA").
+    """
+
+    def __init__(self, countries=COUNTRIES, regions=REGIONS, cities=CITIES):
+        self.country_codes = {}     # ISO code -> country
+        self.names = {}             # token tuple -> list of (kind, place dict)
+        self.short_names = {}       # token tuple of a short name -> list of (kind, place dict)
+        self.abbreviations = {}     # region abbreviation -> list of region dicts
+
+        for line in countries.strip().splitlines():
+            name, code, aliases = line.split(";")
+            self.country_codes[code] = name
+            self._add(("country", {"country": name}), name, f"{aliases},{code}")
+        for line in regions.strip().splitlines():
+            name, country, abbreviation, aliases = line.split(";")
+            place = {"region": name, "country": country}
+            self._add(("region", place), name, aliases)
+            if abbreviation:
+                self.abbreviations.setdefault(abbreviation.lower(), []).append(place)
+        for line in cities.strip().splitlines():
+            name, region, country, aliases = line.split(";")
+            self._add(("city", {"city": name, "region": region or None, "country": country}), name, aliases)
+
+        self.max_tokens = max(len(key) for key in self.names)
+
+    def _add(self, entry, name, aliases):
+        for alias in [name] + [alias for alias in aliases.split(",") if alias]:
+            key = tokens(alias)
+            index = self.short_names if is_short(key) else self.names
+            if key and entry not in index.setdefault(key, []):
+                index[key].append(entry)
+
+    def matches(self, location):
+        """All (kind, place) entries named in a location string, longest names first."""
+        found = []
+        words = tokens(location)
+        position = 0
+        while position < len(words):
+            for length in range(min(self.max_tokens, len(words) - position), 0, -1):
+                entries = self.names.get(words[position:position + length])
+                if entries:
+                    found.extend(entries)
+                    position += length
+                    break
+            else:
+                position += 1
+        return found
+
+    def part_matches(self, part, first=True):
+        """Entries named in one comma-separated part; region abbreviations only count after the first."""
+        found = list(self.short_names.get(tokens(part), []))
+        if not first:
+            found += [("region", region) for region in self.abbreviations.get(part.lower(), [])]
+        return found + self.matches(part)
+
+    def resolve(self, location):
+        """Canonical {"city", "region", "country"} of a location string (unknown parts are None)."""
+        place = {"city": None, "region": None, "country": None}
+        if not location:
+            return place
+
+        parts = location_parts(location)
+        part_entries = [self.part_matches(part, first=position == 0) for position, part in enumerate(parts)]
+        entries = [entry for found in part_entries for entry in found]
+        flags = [self.country_codes[code] for code in flag_country_codes(location) if code in self.country_codes]
+
+        countries = flags + [entry["country"] for kind, entry in entries if kind == "country"]
+        regions = [entry for kind, entry in entries if kind == "region"]
+        cities = [entry for kind, entry in entries if kind == "city"]
+
+        # A trailing region or country ("Berlin, CT", "Toronto, CA") qualifies the parts before it,
+        # so only the places it names count; otherwise every named country and region does
+        qualifier = next((found for found in reversed(part_entries[1:])
+                          if any(kind != "city" for kind, _ in found)), None)
+        if qualifier is None:
+            named_countries = countries
+            named_regions = [region["region"] for region in regions]
+        else:
+            named_countries = flags + [entry["country"] for kind, entry in qualifier if kind != "city"]
+            named_regions = [entry["region"] for kind, entry in qualifier if kind == "region"]
+
+        def in_named_country(candidate):
+            return candidate["country"] in named_countries
+
+        def in_named_place(candidate):
+            return in_named_country(candidate) or candidate["region"] in named_regions
+
+        def pick(candidates, consistent):
+            # Prefer candidates in an explicitly named country or region
+            for candidate in candidates:
+                if consistent(candidate):
+                    return candidate
+            return candidates[0] if candidates else None
+
+        city, region = pick(cities, in_named_place), pick(regions, in_named_country)
+        if city is not None and (named_countries or named_regions) and not in_named_place(city):
+            # "Paris, TX": the named region wins over a city of the same name elsewhere
+            city = None
+        if city is not None:
+            place.update(city)
+        elif region is not None:
+            place.update(region)
+        elif named_countries:
+            place["country"] = named_countries[0]
+        return place
+
+GAZETTEER = Gazetteer()
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def resolve_location(location):
+    """Memoized Gazetteer lookup; returns (city, region, country)."""
+    place = GAZETTEER.resolve(location)
+    return place["city"], place["region"], place["country"]
+
+def add_location_fields(df, column="user_location"):
+    """Add the canonical location_city, location_region and location_country columns to a tweet frame."""
+    resolved = {location: resolve_location(location) for location in df[column].dropna().unique()}
+    for position, field in enumerate(LOCATION_FIELDS):
+        df[field] = df[column].map(lambda location: resolved.get(location, (None, None, None))[position])
+    return df
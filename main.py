@@ -1,14 +1,20 @@
 # Import necessary libraries
-import time 
+import argparse
+import sys
+from functools import lru_cache
+
 import pandas as pd
-import matplotlib.pyplot as plt
-from textblob import TextBlob  # Used for sentiment analysis
-import tweepy  # Twitter API client
-from tweepy.errors import TooManyRequests  # Handle Twitter rate limits
 
 # Import custom modules
-from models import create_index  # Function to create Elasticsearch index
-from save_dsl import save_to_elasticsearch_dsl  # Function to save data to Elasticsearch
+from archive import ARCHIVE_DIR  # Local Parquet copy of every stored observation
+from checkpoints import CheckpointStore  # Newest stored tweet id per product
+from harvester import HarvestError, TweetHarvester  # Paginated, rate-limit-aware tweet search
+from hashtags import SpaceSaving  # Bounded-memory top hashtags of the live stream
+from sentiment import SentimentStage  # Batched, cached sentiment scoring
+from spans import RECORDER, span  # Timing spans of the ingest stages
+
+# tweepy, Elasticsearch (models, pipeline) and matplotlib are imported where they are
+# first used, so importing this module or asking the CLI for --help stays fast
 
 # --------------------
 # Configuration
@@ -19,96 +25,120 @@ BEARER_TOKEN = "..."  # Replace with your real token
 PRODUCT = "iPhone"  # Keyword to search tweets for
 
 # --------------------
-# Initialize Tweepy Client
+# Shared Clients (created on first use)
 # --------------------
 
-# Create Twitter API client using bearer token
-client = tweepy.Client(bearer_token=BEARER_TOKEN)
+# Harvester that pages through search results without tripping the rate limit
+@lru_cache(maxsize=None)
+def get_harvester():
+    import requests
+    import tweepy  # Twitter API client
+
+    # Raw responses are returned so the harvester can read the rate limit headers
+    client = tweepy.Client(bearer_token=BEARER_TOKEN, return_type=requests.Response)
+    return TweetHarvester(client)
+
+# Sentiment scoring stage (TextBlob polarity, cached per tweet text)
+@lru_cache(maxsize=None)
+def get_sentiment_stage():
+    return SentimentStage()
+
+# since_id checkpoints of the incremental ingestion
+@lru_cache(maxsize=None)
+def get_checkpoints():
+    return CheckpointStore()
+
+# Top hashtags of all ingested tweets, kept current without rescanning the index
+@lru_cache(maxsize=None)
+def get_hashtag_counter():
+    return SpaceSaving.load()
 
 # --------------------
 # Functions
 # --------------------
 
-# Function to fetch tweets related to a product
-def fetch_twitter_data(product, max_tweets=10):
+# Function to fetch tweets related to a product (only tweets newer than since_id, if given)
+def fetch_twitter_data(product, max_tweets=10, since_id=None):
     print(f"\n🔍 Fetching up to {max_tweets} tweets for '{product}'...\n")
-    try:
-        # Search recent English tweets, excluding retweets
-        resp = client.search_recent_tweets(
-            query=f"{product} lang:en -is:retweet",
-            max_results=max_tweets,
-            tweet_fields=["created_at","public_metrics","author_id"],
-            user_fields=["location","public_metrics"],
-            expansions=["author_id"]
-        )
-    except TooManyRequests as e:
-        # If rate limit is hit, wait until it resets and retry
-        reset = int(e.response.headers.get("x-rate-limit-reset", time.time()))
-        wait  = reset - int(time.time()) + 1
-        print(f"⏱ Rate limit, waiting {wait}s…")
-        time.sleep(wait)
-        return fetch_twitter_data(product, max_tweets)
 
-    # If no data found, return empty DataFrame
-    if not resp.data:
-        return pd.DataFrame()
-
-    # Extract user info: location and followers
-    users = {
-        u.id: {
-            "location": u.location or "Unknown",
-            "followers": u.public_metrics["followers_count"]
-        }
-        for u in resp.includes.get("users", [])
+    # Search recent English tweets, excluding retweets, following every result page
+    with span("ingest.fetch") as timing:
+        df = pd.DataFrame(get_harvester().harvest(product, max_tweets, since_id=since_id))
+        timing.items = len(df)
+    return prepare_fetched(df)
+
+# Function to fetch the new tweets of several products at once, one harvesting thread per product.
+# Returns the tweets of every product whose search finished and the errors of the others.
+def fetch_many(products, max_tweets=10, since_ids=None):
+    print(f"\n🔍 Fetching up to {max_tweets} tweets each for {', '.join(products)}...\n")
+
+    rows = {product: [] for product in products}
+    errors = {}
+    with span("ingest.fetch") as timing:
+        try:
+            for product, row in get_harvester().harvest_many(products, max_tweets, since_ids):
+                rows[product].append(row)
+        except HarvestError as e:
+            errors = e.errors
+        timing.items = sum(len(product_rows) for product_rows in rows.values())
+
+    # A search cut off by an error has not reached the older new tweets yet; storing
+    # its rows would move the checkpoint past them
+    fetched = {
+        product: prepare_fetched(pd.DataFrame(product_rows))
+        for product, product_rows in rows.items()
+        if product not in errors
     }
+    return fetched, errors
 
-    # Process each tweet into a row of data
-    rows = []
-    for t in resp.data:
-        u = users.get(t.author_id, {"location":"Unknown","followers":0})
-        rows.append({
-            "tweet_id":         str(t.id),
-            "timestamp":        t.created_at,
-            "text":             t.text,
-            "sentiment_score":  TextBlob(t.text).sentiment.polarity,  # Sentiment polarity score
-            "likes":            t.public_metrics.get("like_count", 0),
-            "retweets":         t.public_metrics.get("retweet_count", 0),
-            "replies":          t.public_metrics.get("reply_count", 0),
-            "clicks":           int(t.public_metrics.get("like_count", 0) * 0.1),  # Estimate clicks
-            "user_location":    u["location"],
-            "followers":        u["followers"]
-        })
-
-    return pd.DataFrame(rows)
-
-# Function to calculate engagement metrics
-def add_engagement_metrics(df, amp=1.5):
+# Function to drop duplicates, map user locations to canonical places and score sentiment in one batch
+def prepare_fetched(df):
+    # If no data found, return empty DataFrame
     if df.empty:
         return df
 
-    # Sum of basic interaction metrics
-    df["regular_engagement"] = df[["likes", "retweets", "replies", "clicks"]].sum(axis=1)
-    df["google_engagement"] = 0.0  # Placeholder for possible future metric
-
-    # Boost engagement if user has many followers
-    df["high_follower_engagement"] = df["regular_engagement"] * (df["followers"] >= 10000) * amp
-    
-    # Adjust engagement by follower influence
-    df["adjusted_engagement"] = df["regular_engagement"] + df["high_follower_engagement"]
-    
-    # Include sentiment as a multiplier for engagement
-    df["engagement_including_sentiment"] = df["adjusted_engagement"] * (1 + df["sentiment_score"])
-
-    # Final engagement is a sum of all components
-    df["engagement_final"] = (
-        df["regular_engagement"] +
-        df["google_engagement"] +
-        df["high_follower_engagement"] +
-        df["adjusted_engagement"] +
-        df["engagement_including_sentiment"]
-    )
-
-    return df
+    from pipeline import prepare_tweets
+
+    return prepare_tweets(df, get_sentiment_stage())
+
+# Function to calculate engagement metrics (see metrics.METRICS for the formulas)
+def add_engagement_metrics(df, amp=1.5):
+    from pipeline import compute_metrics
+
+    return compute_metrics(df, amp=amp)
+
+# Function to fetch several products concurrently, then enrich and store only what changed
+# since the last run of each product. Products whose search failed are returned with their error.
+def ingest_products(products, max_tweets=100):
+    checkpoints = get_checkpoints()
+    since_ids = {product: checkpoints.get(product) for product in products}
+    fetched, errors = fetch_many(products, max_tweets, since_ids)
+    stored = {product: store_product(product, tweets_df, since_ids[product]) for product, tweets_df in fetched.items()}
+    return stored, errors
+
+# Function to add engagement metrics to fetched tweets, store them and move the product's checkpoint
+def store_product(product, tweets_df, since_id=None):
+    from pipeline import store_tweets
+
+    checkpoints = get_checkpoints()
+    if tweets_df.empty:
+        print(f"ℹ️ No tweets newer than {since_id} for '{product}'.")
+        return tweets_df
+
+    tweets_df = add_engagement_metrics(tweets_df)
+
+    # Index new tweets, update changed engagement and archive both
+    new_df = store_tweets(tweets_df, product)
+    print(f"🗄️ Archived the new and changed tweets of '{product}' to '{ARCHIVE_DIR}'.")
+
+    # Count the hashtags of every tweet once, when it is first stored
+    hashtag_counter = get_hashtag_counter()
+    hashtag_counter.update(new_df["hashtags"], new_df["engagement_including_sentiment"])
+    hashtag_counter.save()
+
+    # Only move the checkpoint once everything is stored
+    checkpoints.advance(product, tweets_df["tweet_id"])
+    return tweets_df
 
 # Function to visualize engagement over time
 def plot_twitter_engagement(df, title):
@@ -116,6 +146,8 @@ def plot_twitter_engagement(df, title):
         print("❌ Nothing to plot.")
         return
 
+    import matplotlib.pyplot as plt
+
     df = df.copy()
     df["timestamp"] = pd.to_datetime(df["timestamp"])
 
@@ -136,15 +168,53 @@ def plot_twitter_engagement(df, title):
 # Main Script
 # --------------------
 
-if __name__ == "__main__":
-    create_index()  # Set up Elasticsearch index if not already present
+def main(argv=None):
+    """Ingest the products once, or keep polling them with --daemon (also `python cli.py ingest`)."""
+    parser = argparse.ArgumentParser(description="Ingest tweets about products into Elasticsearch.")
+    parser.add_argument("--daemon", action="store_true", help="Keep polling all products until stopped (Ctrl+C)")
+    parser.add_argument("--products", nargs="+", default=[PRODUCT])
+    parser.add_argument("--poll-interval", type=float, default=60, help="Seconds between searches in daemon mode")
+    parser.add_argument("--spans", help="Append the timing of every fetch/sentiment/metrics/save step to this JSON lines file")
+    parser.add_argument("--prometheus", help="Write the step timings in Prometheus text format to this file on exit")
+    args = parser.parse_args(argv)
 
-    # Fetch tweets and enrich with engagement metrics
-    tweets_df = fetch_twitter_data(PRODUCT, max_tweets=100)
-    tweets_df = add_engagement_metrics(tweets_df)
+    from models import create_index  # Function to create Elasticsearch index
 
-    # Save processed data to Elasticsearch
-    save_to_elasticsearch_dsl(tweets_df)
+    # Timing spans cost close to nothing unless one of the outputs is requested
+    RECORDER.enabled = bool(args.spans or args.prometheus)
+    if args.spans:
+        RECORDER.write_jsonl(args.spans)
 
-    # Display engagement trends using a plot
-    plot_twitter_engagement(tweets_df, PRODUCT)
+    create_index()  # Set up Elasticsearch index if not already present
+
+    sentiment_stage = get_sentiment_stage()
+    errors = {}
+    if args.daemon:
+        from pipeline import TweetPipeline, run_daemon  # Batch steps and the streaming daemon
+
+        # Fetch, sentiment, metrics and indexing run as concurrent stages until SIGINT/SIGTERM.
+        # Every batch is scored in the process pool, so concurrent batches use several cores.
+        sentiment_stage.min_parallel_texts = 0
+        pipeline = TweetPipeline(get_harvester(), sentiment_stage, get_checkpoints(), get_hashtag_counter(),
+                                 args.products, poll_interval=args.poll_interval)
+        run_daemon(pipeline)
+    else:
+        # Fetch new tweets of all products at once, enrich with engagement metrics and save them to Elasticsearch
+        stored, errors = ingest_products(args.products, max_tweets=100)
+        for product, tweets_df in stored.items():
+            # Display engagement trends using a plot
+            plot_twitter_engagement(tweets_df, product)
+    sentiment_stage.close()
+
+    if args.prometheus:
+        with open(args.prometheus, "w") as f:
+            f.write(RECORDER.prometheus())
+    RECORDER.close()
+
+    # Products whose search failed were left out; their checkpoints did not move
+    for product, error in errors.items():
+        print(f"❌ '{product}' was not ingested: {error!r}")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
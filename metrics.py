@@ -0,0 +1,107 @@
+# Engagement metric engine working in place on compact NumPy columns
+import numpy as np
+
+# --------------------
+# Configuration
+# --------------------
+
+AMP = 1.5                       # Boost of tweets from accounts with many followers
+FOLLOWER_THRESHOLD = 10000      # Followers from which a tweet counts as high-follower
+
+# Compact dtypes of the input columns
+COUNT_COLUMNS = ["likes", "retweets", "replies", "clicks", "followers"]
+COUNT_DTYPE = np.int32
+SCORE_DTYPE = np.float32        # Same precision as the Elasticsearch float fields
+
+# --------------------
+# Formulas
+# --------------------
+
+# Each formula writes one metric into a preallocated `out` array, reading the
+# input columns and the metrics declared before it. None of them depends on
+# other rows, so chunks give exactly the same results as a whole frame.
+
+def regular_engagement(c, params, out):
+    # Sum of basic interaction metrics
+    np.add(c["likes"], c["retweets"], out=out)
+    out += c["replies"]
+    out += c["clicks"]
+
+def google_engagement(c, params, out):
+    # Placeholder for possible future metric
+    out.fill(0)
+
+def high_follower_engagement(c, params, out):
+    # Boost engagement if user has many followers
+    out.fill(0)
+    np.multiply(c["regular_engagement"], params["amp"], out=out, where=c["followers"] >= params["follower_threshold"])
+
+def adjusted_engagement(c, params, out):
+    # Adjust engagement by follower influence
+    np.add(c["regular_engagement"], c["high_follower_engagement"], out=out)
+
+def engagement_including_sentiment(c, params, out):
+    # Include sentiment as a multiplier for engagement
+    np.add(c["sentiment_score"], 1, out=out)
+    out *= c["adjusted_engagement"]
+
+def engagement_final(c, params, out):
+    # Final engagement is a sum of all components
+    np.add(c["regular_engagement"], c["google_engagement"], out=out)
+    out += c["high_follower_engagement"]
+    out += c["adjusted_engagement"]
+    out += c["engagement_including_sentiment"]
+
+# Metrics in computation order with their output dtype
+METRICS = [
+    ("regular_engagement", COUNT_DTYPE, regular_engagement),
+    ("google_engagement", SCORE_DTYPE, google_engagement),
+    ("high_follower_engagement", SCORE_DTYPE, high_follower_engagement),
+    ("adjusted_engagement", SCORE_DTYPE, adjusted_engagement),
+    ("engagement_including_sentiment", SCORE_DTYPE, engagement_including_sentiment),
+    ("engagement_final", SCORE_DTYPE, engagement_final),
+]
+
+# --------------------
+# Functions
+# --------------------
+
+def compute_metrics(columns, amp=AMP, follower_threshold=FOLLOWER_THRESHOLD):
+    """Add every metric of METRICS to a dict of equally long NumPy arrays."""
+    params = {"amp": amp, "follower_threshold": follower_threshold}
+    n = len(columns["likes"])
+    for name, dtype, formula in METRICS:
+        out = np.empty(n, dtype=dtype)
+        formula(columns, params, out)
+        columns[name] = out
+    return columns
+
+def compact_columns(df):
+    """Downcast the input columns of a tweet frame in place (int32 counts, float32 scores)."""
+    for name in COUNT_COLUMNS:
+        df[name] = df[name].to_numpy(dtype=COUNT_DTYPE)
+    df["sentiment_score"] = df["sentiment_score"].to_numpy(dtype=SCORE_DTYPE)
+    if "user_location" in df:
+        df["user_location"] = df["user_location"].astype("category")
+    return df
+
+def add_metrics(df, amp=AMP, follower_threshold=FOLLOWER_THRESHOLD):
+    """Compact a tweet frame and add the engagement metric columns to it.
+
+    The frame is changed in place, so no second copy of a large batch is
+    made: its count and score columns are downcast and the metric columns
+    are added. It is also returned; pass a copy to keep the original.
+    """
+    if df.empty:
+        return df
+    df = compact_columns(df)
+    columns = {name: df[name].to_numpy() for name in COUNT_COLUMNS + ["sentiment_score"]}
+    compute_metrics(columns, amp, follower_threshold)
+    for name, _, _ in METRICS:
+        df[name] = columns[name]
+    return df
+
+def iter_metrics(chunks, amp=AMP, follower_threshold=FOLLOWER_THRESHOLD):
+    """Add the engagement metrics to every frame of a stream of tweet chunks (in place, like add_metrics)."""
+    for chunk in chunks:
+        yield add_metrics(chunk, amp, follower_threshold)
@@ -1,7 +1,7 @@
 from elasticsearch_dsl import Document, Date, Text, Keyword, Integer, Float, connections
 
-# Establish connection
-connections.create_connection(hosts=["http://localhost:9200"])
+# Register the connection; the client is created on its first request
+connections.configure(default={"hosts": ["http://localhost:9200"]})
 
 INDEX_NAME = "twitter_datav7"
 
@@ -9,12 +9,16 @@ class TweetDocument(Document):
     tweet_id = Keyword()
     timestamp = Date()
     text = Text()
+    hashtags = Keyword(multi=True)  # Lower-cased hashtags, extracted at ingest
     sentiment_score = Float()
     likes = Integer()
     retweets = Integer()
     replies = Integer()
     clicks = Integer()
     user_location = Text(fields={"keyword": Keyword()})
+    location_city = Keyword()       # Canonical place of user_location (see locations.py)
+    location_region = Keyword()
+    location_country = Keyword()
     followers = Integer()
     regular_engagement = Integer()
     google_engagement = Float()
@@ -31,4 +35,6 @@ def create_index():
         TweetDocument.init()
         print(f"✅ DSL index '{INDEX_NAME}' created.")
     else:
-        print(f"ℹ️ DSL index '{INDEX_NAME}' already exists.")
+        # Adds fields introduced since the index was created to its mapping
+        TweetDocument.init()
+        print(f"ℹ️ DSL index '{INDEX_NAME}' already exists, mapping updated.")
@@ -0,0 +1,376 @@
+# Long-running ingestion: fetch, sentiment, metrics and indexing as concurrent asyncio stages
+import argparse
+import asyncio
+import signal
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from archive import ARCHIVE_DIR, append_to_archive
+from hashtags import TOPK_FILE
+from locations import add_location_fields
+from metrics import AMP, add_metrics
+from save_dsl import save_to_elasticsearch_dsl, split_new_and_changed, update_engagement_fields
+from spans import span
+
+# --------------------
+# Configuration
+# --------------------
+
+BATCH_SIZE = 500        # Tweets per batch handed from one stage to the next
+QUEUE_SIZE = 4          # Batches waiting in front of a stage before the stage before it blocks
+POLL_INTERVAL = 60      # Seconds between two searches for the same product
+
+# Stages after the fetch, in order
+STAGES = ["sentiment", "metrics", "index"]
+
+# Concurrent workers per stage. "fetch" is the number of products searched at
+# the same time, the other stages each work on one batch per worker.
+WORKERS = {
+    "fetch": 4,
+    "sentiment": 2,
+    "metrics": 1,
+    "index": 2,
+}
+
+# --------------------
+# Batch Processing
+# --------------------
+
+# The same steps as the one-shot ingestion in main.py, for one batch of rows.
+
+def prepare_tweets(df, sentiment_stage):
+    """Drop duplicate tweets, resolve user locations and score sentiment."""
+    with span("ingest.sentiment", items=len(df)):
+        # A tweet can show up twice when results shift between pages
+        df = df.drop_duplicates("tweet_id").reset_index(drop=True)
+        df = add_location_fields(df)
+        df.insert(3, "sentiment_score", sentiment_stage.score(df["text"].tolist()))
+    return df
+
+def compute_metrics(df, amp=AMP):
+    """Add the engagement metrics (see metrics.METRICS for the formulas)."""
+    with span("ingest.metrics", items=len(df)):
+        return add_metrics(df, amp=amp)
+
+def store_tweets(tweets_df, product, archive_dir=ARCHIVE_DIR):
+    """Index new tweets, update the engagement of re-observed ones and archive both.
+
+    Returns the frame of tweets that were not stored before.
+    """
+    with span("ingest.save", items=len(tweets_df)):
+        # New tweets are indexed in full, re-observed ones only get their changed engagement fields
+        new_df, changes = split_new_and_changed(tweets_df)
+        save_to_elasticsearch_dsl(new_df)
+        update_engagement_fields(changes)
+
+        # Keep a local columnar copy of every new or changed observation
+        if archive_dir is not None:
+            stored = tweets_df["tweet_id"].isin(new_df["tweet_id"]) | tweets_df["tweet_id"].isin(list(changes))
+            append_to_archive(tweets_df[stored], product, archive_dir)
+    return new_df
+
+# --------------------
+# Pipeline
+# --------------------
+
+class Poll:
+    """One search of a product, cut into batches.
+
+    The checkpoint of the product only moves to the newest tweet of a poll
+    once every batch of the poll, and of every earlier poll, is stored.
+    """
+
+    def __init__(self, product, generation):
+        self.product = product
+        self.generation = generation
+        self.newest = None
+        self.rows = 0
+        self.batches = 0
+        self.stored = 0
+        self.failed = 0
+        self.finished = False   # No more batches will be added
+        self.truncated = False  # The search stopped before the last page
+
+    @property
+    def settled(self):
+        return self.finished and self.stored + self.failed == self.batches
+
+class TweetPipeline:
+    """Continuously ingest tweets of several products with concurrent stages.
+
+    Every product is searched every `poll_interval` seconds for tweets newer
+    than the last ones seen. Rows are cut into batches of `batch_size` and
+    flow through the sentiment, metrics and index stages, joined by queues
+    of `queue_size` batches. A full queue blocks the stage in front of it,
+    down to the harvester, so a slow cluster slows down the search instead
+    of piling up tweets in memory.
+
+    Blocking work runs in a thread pool with one thread per worker (see
+    WORKERS). Sentiment is scored in the process pool of `sentiment_stage`,
+    so it uses several cores; fetch and index threads mostly wait on the
+    network.
+
+    When a batch fails, the next search of its product starts again from the
+    stored checkpoint; re-indexing already stored tweets only rewrites their
+    changed engagement fields.
+    """
+
+    def __init__(self, harvester, sentiment_stage, checkpoints, hashtag_counter, products, max_tweets=None,
+                 poll_interval=POLL_INTERVAL, batch_size=BATCH_SIZE, queue_size=QUEUE_SIZE, workers=None,
+                 archive_dir=ARCHIVE_DIR, topk_file=TOPK_FILE):
+        self.harvester = harvester
+        self.sentiment_stage = sentiment_stage
+        self.checkpoints = checkpoints
+        self.hashtag_counter = hashtag_counter
+        self.products = list(products)
+        self.max_tweets = max_tweets
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.workers = {**WORKERS, **(workers or {})}
+        self.archive_dir = archive_dir
+        self.topk_file = topk_file
+        self.stats = defaultdict(int)   # Tweets through every stage, and failed batches
+
+        self._since_ids = {}                    # Newest tweet id searched per product
+        self._generations = defaultdict(int)    # Bumped when a batch of the product fails
+        self._polls = defaultdict(deque)        # Polls of every product whose batches are not all stored
+        self._stages = {
+            "sentiment": lambda product, df: prepare_tweets(df, self.sentiment_stage),
+            "metrics": lambda product, df: compute_metrics(df),
+            "index": lambda product, df: store_tweets(df, product, self.archive_dir),
+        }
+
+    # ---- fetch ----
+
+    async def _poll_product(self, product, once):
+        while not self._stop.is_set():
+            async with self._fetch_slots:
+                await self._fetch(product)
+            if once:
+                return
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fetch(self, product):
+        loop = asyncio.get_running_loop()
+        poll = Poll(product, self._generations[product])
+        self._polls[product].append(poll)
+        since_id = self._since_ids.get(product) or self.checkpoints.get(product)
+
+        def harvest():
+            # Runs in a worker thread; every batch waits for room in the first queue
+            rows = []
+            for row in self.harvester.harvest(product, self.max_tweets, since_id=since_id):
+                rows.append(row)
+                if len(rows) >= self.batch_size:
+                    asyncio.run_coroutine_threadsafe(self._emit(poll, rows), loop).result()
+                    rows = []
+                if self._stopping.is_set():
+                    poll.truncated = True
+                    break
+            if rows:
+                asyncio.run_coroutine_threadsafe(self._emit(poll, rows), loop).result()
+
+        searching = self._executor.submit(harvest)
+        self._searches.append(searching)
+        try:
+            with span("ingest.fetch") as timing:
+                await asyncio.wrap_future(searching)
+                timing.items = poll.rows
+        except Exception as e:
+            print(f"⚠️ Search for '{product}' failed: {e!r}")
+            poll.truncated = True
+
+        # A batch of this search that already failed must be searched again
+        if poll.newest is not None and poll.generation == self._generations[product]:
+            self._since_ids[product] = str(poll.newest)
+        poll.finished = True
+        self._settle(product)
+
+    async def _emit(self, poll, rows):
+        df = pd.DataFrame(rows)
+        newest = int(df["tweet_id"].astype("int64").max())
+        poll.newest = newest if poll.newest is None else max(poll.newest, newest)
+        poll.rows += len(df)
+        poll.batches += 1
+        self.stats["fetched"] += len(df)
+        await self._queues[STAGES[0]].put((poll, df))
+
+    # ---- processing stages ----
+
+    async def _worker(self, stage):
+        loop = asyncio.get_running_loop()
+        inbox = self._queues[stage]
+        position = STAGES.index(stage)
+        outbox = self._queues[STAGES[position + 1]] if position + 1 < len(STAGES) else None
+
+        while True:
+            item = await inbox.get()
+            if item is None:
+                return
+            poll, df = item
+            try:
+                result = await loop.run_in_executor(self._executor, self._stages[stage], poll.product, df)
+            except Exception as e:
+                print(f"⚠️ Stage '{stage}' failed for a batch of '{poll.product}': {e!r}")
+                self._fail(poll)
+                continue
+            self.stats[stage] += len(df)
+            if outbox is not None:
+                await outbox.put((poll, result))
+            else:
+                self._stored(poll, result)
+
+    # ---- bookkeeping (event loop thread only) ----
+
+    def _stored(self, poll, new_df):
+        # Count the hashtags of every tweet once, when it is first stored
+        if not new_df.empty:
+            self.hashtag_counter.update(new_df["hashtags"], new_df["engagement_including_sentiment"])
+            self.hashtag_counter.save(self.topk_file)
+        poll.stored += 1
+        self._settle(poll.product)
+
+    def _fail(self, poll):
+        # Search again from the stored checkpoint; batches in flight no longer move it
+        self.stats["failed_batches"] += 1
+        self._generations[poll.product] += 1
+        self._since_ids.pop(poll.product, None)
+        poll.failed += 1
+        self._settle(poll.product)
+
+    def _settle(self, product):
+        polls = self._polls[product]
+        while polls and polls[0].settled:
+            poll = polls.popleft()
+            if (poll.newest is not None and not poll.failed and not poll.truncated
+                    and poll.generation == self._generations[product]):
+                self.checkpoints.advance(product, [poll.newest])
+
+    # ---- run ----
+
+    async def _watch_stop(self):
+        await self._stop.wait()
+        self._stopping.set()
+        print("🛑 Stopping: finishing the batches in flight…")
+
+    async def run(self, stop=None, once=False):
+        """Ingest until `stop` is set (or after one search per product if `once`), then drain.
+
+        On stop, or when the task running this is cancelled, searches end
+        after their current page and every batch already fetched is
+        processed and stored before this returns (or re-raises the
+        cancellation).
+        """
+        self._stop = stop or asyncio.Event()
+        self._stopping = threading.Event()
+        self._fetch_slots = asyncio.Semaphore(self.workers["fetch"])
+        self._queues = {stage: asyncio.Queue(self.queue_size) for stage in STAGES}
+        self._executor = ThreadPoolExecutor(max_workers=sum(self.workers.values()))
+        self._searches = []     # Harvest threads, which keep running when their task is cancelled
+
+        workers = {stage: [asyncio.create_task(self._worker(stage)) for _ in range(self.workers[stage])]
+                   for stage in STAGES}
+        watcher = asyncio.create_task(self._watch_stop())
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(self._poll_product(product, once) for product in self.products))
+        finally:
+            # After an error or a cancellation, searches stop after their current page. Their
+            # last batches still need the stage workers, so those are only stopped afterwards.
+            self._stopping.set()
+            await asyncio.gather(*(asyncio.wrap_future(search) for search in self._searches), return_exceptions=True)
+
+            # Every stage finishes its queue before the next one is told to stop
+            for stage in STAGES:
+                for _ in workers[stage]:
+                    await self._queues[stage].put(None)
+                await asyncio.gather(*workers[stage])
+            watcher.cancel()
+            self._executor.shutdown()
+
+        elapsed = time.perf_counter() - started
+        print(f"✅ Pipeline done in {elapsed:.1f}s: fetched {self.stats['fetched']}, "
+              f"indexed {self.stats['index']} tweets ({self.stats['index'] / max(elapsed, 1e-9):.0f}/s), "
+              f"{self.stats['failed_batches']} failed batches.")
+        return dict(self.stats)
+
+def run_daemon(pipeline, once=False):
+    """Run the pipeline until SIGINT or SIGTERM, then drain it."""
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                # Windows event loops have no signal handlers
+                signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+        return await pipeline.run(stop, once)
+
+    return asyncio.run(main())
+
+# --------------------
+# Local Run
+# --------------------
+
+def run_with_fakes(products, tweets_per_product, es_latency, once, workers):
+    """Run the whole pipeline against an in-memory Twitter API and Elasticsearch."""
+    from elasticsearch_dsl import connections
+
+    from checkpoints import CheckpointStore
+    from fakes import FakeElasticsearch, FakeTwitterClient, synthetic_api_tweets
+    from harvester import RateLimitBucket, TweetHarvester
+    from hashtags import SpaceSaving
+    from models import INDEX_NAME
+    from sentiment import SentimentStage
+
+    tweets, users = synthetic_api_tweets(products, tweets_per_product)
+    es = FakeElasticsearch(latency=es_latency)
+    connections.add_connection("default", es)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sentiment_stage = SentimentStage(min_parallel_texts=0)
+        pipeline = TweetPipeline(
+            TweetHarvester(FakeTwitterClient(tweets, users, limit=10**6), RateLimitBucket()),
+            sentiment_stage,
+            CheckpointStore(f"{tmp}/checkpoints.json"),
+            SpaceSaving(),
+            products,
+            poll_interval=1,
+            workers=workers,
+            archive_dir=f"{tmp}/archive",
+            topk_file=f"{tmp}/topk.json",
+        )
+        try:
+            run_daemon(pipeline, once)
+        finally:
+            sentiment_stage.close()
+        checkpoints = {product: pipeline.checkpoints.get(product) for product in products}
+        print(f"📦 {es.doc_count(INDEX_NAME)} documents in the fake index, checkpoints: {checkpoints}")
+
+def main(argv=None):
+    """Run the pipeline against local fakes from the command line (also `python cli.py demo`)."""
+    parser = argparse.ArgumentParser(description="Run the ingestion pipeline against local fakes.")
+    parser.add_argument("--products", nargs="+", default=["iPhone", "Pixel", "Galaxy"])
+    parser.add_argument("--tweets", type=int, default=5000, help="Synthetic tweets per product")
+    parser.add_argument("--es-latency", type=float, default=0.01, help="Seconds per fake Elasticsearch request")
+    parser.add_argument("--once", action="store_true", help="Search every product once, then stop")
+    for stage in WORKERS:
+        parser.add_argument(f"--{stage}-workers", type=int, default=WORKERS[stage])
+    args = parser.parse_args(argv)
+
+    run_with_fakes(args.products, args.tweets, args.es_latency, args.once,
+                   {stage: getattr(args, f"{stage}_workers") for stage in WORKERS})
+
+if __name__ == "__main__":
+    main()
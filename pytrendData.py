@@ -1,22 +1,24 @@
-import random
-from pytrends.request import TrendReq
+import argparse
+from functools import lru_cache
+
 import pandas as pd
-import time
-import matplotlib.pyplot as plt
+
+from hype import GROWTH_PERIODS, rank_products, rolling_growth
+from trends import TrendsFetcher
+from trends_store import TrendsStore
+
+# One session, request spacer and response cache shared by every fetch, created on first use
+@lru_cache(maxsize=None)
+def get_fetcher():
+    return TrendsFetcher()
 
 def fetch_google_trends(product, country):
     """Fetch Google Trends data for a product in a given country."""
-    pytrends = TrendReq(hl="en-US", tz=360)
-
-    kw_list = [product]
     print(f"Fetching Google Trends data for '{product}' in {country}...")
 
     try:
-        # Use a longer timeframe to get meaningful data
-        pytrends.build_payload(kw_list, timeframe="today 3-m", geo=country)
-        
         # Get interest over time
-        interest_over_time = pytrends.interest_over_time()
+        interest_over_time = get_fetcher().interest_over_time([product], geo=country)
         
         # Ensure data is available
         if interest_over_time.empty:
@@ -26,7 +28,7 @@ def fetch_google_trends(product, country):
         # Safely get trending queries, avoiding index errors
         trending_queries = None
         try:
-            trending_queries = pytrends.related_queries()[product]["top"]
+            trending_queries = get_fetcher().related_queries([product], geo=country)[product]["top"]
         except (KeyError, IndexError):
             print(f"⚠️ No trending queries found for {product}")
 
@@ -35,7 +37,7 @@ def fetch_google_trends(product, country):
             trending_queries = pd.DataFrame()  # Ensure it is an empty DataFrame if no data
 
         # Get interest by region
-        interest_by_region = pytrends.interest_by_region()
+        interest_by_region = get_fetcher().interest_by_region([product], geo=country)
 
         # Ensure region data is available
         if interest_by_region.empty:
@@ -48,16 +50,33 @@ def fetch_google_trends(product, country):
         print(f"⚠️ Error: {e}")
         return None, None, None
 
-def calculate_percentage_increase(data):
+def calculate_percentage_increase(data, product):
     """Calculate the percentage increase in search interest every 2 days."""
-    data["% Increase"] = data["iPhone"].pct_change(periods=2) * 100  # Change over 2 days
+    data["% Increase"] = rolling_growth(data[[product]].to_numpy(dtype=float), GROWTH_PERIODS)[:, 0]
     return data
 
-def save_to_csv(interest_data, trending_data, region_data, product):
-    """Save the data to CSV files."""
+def rank_emerging_products(products, country, top=10):
+    """Score many products at once and rank the ones emerging right now."""
+    interest = get_fetcher().interest_over_time(products, geo=country)
+    return rank_products(interest, top=top)
+
+def store_interest_by_country(products, countries, store=None):
+    """Fetch the search interest of products in several countries and append it to the trends store.
+
+    Every country goes through the shared fetcher, so its spacer schedules
+    all of them and cached countries are not requested again.
+    """
+    store = store or TrendsStore()
+    for country, interest in get_fetcher().interest_by_country(products, countries).items():
+        rows = store.append_interest(interest, country)
+        print(f"✅ Saved {rows} product-days of search interest in {country}")
+
+def save_trends(interest_data, trending_data, region_data, product, country, store=None):
+    """Append the search interest to the trends store and save the snapshots to CSV files."""
     if interest_data is not None:
-        interest_data.to_csv(f"{product}_trends.csv", index=True)
-        print(f"✅ Saved search interest data: {product}_trends.csv")
+        # Only new dates are added; dates fetched before are updated in place
+        rows = (store or TrendsStore()).append_interest(interest_data[[product]], country)
+        print(f"✅ Saved {rows} days of search interest for {product} in {country}")
     
     if trending_data is not None:
         trending_data.to_csv(f"{product}_trending_queries.csv", index=False)
@@ -69,6 +88,8 @@ def save_to_csv(interest_data, trending_data, region_data, product):
 
 def plot_percentage_increase(data, product):
     """Plot the percentage increase of search interest over time."""
+    import matplotlib.pyplot as plt  # Only needed when plotting
+
     plt.figure(figsize=(10, 6))
     plt.plot(data.index, data["% Increase"], marker='o', linestyle='-', color='b', label="Percentage Increase")
     plt.title(f"Percentage Increase in Google Trends for '{product}'")
@@ -82,14 +103,16 @@ def plot_percentage_increase(data, product):
 
 def plot_region_interest(region_data, product):
     """Plot the interest by region."""
+    import matplotlib.pyplot as plt  # Only needed when plotting
+
     if region_data is not None and not region_data.empty:
         # Print the columns of region_data to inspect it
         print("Region Data Columns:", region_data.columns)
         
         # Check if the 'geoName' column exists
         if 'geoName' in region_data.columns:
-            region_data_sorted = region_data.sort_values(by="iPhone", ascending=False)
-            plt.bar(region_data_sorted["geoName"], region_data_sorted["iPhone"], color="green")
+            region_data_sorted = region_data.sort_values(by=product, ascending=False)
+            plt.bar(region_data_sorted["geoName"], region_data_sorted[product], color="green")
         else:
             # If 'geoName' column is not found, inspect the first few rows of region data
             print("⚠️ 'geoName' column not found. Inspecting first few rows of region data:")
@@ -114,13 +137,10 @@ def plot_region_interest(region_data, product):
 
 def fetch_trending_products(country):
     """Fetch the top 10 trending products in the past 7 days."""
-    pytrends = TrendReq(hl="en-US", tz=360)
-
     print(f"Fetching top 10 trending products in {country}...")
 
     try:
-        pytrends.build_payload(kw_list=[], timeframe="now 7-d", geo=country)
-        trending_searches = pytrends.trending_searches(pn=country)  # Fetch trending searches for the last 7 days
+        trending_searches = get_fetcher().trending_searches(pn=country)  # Fetch trending searches for the last 7 days
         trending_searches = trending_searches.head(10)  # Get top 10 trending products
 
         if trending_searches.empty:
@@ -133,36 +153,53 @@ def fetch_trending_products(country):
         print(f"⚠️ Error: {e}")
         return pd.DataFrame()
 
-# Run the script
-product = "iPhone"  # You can change this
-country = "DE"  # Example: "US", "GB", "IN"
-
-# Introduce delay to avoid rate limiting
-time.sleep(random.uniform(5, 15))  # Wait between 5 to 15 seconds
-
-# Fetch data for the specific product
-trends_data, trending_queries, region_data = fetch_google_trends(product, country)
-
-# Fetch the top 10 trending products in the last 7 days
-top_trending_products = fetch_trending_products(country)
-
-# Save the trending products
-top_trending_products.to_csv(f"{country}_top_trending_products.csv", index=False)
-print(f"✅ Saved top trending products: {country}_top_trending_products.csv")
-
-# If data exists, process and save it
-if trends_data is not None:
-    # Calculate the percentage increase
-    trends_data = calculate_percentage_increase(trends_data)
-    
-    # Save data to CSV
-    save_to_csv(trends_data, trending_queries, region_data, product)
-    
-    # Print first few rows
-    print(trends_data.head())  
-    
-    # Plot the percentage increase over time
-    plot_percentage_increase(trends_data, product)
-    
-    # Plot the region interest data
-    plot_region_interest(region_data, product)
+def run(product="iPhone", country="DE"):
+    """Fetch, store and plot the trends of one product (country e.g. "US", "GB", "IN")."""
+    # Fetch data for the specific product
+    trends_data, trending_queries, region_data = fetch_google_trends(product, country)
+
+    # Fetch the top 10 trending products in the last 7 days
+    top_trending_products = fetch_trending_products(country)
+
+    # Save the trending products
+    top_trending_products.to_csv(f"{country}_top_trending_products.csv", index=False)
+    print(f"✅ Saved top trending products: {country}_top_trending_products.csv")
+
+    # If data exists, process and save it
+    if trends_data is not None:
+        # Calculate the percentage increase
+        trends_data = calculate_percentage_increase(trends_data, product)
+
+        # Save data to the trends store and CSV
+        save_trends(trends_data, trending_queries, region_data, product, country)
+
+        # Print first few rows
+        print(trends_data.head())  
+
+        # Plot the percentage increase over time
+        plot_percentage_increase(trends_data, product)
+
+        # Plot the region interest data
+        plot_region_interest(region_data, product)
+
+def main(argv=None):
+    """Fetch the trends of one product from the command line (also `python cli.py trends`)."""
+    parser = argparse.ArgumentParser(description="Fetch Google Trends data of a product into the trends store.")
+    parser.add_argument("--product", default="iPhone")
+    parser.add_argument("--country", default="DE", help='Country code, e.g. "US", "GB", "IN"')
+    parser.add_argument("--countries", nargs="+", default=[], help="Also store the interest of --product in these countries")
+    parser.add_argument("--emerging", nargs="+", metavar="PRODUCT",
+                        help="Only rank these products by how strongly they are emerging in --country")
+    parser.add_argument("--top", type=int, default=10, help="Number of products ranked with --emerging")
+    args = parser.parse_args(argv)
+    if args.emerging:
+        print(f"📈 Emerging products in {args.country}:")
+        print(rank_emerging_products(args.emerging, args.country, top=args.top).to_string())
+        return
+    run(args.product, args.country)
+    if args.countries:
+        store_interest_by_country([args.product], args.countries)
+
+# Run the script (requests are spaced by the fetcher, cached responses are served at once)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# Save processed tweets to Elasticsearch through the TweetDocument model
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from elasticsearch import helpers
+from elasticsearch_dsl import connections
+
+from hashtags import extract_hashtags
+from locations import LOCATION_FIELDS, resolve_location
+from models import INDEX_NAME, TweetDocument
+
+# Fields that change when a tweet is observed again (engagement and follower counts)
+ENGAGEMENT_FIELDS = [
+    "likes",
+    "retweets",
+    "replies",
+    "clicks",
+    "followers",
+    "regular_engagement",
+    "high_follower_engagement",
+    "adjusted_engagement",
+    "engagement_including_sentiment",
+    "engagement_final",
+]
+
+MGET_CHUNK_SIZE = 1000  # Tweet ids looked up per mget request
+
+# Bulk writer settings
+CHUNK_SIZE = 500            # Actions per _bulk request
+THREAD_COUNT = 4            # _bulk requests in flight at the same time
+MAX_RETRIES = 5             # Retries of documents rejected with 429
+INITIAL_BACKOFF = 2         # Seconds before the first retry, doubled on every further retry
+MAX_BACKOFF = 60            # Upper bound of the retry wait
+RELAX_REFRESH_MIN_DOCS = 5000  # Refresh is switched off while loading at least this many docs
+
+def to_document(row):
+    """Build a TweetDocument whose _id is the tweet id, so re-saving overwrites instead of duplicating."""
+    fields = {key: value for key, value in row.items() if not (np.isscalar(value) and pd.isna(value))}
+    return TweetDocument(meta={"id": row["tweet_id"]}, **fields)
+
+@contextmanager
+def relaxed_refresh(es, index=INDEX_NAME):
+    """Switch off index refresh during a large load and restore the previous interval afterwards."""
+    settings = es.indices.get_settings(index=index, name="index.refresh_interval")
+    previous = settings.get(index, {}).get("settings", {}).get("index", {}).get("refresh_interval")
+    es.indices.put_settings(index=index, settings={"index": {"refresh_interval": "-1"}})
+    try:
+        yield
+    finally:
+        # None restores the index default
+        es.indices.put_settings(index=index, settings={"index": {"refresh_interval": previous}})
+        es.indices.refresh(index=index)
+
+def bulk_write(actions, chunk_size=CHUNK_SIZE, thread_count=THREAD_COUNT, max_retries=MAX_RETRIES, es=None):
+    """Send bulk actions with `thread_count` concurrent _bulk requests of `chunk_size` actions.
+
+    Actions are handed to the sender threads through a bounded queue, so at
+    most a few chunks per thread are held in memory and a slow cluster slows
+    down the producer. Documents rejected with 429 are retried with
+    exponential backoff. Returns (number of actions sent, list of failed items).
+    """
+    es = es or connections.get_connection()
+    pending = queue.Queue(maxsize=chunk_size * thread_count * 2)
+    done = object()
+
+    def consume():
+        while True:
+            action = pending.get()
+            if action is done:
+                return
+            yield action
+
+    def send():
+        errors = []
+        try:
+            for ok, item in helpers.streaming_bulk(
+                es,
+                consume(),
+                chunk_size=chunk_size,
+                max_retries=max_retries,
+                initial_backoff=INITIAL_BACKOFF,
+                max_backoff=MAX_BACKOFF,
+                raise_on_error=False,
+                yield_ok=False,
+            ):
+                errors.append(item)
+        except BaseException:
+            # Keep the producer from blocking on a full queue if this sender fails
+            for _ in consume():
+                pass
+            raise
+        return errors
+
+    sent = 0
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        senders = [executor.submit(send) for _ in range(thread_count)]
+        try:
+            for action in actions:
+                pending.put(action)
+                sent += 1
+        finally:
+            for _ in senders:
+                pending.put(done)
+        errors = [item for sender in senders for item in sender.result()]
+    return sent, errors
+
+def save_to_elasticsearch_dsl(df, chunk_size=CHUNK_SIZE, thread_count=THREAD_COUNT):
+    """Bulk-index every tweet of the frame, one document per tweet id.
+
+    Re-running with the same tweets overwrites the documents instead of
+    creating duplicates.
+    """
+    if df.empty:
+        print("ℹ️ No new tweets to save.")
+        return
+
+    es = connections.get_connection()
+    actions = (to_document(row).to_dict(include_meta=True) for row in df.to_dict("records"))
+    if len(df) >= RELAX_REFRESH_MIN_DOCS:
+        with relaxed_refresh(es):
+            sent, errors = bulk_write(actions, chunk_size, thread_count, es=es)
+    else:
+        sent, errors = bulk_write(actions, chunk_size, thread_count, es=es)
+
+    print(f"✅ Saved {sent - len(errors)} tweets to '{INDEX_NAME}'.")
+    if errors:
+        print(f"⚠️ {len(errors)} tweets could not be saved, first error: {errors[0]}")
+
+def load_stored_engagement(tweet_ids, es=None):
+    """Look up the stored engagement fields of the given tweet ids (missing ids are skipped)."""
+    es = es or connections.get_connection()
+    tweet_ids = list(tweet_ids)
+    stored = {}
+    for start in range(0, len(tweet_ids), MGET_CHUNK_SIZE):
+        response = es.mget(index=INDEX_NAME, ids=tweet_ids[start:start + MGET_CHUNK_SIZE], source=ENGAGEMENT_FIELDS)
+        for doc in response["docs"]:
+            if doc.get("found"):
+                stored[doc["_id"]] = doc.get("_source", {})
+    return stored
+
+def split_new_and_changed(df, es=None):
+    """Split processed tweets into new tweets and partial updates of already stored ones.
+
+    Returns the frame of tweets not stored yet and a dict of tweet id ->
+    {field: value} with only the engagement fields whose value changed.
+    Stored tweets without changes are dropped.
+    """
+    df = df.drop_duplicates("tweet_id", keep="last")
+    stored = load_stored_engagement(df["tweet_id"], es)
+
+    is_new = ~df["tweet_id"].isin(list(stored))
+    changes = {}
+    for row in df[~is_new].to_dict("records"):
+        previous = stored[row["tweet_id"]]
+        changed = {
+            field: row[field]
+            for field in ENGAGEMENT_FIELDS
+            if field in row and (previous.get(field) is None or not np.isclose(row[field], previous[field]))
+        }
+        if changed:
+            changes[row["tweet_id"]] = changed
+    return df[is_new], changes
+
+def update_engagement_fields(changes, chunk_size=CHUNK_SIZE, thread_count=THREAD_COUNT):
+    """Apply partial updates that only rewrite the changed engagement fields."""
+    if not changes:
+        return
+
+    actions = (
+        {"_op_type": "update", "_index": INDEX_NAME, "_id": tweet_id, "doc": fields}
+        for tweet_id, fields in changes.items()
+    )
+    sent, errors = bulk_write(actions, chunk_size, thread_count)
+
+    print(f"🔁 Updated engagement of {sent - len(errors)} stored tweets.")
+    if errors:
+        print(f"⚠️ {len(errors)} updates failed, first error: {errors[0]}")
+
+def backfill_field(missing_field, source_fields, derive, chunk_size=CHUNK_SIZE, thread_count=THREAD_COUNT, es=None):
+    """Add fields derived at ingest to tweets indexed before they were.
+
+    Every tweet without `missing_field` gets a partial update with
+    derive(_source), where _source holds `source_fields`. Returns the number
+    of updated tweets. Tweets whose derived value is empty are matched again
+    on later runs, which only rewrites the same empty value.
+    """
+    es = es or connections.get_connection()
+    hits = helpers.scan(
+        es,
+        index=INDEX_NAME,
+        query={"query": {"bool": {"must_not": {"exists": {"field": missing_field}}}}, "_source": source_fields},
+    )
+    actions = (
+        {"_op_type": "update", "_index": INDEX_NAME, "_id": hit["_id"], "doc": derive(hit["_source"])}
+        for hit in hits
+    )
+    sent, errors = bulk_write(actions, chunk_size, thread_count, es=es)
+    if errors:
+        print(f"⚠️ {len(errors)} updates failed, first error: {errors[0]}")
+    return sent - len(errors)
+
+def backfill_hashtags(es=None):
+    updated = backfill_field("hashtags", ["text"], lambda source: {"hashtags": extract_hashtags(source.get("text"))}, es=es)
+    print(f"🏷️ Added hashtags to {updated} stored tweets.")
+
+def backfill_locations(es=None):
+    def derive(source):
+        return dict(zip(LOCATION_FIELDS, resolve_location(source.get("user_location") or "")))
+
+    updated = backfill_field("location_country", ["user_location"], derive, es=es)
+    print(f"📍 Added canonical locations to {updated} stored tweets.")
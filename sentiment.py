@@ -0,0 +1,156 @@
+# Batched sentiment scoring for tweet texts
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# --------------------
+# Configuration
+# --------------------
+
+BATCH_SIZE = 256            # Texts sent to a worker process at once
+CACHE_SIZE = 100_000        # Scores kept in the content-hash cache
+MIN_PARALLEL_TEXTS = 1000   # Fewer uncached texts than this are scored in-process
+
+# --------------------
+# Scorers
+# --------------------
+
+# A scorer has a `name` and a `score_batch(texts)` method returning one
+# polarity in [-1, 1] per text. Scorers must be picklable so that batches
+# can be sent to worker processes.
+
+class TextBlobScorer:
+    """Polarity from TextBlob's pattern-based analyzer."""
+
+    name = "textblob"
+
+    def score_batch(self, texts):
+        from textblob import TextBlob  # Imported on first use, in every worker process
+        return [TextBlob(text).sentiment.polarity for text in texts]
+
+class VaderScorer:
+    """Compound score from the VADER lexicon (needs the vaderSentiment package)."""
+
+    name = "vader"
+
+    def __init__(self):
+        self._analyzer = None
+
+    def __getstate__(self):
+        # The analyzer is rebuilt in each worker process
+        return {"_analyzer": None}
+
+    def score_batch(self, texts):
+        if self._analyzer is None:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+            self._analyzer = SentimentIntensityAnalyzer()
+        return [self._analyzer.polarity_scores(text)["compound"] for text in texts]
+
+SCORERS = {
+    TextBlobScorer.name: TextBlobScorer,
+    VaderScorer.name: VaderScorer,
+}
+
+def _score_batch(scorer, texts):
+    return scorer.score_batch(texts)
+
+# --------------------
+# Cache
+# --------------------
+
+class ScoreCache:
+    """Bounded LRU cache of sentiment scores keyed by a hash of the text."""
+
+    def __init__(self, max_size=CACHE_SIZE):
+        self.max_size = max_size
+        self._scores = OrderedDict()
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha1(text.encode("utf-8")).digest()
+
+    def get(self, key):
+        score = self._scores.get(key)
+        if score is not None:
+            self._scores.move_to_end(key)
+        return score
+
+    def put(self, key, score):
+        self._scores[key] = score
+        self._scores.move_to_end(key)
+        while len(self._scores) > self.max_size:
+            self._scores.popitem(last=False)
+
+    def __len__(self):
+        return len(self._scores)
+
+# --------------------
+# Sentiment Stage
+# --------------------
+
+class SentimentStage:
+    """Score texts in batches, spread over a process pool, skipping texts already seen.
+
+    Identical texts (e.g. copied tweets) are scored once per batch and then
+    served from the cache. `score` may be called from several threads at
+    once; only the cache is shared between them.
+    """
+
+    def __init__(self, scorer=None, cache_size=CACHE_SIZE, batch_size=BATCH_SIZE, max_workers=None,
+                 min_parallel_texts=MIN_PARALLEL_TEXTS):
+        self.scorer = scorer or TextBlobScorer()
+        self.cache = ScoreCache(cache_size)
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.min_parallel_texts = min_parallel_texts
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def score(self, texts):
+        """Return one sentiment score per text, in order."""
+        keys = [ScoreCache.key(text or "") for text in texts]
+
+        # Scores of this call, and the unique texts that are not cached yet
+        scores = {}
+        missing = {}
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in scores or key in missing:
+                    continue
+                score = self.cache.get(key)
+                if score is None:
+                    missing[key] = text or ""
+                else:
+                    scores[key] = score
+
+        if missing:
+            missing_texts = list(missing.values())
+            batches = [
+                missing_texts[start:start + self.batch_size]
+                for start in range(0, len(missing_texts), self.batch_size)
+            ]
+            if len(missing_texts) < self.min_parallel_texts:
+                results = [self.scorer.score_batch(batch) for batch in batches]
+            else:
+                results = self._pool().map(_score_batch, [self.scorer] * len(batches), batches)
+
+            new_scores = [score for batch_scores in results for score in batch_scores]
+            with self._lock:
+                for key, score in zip(missing, new_scores):
+                    scores[key] = score
+                    self.cache.put(key, score)
+
+        return [scores[key] for key in keys]
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
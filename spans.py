@@ -0,0 +1,163 @@
+# Lightweight timing spans around the hot paths, exported as Prometheus text or JSON lines
+import contextvars
+import json
+import threading
+import time
+from collections import defaultdict
+
+# Spans recorded into a list by collect() in the current context (one dashboard rerun)
+_collector = contextvars.ContextVar("span_collector", default=None)
+
+class Span:
+    """One timed call of a stage, with the number of items and bytes it handled."""
+
+    __slots__ = ("name", "start", "seconds", "items", "nbytes")
+
+    def __init__(self, name, items=0, nbytes=0):
+        self.name = name
+        self.start = None
+        self.seconds = 0.0
+        self.items = items
+        self.nbytes = nbytes
+
+    def as_dict(self):
+        return {"name": self.name, "start": self.start, "seconds": self.seconds, "items": self.items,
+                "nbytes": self.nbytes}
+
+class _NoopSpan:
+    """Returned while nothing records; setting items or nbytes on it is ignored."""
+
+    __slots__ = ("items", "nbytes")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+class _ActiveSpan(Span):
+    __slots__ = ("_recorder", "_started")
+
+    def __init__(self, recorder, name, items, nbytes):
+        super().__init__(name, items, nbytes)
+        self._recorder = recorder
+
+    def __enter__(self):
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._started
+        self._recorder.record(self)
+        return False
+
+class SpanRecorder:
+    """Record spans while `enabled` (a whole process) or inside collect() (one context).
+
+    Otherwise span() returns a shared no-op span, so instrumented code only
+    pays for one attribute and one context variable lookup. Totals per span
+    name are kept for the Prometheus export; every span is also appended to
+    the JSON lines files added with write_jsonl().
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._totals = defaultdict(lambda: [0, 0.0, 0, 0])     # name -> [calls, seconds, items, bytes]
+        self._sinks = []
+        self._lock = threading.Lock()
+
+    def span(self, name, items=0, nbytes=0):
+        """Time a `with` block; set .items and .nbytes on the returned span inside the block."""
+        if not self.enabled and _collector.get() is None:
+            return NOOP_SPAN
+        return _ActiveSpan(self, name, items, nbytes)
+
+    def record(self, span):
+        collected = _collector.get()
+        if collected is not None:
+            collected.append(span)
+        line = json.dumps(span.as_dict()) + "\n" if self._sinks else None
+        with self._lock:
+            totals = self._totals[span.name]
+            totals[0] += 1
+            totals[1] += span.seconds
+            totals[2] += span.items
+            totals[3] += span.nbytes
+            for sink in self._sinks:
+                sink.write(line)
+                sink.flush()
+
+    def collect(self):
+        """Record the spans of the current context into a new list, and return it."""
+        spans = []
+        _collector.set(spans)
+        return spans
+
+    def stop_collecting(self):
+        _collector.set(None)
+
+    def write_jsonl(self, path):
+        """Append every recorded span to `path` as one JSON object per line."""
+        with self._lock:
+            self._sinks.append(open(path, "a"))
+
+    def close(self):
+        with self._lock:
+            sinks, self._sinks = self._sinks, []
+        for sink in sinks:
+            sink.close()
+
+    def totals(self):
+        """Calls, seconds, items and bytes per span name since the start of the process."""
+        with self._lock:
+            return {name: tuple(values) for name, values in sorted(self._totals.items())}
+
+    def prometheus(self, prefix="hype_span"):
+        """Totals per span name in the Prometheus text exposition format."""
+        totals = self.totals()
+        lines = []
+        for position, (metric, help_text) in enumerate([
+            ("calls_total", "Calls of each instrumented stage."),
+            ("seconds_total", "Seconds spent in each instrumented stage."),
+            ("items_total", "Items (tweets, hits, points) handled by each instrumented stage."),
+            ("bytes_total", "Payload bytes handled by each instrumented stage."),
+        ]):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for name, values in totals.items():
+                lines.append(f'{prefix}_{metric}{{span="{name}"}} {values[position]}')
+        return "\n".join(lines) + "\n"
+
+def summarize(spans):
+    """Calls, seconds, items and bytes per span name of a list of spans, slowest first."""
+    totals = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "items": 0, "nbytes": 0})
+    for recorded in spans:
+        total = totals[recorded.name]
+        total["calls"] += 1
+        total["seconds"] += recorded.seconds
+        total["items"] += recorded.items
+        total["nbytes"] += recorded.nbytes
+    return sorted(({"name": name, **total} for name, total in totals.items()), key=lambda row: -row["seconds"])
+
+# Recorder shared by the whole process
+RECORDER = SpanRecorder()
+span = RECORDER.span
+
+def timed_iter(name, iterable):
+    """Yield from `iterable`, recording the wait for every item as one span."""
+    if not RECORDER.enabled and _collector.get() is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        current = _ActiveSpan(RECORDER, name, 1, 0)
+        current.__enter__()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        current.__exit__(None, None, None)
+        yield item
@@ -0,0 +1,87 @@
+import os
+
+import pandas as pd
+
+import archive
+from archive import append_to_archive, compact_archive, compact_partition, partition_files, read_archive
+
+def tweets(ids, likes, day="2025-05-01"):
+    return pd.DataFrame({
+        "tweet_id": [str(i) for i in ids],
+        "timestamp": pd.to_datetime([f"{day} 12:00:{i:02d}" for i in ids]),
+        "likes": likes,
+    })
+
+def partitions(root):
+    return [path for path, _, names in os.walk(root) if any(name.endswith(".parquet") for name in names)]
+
+def test_compaction_merges_files_and_keeps_latest_observations(tmp_path):
+    root = str(tmp_path)
+    append_to_archive(tweets([1, 2], [1.0, 2.0]), "iPhone", root)
+    append_to_archive(tweets([2, 3], [5.0, 3.0]), "iPhone", root)
+    append_to_archive(tweets([4], [4.0], day="2025-05-02"), "iPhone", root)
+    before = read_archive(["tweet_id", "likes"], archive_dir=root)
+
+    assert compact_archive(root) == (1, 2)
+    assert [len(partition_files(path)) for path in partitions(root)] == [1, 1]
+    after = read_archive(["tweet_id", "likes"], archive_dir=root)
+    pd.testing.assert_frame_equal(after.sort_values("tweet_id", ignore_index=True),
+                                  before.sort_values("tweet_id", ignore_index=True))
+    assert after.set_index("tweet_id")["likes"].to_dict() == {"1": 1.0, "2": 5.0, "3": 3.0, "4": 4.0}
+
+def test_append_compacts_a_partition_once_it_has_enough_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "COMPACT_FILES", 3)
+    root = str(tmp_path)
+    for i in range(3):
+        append_to_archive(tweets([i], [float(i)]), "iPhone", root)
+    [partition] = partitions(root)
+    assert len(partition_files(partition)) == 1
+    assert len(read_archive(["tweet_id"], latest=False, archive_dir=root)) == 3
+
+def test_partition_locked_by_another_writer_is_skipped(tmp_path):
+    root = str(tmp_path)
+    append_to_archive(tweets([1], [1.0]), "iPhone", root)
+    append_to_archive(tweets([2], [2.0]), "iPhone", root)
+    [partition] = partitions(root)
+
+    with archive.partition_lock(partition) as locked:
+        assert locked
+        assert compact_partition(partition) == 0
+    assert len(partition_files(partition)) == 2
+    assert not os.path.exists(os.path.join(partition, archive.COMPACT_LOCK))
+    assert compact_partition(partition) == 2
+
+def test_stale_lock_of_a_crashed_writer_is_broken(tmp_path):
+    root = str(tmp_path)
+    append_to_archive(tweets([1], [1.0]), "iPhone", root)
+    append_to_archive(tweets([2], [2.0]), "iPhone", root)
+    [partition] = partitions(root)
+
+    lock_path = os.path.join(partition, archive.COMPACT_LOCK)
+    open(lock_path, "w").close()
+    assert compact_partition(partition) == 0
+    stale = os.path.getmtime(lock_path) - archive.STALE_LOCK_SECONDS - 1
+    os.utime(lock_path, (stale, stale))
+    assert compact_partition(partition) == 2
+    assert len(read_archive(["tweet_id"], archive_dir=root)) == 2
+
+def test_readers_retry_when_a_compaction_removes_files(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    for i in range(3):
+        append_to_archive(tweets([i], [float(i)]), "iPhone", root)
+    [partition] = partitions(root)
+
+    # Another process merges the partition right after the reader listed its files
+    open_archive = archive.open_archive
+
+    def racing_open(archive_dir):
+        dataset = open_archive(archive_dir)
+        compact_partition(partition)
+        return dataset
+
+    monkeypatch.setattr(archive, "open_archive", racing_open)
+    assert sorted(read_archive(["tweet_id"], archive_dir=root)["tweet_id"]) == ["0", "1", "2"]
+
+    append_to_archive(tweets([3], [3.0]), "iPhone", root)
+    chunks = list(archive.iter_archive_chunks(["tweet_id"], archive_dir=root))
+    assert sorted(pd.concat(chunks)["tweet_id"]) == ["0", "1", "2", "3"]
@@ -0,0 +1,53 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from charts import ChartRenderer
+
+def past(values):
+    return {"data": pd.DataFrame({"ds": pd.date_range("2025-05-01", periods=len(values), freq="30s"), "y": values})}
+
+@pytest.fixture
+def renderer():
+    return ChartRenderer(figsize=(4, 3), dpi=50)
+
+def test_png_cache_is_keyed_by_the_data(renderer):
+    first = renderer.render("past", past([1.0, 2.0, 3.0]), title="iPhone")
+    assert first.startswith(b"\x89PNG")
+
+    # Equal data in a new frame is a hit, changed data or a changed title is drawn again
+    assert renderer.render("past", past([1.0, 2.0, 3.0]), title="iPhone") is first
+    changed = renderer.render("past", past([1.0, 2.0, 4.0]), title="iPhone")
+    retitled = renderer.render("past", past([1.0, 2.0, 3.0]), title="Pixel")
+    assert len({first, changed, retitled}) == 3
+    assert (renderer.hits, renderer.misses) == (1, 3)
+
+def test_least_recently_used_pngs_are_dropped_above_max_bytes(renderer):
+    png = renderer.render("past", past([1.0, 2.0]))
+    renderer.max_bytes = int(len(png) * 1.5)
+    renderer.render("past", past([2.0, 1.0]))
+
+    renderer.render("past", past([1.0, 2.0]))
+    assert renderer.misses == 3 and len(renderer._cache) == 1
+
+def test_figures_are_reused_per_thread_and_never_registered_with_pyplot(renderer):
+    import matplotlib.pyplot as plt
+
+    open_figures = plt.get_fignums()
+    for i in range(5):
+        renderer.render("band", {"data": past([1.0, 2.0, float(i)])["data"].assign(y_min=0.0, y_max=5.0)})
+    figure = renderer._local.figure
+    assert figure.axes == []            # cleared after every render
+
+    figures = []
+    def render_in_thread():
+        renderer.render("past", past([9.0, 8.0]))
+        figures.append(renderer._local.figure)
+
+    thread = threading.Thread(target=render_in_thread)
+    thread.start()
+    thread.join()
+    assert figures[0] is not figure
+    assert renderer._local.figure is figure
+    assert plt.get_fignums() == open_figures
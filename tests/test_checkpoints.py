@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+import checkpoints
+from checkpoints import CheckpointStore
+
+def test_checkpoints_round_trip_through_the_file(tmp_path):
+    path = str(tmp_path / "checkpoints.json")
+    store = CheckpointStore(path)
+    assert store.get("iPhone") is None
+
+    store.advance("iPhone", ["17", "9", "120"])
+    store.advance("Pixel", [5])
+    store.advance("iPhone", ["100"])        # older than the checkpoint, ignored
+    store.advance("Pixel", [])
+
+    reloaded = CheckpointStore(path)
+    assert (reloaded.get("iPhone"), reloaded.get("Pixel")) == ("120", "5")
+    with open(path) as f:
+        assert json.load(f) == {"iPhone": "120", "Pixel": "5"}
+
+def test_failed_save_keeps_the_previous_checkpoints(tmp_path, monkeypatch):
+    path = str(tmp_path / "checkpoints.json")
+    CheckpointStore(path).advance("iPhone", ["10"])
+
+    def crash(obj, f, **kwargs):
+        f.write('{"iPhone": "2')
+        raise OSError("disk full")
+
+    monkeypatch.setattr(checkpoints.json, "dump", crash)
+    with pytest.raises(OSError):
+        CheckpointStore(path).advance("iPhone", ["20"])
+    monkeypatch.undo()
+
+    assert CheckpointStore(path).get("iPhone") == "10"
+
+def test_unreadable_file_starts_without_checkpoints(tmp_path):
+    path = tmp_path / "checkpoints.json"
+    path.write_text("not json")
+    assert CheckpointStore(str(path)).get("iPhone") is None
@@ -0,0 +1,80 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from favourites import LEGACY_TABLE, FavouriteStore
+
+@pytest.fixture
+def store(tmp_path):
+    return FavouriteStore(str(tmp_path / "favourites.db"))
+
+def minute_series(n, start="2025-05-01 12:00"):
+    return pd.date_range(start, periods=n, freq="min"), [float(i) for i in range(n)]
+
+def test_legacy_points_are_migrated_once(tmp_path):
+    path = str(tmp_path / "engagement_data.db")
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE {LEGACY_TABLE} (id INTEGER PRIMARY KEY AUTOINCREMENT, xAxis TEXT, yAxis REAL)")
+    conn.executemany(f"INSERT INTO {LEGACY_TABLE} (xAxis, yAxis) VALUES (?, ?)", [
+        ("2025-05-01 12:00:30", 2.0),
+        ("2025-05-01T12:00:00", 1.0),
+        ("not a date", 9.0),
+        ("2025-05-01 12:00:30", 3.0),     # saved twice, the later value wins
+    ])
+    conn.commit()
+    conn.close()
+
+    store = FavouriteStore(path)
+    [series] = store.list_series().to_dict("records")
+    assert (series["label"], series["metric"], series["n_points"]) == ("Saved Engagement Final", "engagement_final", 2)
+    assert (series["start_ts"], series["end_ts"]) == (pd.Timestamp("2025-05-01 12:00:00"), pd.Timestamp("2025-05-01 12:00:30"))
+    points = store.load_page(series["id"])
+    assert points["y"].tolist() == [1.0, 3.0]
+
+    # Opening the migrated database again does not import the points a second time
+    assert len(FavouriteStore(path).list_series()) == 1
+
+def test_pages_follow_the_last_timestamp(store):
+    timestamps, values = minute_series(1234)
+    series_id = store.save_series("iPhone", "likes", timestamps, values)
+
+    pages = []
+    after = None
+    while True:
+        page = store.load_page(series_id, after=after, limit=500)
+        if page.empty:
+            break
+        pages.append(page)
+        after = page["ts"].iloc[-1]
+    assert [len(page) for page in pages] == [500, 500, 234]
+    assert pd.concat(pages)["y"].tolist() == values
+
+    page = store.load_page(series_id, start=timestamps[100], end=timestamps[110], after=to_ts(timestamps[104]))
+    assert page["ds"].tolist() == list(timestamps[105:110])
+
+def to_ts(timestamp):
+    return int(pd.Timestamp(timestamp, tz="UTC").timestamp())
+
+def test_downsampled_buckets_have_equal_width_and_keep_the_extremes(store):
+    timestamps, values = minute_series(101)
+    values[37] = 1000.0                    # a spike
+    series_id = store.save_series("iPhone", "likes", timestamps, values)
+
+    df = store.load_downsampled(series_id, max_points=10)
+
+    # 100 minutes plus the last second, in 10 buckets of 601 seconds starting at the first point
+    offsets = pd.Series([(ts - timestamps[0]).total_seconds() for ts in timestamps])
+    buckets = pd.DataFrame({"ds": timestamps, "y": values}).groupby((offsets // 601).to_numpy())
+    expected = pd.DataFrame({
+        "ds": buckets["ds"].min().to_numpy(),
+        "y": buckets["y"].mean().to_numpy(),
+        "y_min": buckets["y"].min().to_numpy(),
+        "y_max": buckets["y"].max().to_numpy(),
+    })
+    assert len(df) == 10
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    assert df["y_max"].max() == 1000.0
+
+    assert len(store.load_downsampled(series_id, max_points=1000)) == 101
+    assert store.load_downsampled(series_id, start="2030-01-01").empty
@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecasting
+from forecasting import (FORECAST_FREQ, ForecastCache, HoltForecaster, changepoint_count, discard_pool,
+                         fit_and_predict, get_pool, holt_forecast_batch, warm_start_params)
+
+def wait_until_running(future):
+    deadline = time.monotonic() + 30
+    while not future.running() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert future.running()
+
+def test_terminated_pool_kills_its_running_workers():
+    pool = get_pool(1)
+    future = pool.submit(time.sleep, 60)
+    wait_until_running(future)
+    processes = list(pool._processes.values())
+
+    started = time.monotonic()
+    discard_pool(pool, terminate=True)
+    for process in processes:
+        process.join(10)
+        assert not process.is_alive()
+    assert time.monotonic() - started < 10
+    assert get_pool(1) is not pool
+    discard_pool(get_pool(1))
+
+class PoolWithTerminate:
+    def __init__(self):
+        self.terminated = False
+
+    def terminate_workers(self):
+        self.terminated = True
+
+def test_public_terminate_workers_is_preferred():
+    pool = PoolWithTerminate()
+    forecasting.terminate_workers(pool)
+    assert pool.terminated
+
+@pytest.mark.skipif(sys.version_info >= (3, 14), reason="ProcessPoolExecutor.terminate_workers is used instead")
+def test_without_worker_processes_the_running_fit_finishes(monkeypatch):
+    pool = get_pool(1)
+    future = pool.submit(time.sleep, 0.5)
+    wait_until_running(future)
+    monkeypatch.setattr(pool, "_processes", None)     # an executor that does not expose its processes
+
+    discard_pool(pool, terminate=True)
+    assert future.result(timeout=30) is None
+    assert get_pool(1) is not pool
+    discard_pool(get_pool(1))
+
+# --------------------
+# Forecast Cache
+# --------------------
+
+def series(n=50, start="2025-05-01", scale=1.0):
+    return pd.DataFrame({"ds": pd.date_range(start, periods=n, freq="30s"), "y": np.arange(n) * scale})
+
+def forecast_of(df):
+    return df.rename(columns={"y": "yhat"}).assign(yhat_lower=df["y"] - 1, yhat_upper=df["y"] + 1)
+
+@pytest.fixture
+def cache(tmp_path):
+    return ForecastCache(str(tmp_path / "cache"))
+
+def test_key_depends_on_the_series_and_the_horizon(cache):
+    df = series()
+    key = cache.key(df, "likes", "Berlin", 20)
+    assert cache.key(df.set_index(df.index + 100), "likes", "Berlin", 20) == key     # the index is not hashed
+    assert cache.key(df.assign(extra=1), "likes", "Berlin", 20) == key
+    others = {
+        cache.key(series(scale=2.0), "likes", "Berlin", 20),
+        cache.key(series(n=51), "likes", "Berlin", 20),
+        cache.key(df, "retweets", "Berlin", 20),
+        cache.key(df, "likes", None, 20),
+        cache.key(df, "likes", "Berlin", 40),
+        cache.key(df, "likes", "Berlin", 20, freq="1min"),
+    }
+    assert len(others) == 6 and key not in others
+
+def test_cached_forecast_round_trips(cache):
+    df = series()
+    key = cache.key(df, "likes", "Berlin", 20)
+    assert cache.get(key) is None
+    cache.put(key, "likes", "Berlin", "30s", "{}", forecast_of(df), len(df))
+    pd.testing.assert_frame_equal(cache.get(key), forecast_of(df))
+
+def test_least_recently_used_entries_are_evicted_by_mtime(cache):
+    keys = []
+    for position, metric in enumerate(["likes", "retweets", "replies"]):
+        df = series()
+        key = cache.key(df, metric, "Berlin", 20)
+        cache.put(key, metric, "Berlin", "30s", "{}", forecast_of(df), len(df))
+        os.utime(cache._entry_path(key), (1000 + position, 1000 + position))
+        keys.append(key)
+
+    # Reading the oldest entry makes the second one the least recently used
+    assert cache.get(keys[0]) is not None
+    sizes = {key: os.path.getsize(cache._entry_path(key)) for key in keys}
+    cache.max_bytes = sizes[keys[0]] + sizes[keys[2]]
+    cache.evict()
+
+    assert [os.path.exists(cache._entry_path(key)) for key in keys] == [True, False, True]
+
+def test_warm_start_needs_a_previous_fit_of_a_similar_length(cache):
+    df = series(100)
+    assert cache.warm_start("likes", "Berlin", df) is None
+    key = cache.key(df, "likes", "Berlin", 20)
+    cache.put(key, "likes", "Berlin", FORECAST_FREQ, "{}", forecast_of(df), len(df))
+
+    # Series that shrank or grew by more than WARM_START_MAX_GROWTH are fitted cold (Prophet is not loaded)
+    assert cache.warm_start("likes", "Berlin", series(99)) is None
+    assert cache.warm_start("likes", "Berlin", series(111)) is None
+    assert cache.warm_start("likes", "Paris", series(105)) is None
+
+@pytest.mark.parametrize("points, expected", [(200, 25), (33, 25), (32, 24), (10, 7), (2, 1), (1, 1)])
+def test_changepoint_count_follows_prophets_cap_on_short_histories(points, expected):
+    model = SimpleNamespace(n_changepoints=25, changepoint_range=0.8)
+    assert changepoint_count(model, series(points)) == expected
+
+def test_warm_start_with_a_delta_of_another_length_falls_back_to_a_cold_fit():
+    pytest.importorskip("prophet")
+    from prophet.serialize import model_from_json
+
+    long_json, _ = fit_and_predict(series(200), 5)
+    init = warm_start_params(model_from_json(long_json))
+    assert len(init["delta"]) == 25
+
+    short = series(20)
+    _, forecast = fit_and_predict(short, 5, init=init)     # 15 changepoints fit this history
+    assert len(forecast) == len(short) + 5
+
+# --------------------
+# Holt
+# --------------------
+
+def test_series_too_short_for_holt_are_left_out():
+    ds = pd.date_range("2025-05-01", periods=3, freq="30s")
+    batch = {
+        "long": series(10),
+        "one point": series(1),
+        "empty": series(0),
+        "all missing": pd.DataFrame({"ds": ds, "y": [np.nan] * 3}),
+        "one bin": pd.DataFrame({"ds": ds[:1].repeat(2) + pd.to_timedelta([0, 10], unit="s"), "y": [1.0, 3.0]}),
+    }
+
+    assert list(holt_forecast_batch(batch, 5)) == ["long"]
+    results = list(HoltForecaster().forecast_many(batch, 5))
+    assert [name for name, _, _ in results] == list(batch)
+    name, forecast, error = results[0]
+    assert error is None and len(forecast) == 15
+    for name, forecast, error in results[1:]:
+        assert forecast is None and isinstance(error, ValueError)
+    assert holt_forecast_batch({"short": series(1)}, 5) == {}
+
+def test_holt_intervals_cover_the_requested_share():
+    rng = np.random.default_rng(0)
+    n, periods = 300, 20
+    batch, actual = {}, {}
+    for i in range(200):
+        y = 50 + rng.uniform(-0.1, 0.1) * np.arange(n + periods) + rng.normal(0, 5, n + periods)
+        batch[i] = pd.DataFrame({"ds": pd.date_range("2025-05-01", periods=n, freq="30s"), "y": y[:n]})
+        actual[i] = y[n:]
+
+    forecasts = holt_forecast_batch(batch, periods, interval_width=0.8)
+    history_hits, future_hits = [], []
+    for i, forecast in forecasts.items():
+        lower, upper = forecast["yhat_lower"].to_numpy(), forecast["yhat_upper"].to_numpy()
+        y = batch[i]["y"].to_numpy()
+        history_hits.append((y >= lower[:n]) & (y <= upper[:n]))
+        future_hits.append((actual[i] >= lower[n:]) & (actual[i] <= upper[n:]))
+
+        # Intervals widen with the horizon
+        assert np.all(np.diff(upper[n:] - lower[n:]) >= 0)
+
+    assert abs(np.mean(history_hits) - 0.8) < 0.01
+    assert 0.75 <= np.mean(future_hits) <= 0.9
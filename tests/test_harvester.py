@@ -0,0 +1,107 @@
+import pytest
+from tweepy.errors import TooManyRequests
+
+from fakes import FakeClock, FakeResponse, FakeTwitterClient, synthetic_api_tweets
+from harvester import RESET_FALLBACK, HarvestError, RateLimitBucket, TweetHarvester
+
+def make_harvester(tweets, users, clock, limit=450):
+    client = FakeTwitterClient(tweets, users, limit=limit, clock=clock)
+    return TweetHarvester(client, RateLimitBucket(clock=clock, sleep=clock.sleep))
+
+@pytest.fixture
+def api():
+    return synthetic_api_tweets(["iPhone"], 250)
+
+def test_follows_next_token_to_the_last_page(api):
+    tweets, users = api
+    harvester = make_harvester(tweets, users, FakeClock())
+
+    rows = list(harvester.harvest("iPhone"))
+    assert [row["tweet_id"] for row in rows] == [tweet["id"] for tweet in tweets["iPhone"]]
+    assert harvester.client.calls == 3      # pages of 100, 100 and 50
+
+def test_stops_at_max_tweets(api):
+    tweets, users = api
+    harvester = make_harvester(tweets, users, FakeClock())
+
+    rows = list(harvester.harvest("iPhone", max_tweets=120))
+    assert len(rows) == 120
+    assert harvester.client.calls == 2
+
+def test_since_id_only_returns_newer_tweets(api):
+    tweets, users = api
+    since_id = tweets["iPhone"][30]["id"]
+
+    rows = list(make_harvester(tweets, users, FakeClock()).harvest("iPhone", since_id=since_id))
+    assert [row["tweet_id"] for row in rows] == [tweet["id"] for tweet in tweets["iPhone"][:30]]
+
+def test_bucket_blocks_on_an_empty_window_until_the_reset(api):
+    tweets, users = api
+    clock = FakeClock()
+    harvester = make_harvester(tweets, users, clock, limit=2)
+
+    rows = list(harvester.harvest("iPhone"))
+    assert len(rows) == 250
+    assert clock.sleeps == [901]            # x-rate-limit-reset of the first window, plus one second
+    assert harvester.client.calls == 3      # the third page waited instead of getting a 429
+
+def test_retries_after_a_429_once_the_window_resets(api):
+    tweets, users = api
+    clock = FakeClock()
+    harvester = make_harvester(tweets, users, clock, limit=5)
+    harvester.client._used = 5              # another consumer of the token used up the window
+
+    rows = list(harvester.harvest("iPhone", max_tweets=100))
+    assert len(rows) == 100
+    assert clock.sleeps == [901]
+    assert harvester.client.calls == 2
+
+class RejectingClient:
+    """Answers the first request with a 429 without rate limit headers."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = 0
+
+    def search_recent_tweets(self, **params):
+        self.calls += 1
+        if self.calls == 1:
+            raise TooManyRequests(FakeResponse({}, {}, 429, "Too Many Requests"))
+        return self.client.search_recent_tweets(**params)
+
+def test_429_without_headers_waits_the_fallback_on_the_injected_clock(api):
+    tweets, users = api
+    clock = FakeClock()
+    client = RejectingClient(FakeTwitterClient(tweets, users, clock=clock))
+    harvester = TweetHarvester(client, RateLimitBucket(clock=clock, sleep=clock.sleep))
+
+    assert len(list(harvester.harvest("iPhone", max_tweets=10))) == 10
+    assert clock.sleeps == [RESET_FALLBACK + 1]
+
+def test_bucket_with_a_limit_waits_before_any_response():
+    clock = FakeClock()
+    bucket = RateLimitBucket(limit=1, clock=clock, sleep=clock.sleep)
+
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == [RESET_FALLBACK + 1]
+    assert bucket.tokens == 0
+
+class FailingClient(FakeTwitterClient):
+    def search_recent_tweets(self, query, **params):
+        if query.startswith("broken"):
+            raise PermissionError("query not allowed")
+        return super().search_recent_tweets(query, **params)
+
+def test_harvest_many_finishes_the_other_products_before_raising():
+    tweets, users = synthetic_api_tweets(["iPhone", "Pixel"], 150)
+    harvester = TweetHarvester(FailingClient(tweets, users), max_workers=2)
+
+    rows = {"iPhone": 0, "Pixel": 0}
+    with pytest.raises(HarvestError) as raised:
+        for product, _ in harvester.harvest_many(["iPhone", "broken", "Pixel"]):
+            rows[product] += 1
+
+    assert rows == {product: len(tweets[product]) for product in rows}
+    assert list(raised.value.errors) == ["broken"]
+    assert isinstance(raised.value.errors["broken"], PermissionError)
@@ -0,0 +1,84 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from archive import append_to_archive, read_archive
+from hashtags import SpaceSaving, aggregate_hashtag_engagement
+
+def test_archive_aggregation_counts_the_latest_observation_of_each_tweet(tmp_path):
+    root = str(tmp_path)
+    for engagement in ([1.0, 3.0], [5.0, 7.0]):     # the same tweets observed twice
+        append_to_archive(pd.DataFrame({
+            "tweet_id": ["1", "2"],
+            "timestamp": pd.to_datetime(["2025-05-01 12:00", "2025-05-01 13:00"]),
+            "text": ["#A launch", "no tags in the text"],
+            "hashtags": [["a"], ["a", "b"]],
+            "engagement_including_sentiment": engagement,
+        }), "iPhone", root)
+
+    df = read_archive(["hashtags", "engagement_including_sentiment"], archive_dir=root)
+    result = aggregate_hashtag_engagement([df]).set_index("Hashtag")
+    assert result["Tweets"].to_dict() == {"#b": 1, "#a": 2}
+    assert result["Avg Engagement"].to_dict() == {"#b": 7.0, "#a": 6.0}
+    assert list(result.index) == ["#b", "#a"]
+
+def zipf_stream(n, tags=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return [f"tag{rank}" for rank in np.minimum(rng.zipf(1.3, n), tags)]
+
+def test_space_saving_keeps_every_heavy_hitter_with_bounded_counts():
+    stream = zipf_stream(20000)
+    counter = SpaceSaving(capacity=50)
+    for hashtag in stream:
+        counter.add(hashtag)
+
+    true_counts = Counter(stream)
+    monitored = {entry["hashtag"]: entry for entry in counter.top(counter.capacity)}
+    assert len(monitored) == 50
+    assert sum(entry["count"] for entry in monitored.values()) == counter.total == len(stream)
+    for hashtag, count in true_counts.items():
+        if count > len(stream) / counter.capacity:
+            assert hashtag in monitored
+    for hashtag, entry in monitored.items():
+        assert entry["count"] - entry["error"] <= true_counts[hashtag] <= entry["count"]
+
+    # The most frequent tags of a skewed stream are exact and in order
+    assert [entry["hashtag"] for entry in counter.top(3)] == [tag for tag, _ in true_counts.most_common(3)]
+
+def test_stale_heap_entries_are_not_evicted():
+    counter = SpaceSaving(capacity=2)
+    for hashtag in ["a", "a", "a", "b"]:      # the heap still holds (1, "a") and (2, "a")
+        counter.add(hashtag)
+    counter.add("c", engagement=4.0)
+
+    assert counter.top() == [
+        {"hashtag": "a", "count": 3, "error": 0, "avg_engagement": 0.0},
+        {"hashtag": "c", "count": 2, "error": 1, "avg_engagement": 4.0},
+    ]
+
+    for _ in range(100):
+        counter.add("a")
+    assert len(counter._heap) <= 4 * counter.capacity + 1      # stale entries are dropped once the heap grows
+
+def test_saved_counter_loads_and_continues_like_the_original(tmp_path):
+    path = str(tmp_path / "topk.json")
+    stream = zipf_stream(5000, seed=1)
+    counter = SpaceSaving(capacity=30)
+    counter.update([[hashtag] for hashtag in stream], range(len(stream)))
+    counter.save(path)
+
+    loaded = SpaceSaving.load(path)
+    assert (loaded.capacity, loaded.total) == (30, 5000)
+    assert loaded.top(30) == counter.top(30)
+
+    more = zipf_stream(2000, seed=2)
+    for copy in (counter, loaded):
+        copy.update([[hashtag] for hashtag in more], [1.0] * len(more))
+    assert loaded.top(30) == counter.top(30)
+
+def test_missing_or_corrupt_file_starts_an_empty_counter(tmp_path):
+    path = tmp_path / "topk.json"
+    assert SpaceSaving.load(str(path), capacity=7).top() == []
+    path.write_text("{")
+    assert SpaceSaving.load(str(path), capacity=7).capacity == 7
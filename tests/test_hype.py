@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hype import SIGNAL_COLUMNS, WINDOW, rank_products, rolling_baseline, rolling_growth
+
+def interest(columns, days=None):
+    days = days or len(next(iter(columns.values())))
+    return pd.DataFrame(columns, index=pd.date_range(end="2025-05-01", periods=days, freq="D"), dtype=float)
+
+def test_rolling_baseline_matches_pandas_rolling():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 100, (60, 4)).astype(float)
+    values[rng.random(values.shape) < 0.1] = np.nan      # missing steps
+    values[:20, 3] = 7.0                                  # a flat stretch
+
+    mean, std, peak = rolling_baseline(values, WINDOW)
+    previous = pd.DataFrame(values).shift(1).rolling(WINDOW, min_periods=1)
+    np.testing.assert_allclose(mean, previous.mean(), atol=1e-9)
+    np.testing.assert_allclose(std, pd.DataFrame(values).shift(1).rolling(WINDOW, min_periods=2).std(), atol=1e-6)
+    np.testing.assert_allclose(peak, previous.max())
+
+def test_growth_from_a_zero_base_is_finite():
+    growth = rolling_growth(np.array([[0.0], [0.0], [0.0], [50.0], [0.0], [10.0]]), periods=2)[:, 0]
+    np.testing.assert_allclose(growth, [np.nan, np.nan, 0.0, 5000.0, 0.0, -80.0])
+
+def test_product_rising_from_zero_interest_is_ranked_first():
+    days = 30
+    matrix = interest({
+        "new": [0.0] * (days - 2) + [40.0, 80.0],
+        "steady": list(np.linspace(40, 60, days)),
+        "noisy": [50.0 + (10 if day % 2 else -10) for day in range(days)],
+    })
+
+    ranking = rank_products(matrix)
+    assert not ranking.isna().any().any()
+    assert ranking.index[0] == "new"
+    assert ranking.loc["new", "breakout"]
+    assert ranking.loc["new", "growth"] == 8000.0
+
+@pytest.mark.parametrize("days", [1, 2, 3])
+def test_short_series_are_ranked_without_signals(days):
+    matrix = interest({"a": [10.0, 20.0, 30.0][:days], "b": [5.0, 5.0, 5.0][:days]})
+
+    ranking = rank_products(matrix)
+    assert list(ranking.columns) == SIGNAL_COLUMNS
+    assert set(ranking.index) == {"a", "b"}
+    assert not ranking["burst"].any() and not ranking["breakout"].any()
+    assert (ranking["hype_score"] >= 0).all()
+    assert ranking["zscore"].isna().all() == (days < 3)      # the baseline needs two earlier values
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from locations import GAZETTEER, add_location_fields, resolve_location
+
+@pytest.mark.parametrize("location", ["Universidad de Chile", "Puerto de la Cruz", "Casa de mi mamá"])
+def test_short_aliases_inside_free_text_do_not_match(location):
+    assert GAZETTEER.resolve(location)["country"] != "Germany"
+    assert GAZETTEER.resolve(location)["city"] != "Los Angeles"
+
+def test_country_named_in_free_text_still_matches():
+    assert resolve_location("Universidad de Chile") == (None, None, "Chile")
+    assert resolve_location("Casa de mi mamá") == (None, None, None)
+
+@pytest.mark.parametrize("location, expected", [
+    ("Berlin, CT", (None, "Connecticut", "United States")),
+    ("Berlin, NH", (None, "New Hampshire", "United States")),
+    ("Paris, TX", (None, "Texas", "United States")),
+    ("Toronto, CA", ("Toronto", "Ontario", "Canada")),
+    ("Los Angeles, CA", ("Los Angeles", "California", "United States")),
+    ("Berlin, DE", ("Berlin", "Berlin", "Germany")),
+])
+def test_trailing_region_or_country_part_wins(location, expected):
+    assert resolve_location(location) == expected
+
+@pytest.mark.parametrize("location, expected", [
+    ("DE", (None, None, "Germany")),
+    ("USA", (None, None, "United States")),
+    ("London, UK", ("London", "England", "United Kingdom")),
+    ("LA", ("Los Angeles", "California", "United States")),
+    ("Austin, TX", ("Austin", "Texas", "United States")),
+    ("München, Bayern", ("Munich", "Bavaria", "Germany")),
+    ("Berlin", ("Berlin", "Berlin", "Germany")),
+    ("🇩🇪", (None, None, "Germany")),
+])
+def test_short_names_as_whole_parts(location, expected):
+    assert resolve_location(location) == expected
+
+def test_add_location_fields():
+    df = add_location_fields(pd.DataFrame({"user_location": ["Toronto, CA", None, "Puerto de la Cruz"]}))
+    assert df.loc[0, ["location_city", "location_region", "location_country"]].tolist() == ["Toronto", "Ontario", "Canada"]
+    assert df.loc[1:, "location_country"].isna().all()
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_metrics import pandas_metrics, synthetic_tweets
+from metrics import METRICS, add_metrics, iter_metrics
+
+METRIC_NAMES = [name for name, _, _ in METRICS]
+
+def test_engine_matches_the_previous_pandas_formulas():
+    tweets = synthetic_tweets(5000, seed=1)
+    tweets.loc[:10, "followers"] = 10000       # exactly at the high-follower threshold
+
+    expected = pandas_metrics(tweets.copy())
+    result = add_metrics(tweets.copy())
+    # Scores are float32 like the Elasticsearch fields, so 1 + sentiment near -1 loses a few digits
+    for name in METRIC_NAMES:
+        np.testing.assert_allclose(result[name], expected[name], rtol=1e-6, atol=1e-5, err_msg=name)
+
+def test_chunks_give_the_same_metrics_as_one_frame():
+    tweets = synthetic_tweets(5000, seed=2)
+
+    whole = add_metrics(tweets.copy())
+    chunks = pd.concat(iter_metrics(tweets.iloc[start:start + 700].copy() for start in range(0, len(tweets), 700)))
+    pd.testing.assert_frame_equal(chunks, whole)
+
+def test_metrics_are_added_to_the_given_frame():
+    tweets = synthetic_tweets(10)
+    result = add_metrics(tweets)
+    assert result is tweets
+    assert set(METRIC_NAMES) <= set(tweets.columns)
+    assert tweets["likes"].dtype == np.int32
@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+from elasticsearch_dsl import connections
+
+import pipeline
+from archive import read_archive
+from checkpoints import CheckpointStore
+from fakes import FakeElasticsearch, FakeTwitterClient, synthetic_api_tweets
+from harvester import RateLimitBucket, TweetHarvester
+from hashtags import SpaceSaving
+from models import INDEX_NAME
+from pipeline import STAGES, TweetPipeline
+from sentiment import SentimentStage
+
+PRODUCTS = ["iPhone", "Pixel"]
+
+@pytest.fixture
+def es(monkeypatch):
+    es = FakeElasticsearch()
+    monkeypatch.setattr(connections, "get_connection", lambda alias="default": es)
+    return es
+
+@pytest.fixture
+def stored_once(monkeypatch):
+    """Count how often every tweet id reaches the index stage as a new tweet."""
+    counts = {}
+    store_tweets = pipeline.store_tweets
+
+    def counting(tweets_df, product, archive_dir=None):
+        new_df = store_tweets(tweets_df, product, archive_dir)
+        for tweet_id in new_df["tweet_id"]:
+            counts[tweet_id] = counts.get(tweet_id, 0) + 1
+        return new_df
+
+    monkeypatch.setattr(pipeline, "store_tweets", counting)
+    return counts
+
+def make_pipeline(tmp_path, client, **kwargs):
+    kwargs = {"batch_size": 50, "queue_size": 1, "poll_interval": 0, "archive_dir": str(tmp_path / "archive"),
+              "topk_file": str(tmp_path / "topk.json"), **kwargs}
+    return TweetPipeline(
+        TweetHarvester(client, RateLimitBucket()),
+        SentimentStage(),
+        CheckpointStore(str(tmp_path / "checkpoints.json")),
+        SpaceSaving(),
+        PRODUCTS,
+        **kwargs,
+    )
+
+def run_polls(pipe, polls):
+    """Run the pipeline until every product was searched `polls` times, then stop it."""
+    async def main():
+        stop = asyncio.Event()
+        task = asyncio.create_task(pipe.run(stop))
+        while pipe.harvester.client.calls < polls * len(PRODUCTS) and not task.done():
+            await asyncio.sleep(0.01)
+        stop.set()
+        return await task
+
+    return asyncio.run(main())
+
+def newest_id(tweets, product):
+    return max(int(tweet["id"]) for tweet in tweets[product])
+
+def test_tweets_are_stored_once_over_several_polls(tmp_path, es, stored_once):
+    tweets, users = synthetic_api_tweets(PRODUCTS, 120)
+    client = FakeTwitterClient(tweets, users, limit=10**6)
+    pipe = make_pipeline(tmp_path, client)
+
+    stats = run_polls(pipe, polls=4)
+
+    n_tweets = sum(len(product_tweets) for product_tweets in tweets.values())
+    assert es.doc_count(INDEX_NAME) == n_tweets
+    assert len(stored_once) == n_tweets and set(stored_once.values()) == {1}
+    assert stats["fetched"] == stats["index"] == n_tweets     # later polls only ask for newer tweets
+    assert len(read_archive(["tweet_id"], latest=False, archive_dir=str(tmp_path / "archive"))) == n_tweets
+    for product in PRODUCTS:
+        assert pipe.checkpoints.get(product) == str(newest_id(tweets, product))
+
+def test_checkpoint_only_advances_after_the_batches_are_stored(tmp_path, es, monkeypatch):
+    tweets, users = synthetic_api_tweets(PRODUCTS, 120)
+    pipe = make_pipeline(tmp_path, FakeTwitterClient(tweets, users, limit=10**6))
+
+    # Every checkpoint written must only cover tweets that are in the index
+    advance = pipe.checkpoints.advance
+
+    def checked_advance(product, tweet_ids):
+        newest = max(int(tweet_id) for tweet_id in tweet_ids)
+        covered = [tweet["id"] for tweet in tweets[product] if int(tweet["id"]) <= newest]
+        assert all(tweet_id in es.docs[INDEX_NAME] for tweet_id in covered)
+        advance(product, tweet_ids)
+
+    monkeypatch.setattr(pipe.checkpoints, "advance", checked_advance)
+
+    # The first index batch of the first product fails
+    failures = {PRODUCTS[0]: 1}
+    store_tweets = pipeline.store_tweets
+
+    def flaky(tweets_df, product, archive_dir=None):
+        if failures.get(product):
+            failures[product] -= 1
+            raise ConnectionError("cluster unavailable")
+        return store_tweets(tweets_df, product, archive_dir)
+
+    monkeypatch.setattr(pipeline, "store_tweets", flaky)
+
+    stats = asyncio.run(pipe.run(once=True))
+    assert stats["failed_batches"] == 1
+    assert pipe.checkpoints.get(PRODUCTS[0]) is None
+    assert pipe.checkpoints.get(PRODUCTS[1]) == str(newest_id(tweets, PRODUCTS[1]))
+
+    # The next search starts again from the stored checkpoint and fills the gap
+    asyncio.run(pipe.run(once=True))
+    assert pipe.checkpoints.get(PRODUCTS[0]) == str(newest_id(tweets, PRODUCTS[0]))
+    assert es.doc_count(INDEX_NAME) == sum(len(product_tweets) for product_tweets in tweets.values())
+
+def assert_drained(pipe, es):
+    assert all(pipe._queues[stage].empty() for stage in STAGES)
+    assert pipe.stats["index"] == pipe.stats["fetched"]     # every fetched batch went through every stage
+    assert es.doc_count(INDEX_NAME) == pipe.stats["fetched"]
+    for product in PRODUCTS:
+        checkpoint = pipe.checkpoints.get(product)
+        assert checkpoint is None or checkpoint in es.docs[INDEX_NAME]
+
+def test_stopped_run_drains_the_queues(tmp_path, es):
+    es.latency = 0.01
+    tweets, users = synthetic_api_tweets(PRODUCTS, 2000)
+    pipe = make_pipeline(tmp_path, FakeTwitterClient(tweets, users, limit=10**6))
+
+    async def main():
+        stop = asyncio.Event()
+        task = asyncio.create_task(pipe.run(stop, once=True))
+        while pipe.stats["index"] == 0:
+            await asyncio.sleep(0.01)
+        stop.set()
+        return await asyncio.wait_for(task, 30)
+
+    stats = asyncio.run(main())
+    assert 0 < stats["fetched"] < 4000
+    assert_drained(pipe, es)
+
+def test_cancelled_run_drains_the_queues(tmp_path, es):
+    es.latency = 0.01
+    tweets, users = synthetic_api_tweets(PRODUCTS, 2000)
+    pipe = make_pipeline(tmp_path, FakeTwitterClient(tweets, users, limit=10**6))
+
+    async def main():
+        task = asyncio.create_task(pipe.run(once=True))
+        while pipe.stats["index"] == 0:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, 30)
+
+    asyncio.run(main())
+    assert 0 < pipe.stats["fetched"] < 4000
+    assert_drained(pipe, es)
+    assert pipe._executor._shutdown
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+from elasticsearch_dsl import connections
+
+import save_dsl
+from fakes import FakeElasticsearch
+from models import INDEX_NAME
+from save_dsl import bulk_write, relaxed_refresh, save_to_elasticsearch_dsl, split_new_and_changed
+
+def test_split_dedups_tweet_ids_and_keeps_only_changed_fields():
+    es = FakeElasticsearch()
+    es.add_documents(INDEX_NAME, {
+        "1": {"likes": 10, "retweets": 2, "text": "stored"},
+        "2": {"likes": 5, "retweets": 1},
+    })
+    df = pd.DataFrame({
+        "tweet_id": ["1", "2", "3", "3", "1"],
+        "likes": [11, 5, 1, 2, 12],
+        "retweets": [2, 1, 0, 0, 2],
+    })
+
+    new_df, changes = split_new_and_changed(df, es)
+    assert new_df.to_dict("records") == [{"tweet_id": "3", "likes": 2, "retweets": 0}]
+    assert changes == {"1": {"likes": 12}}      # the last row of a repeated id wins, tweet 2 is unchanged
+
+def index_actions(n):
+    return ({"_op_type": "index", "_index": INDEX_NAME, "_id": str(i), "_source": {"likes": i}} for i in range(n))
+
+def test_bulk_write_retries_rejected_items_and_reports_failed_ones(monkeypatch):
+    monkeypatch.setattr(save_dsl, "INITIAL_BACKOFF", 0)
+    es = FakeElasticsearch(rejections=150, invalid_ids={"7", "300"})
+
+    sent, errors = bulk_write(index_actions(1000), chunk_size=100, thread_count=2, es=es)
+    assert sent == 1000
+    assert sorted(item["index"]["_id"] for item in errors) == ["300", "7"]
+    assert {item["index"]["error"]["type"] for item in errors} == {"mapper_parsing_exception"}
+    assert es.doc_count(INDEX_NAME) == 998
+    assert es.rejections == 0
+
+def test_bulk_write_gives_up_on_items_rejected_too_often(monkeypatch):
+    monkeypatch.setattr(save_dsl, "INITIAL_BACKOFF", 0)
+    es = FakeElasticsearch(rejections=10**6)
+
+    sent, errors = bulk_write(index_actions(10), chunk_size=5, thread_count=1, max_retries=2, es=es)
+    assert sent == 10 and len(errors) == 10
+    assert es.doc_count(INDEX_NAME) == 0
+
+def test_bulk_write_keeps_the_producer_a_bounded_distance_ahead():
+    chunk_size, thread_count = 20, 2
+    es = FakeElasticsearch(latency=0.005)
+    leads = []
+
+    def actions():
+        for i, action in enumerate(index_actions(2000)):
+            leads.append(i - es.doc_count(INDEX_NAME))
+            yield action
+
+    sent, errors = bulk_write(actions(), chunk_size, thread_count, es=es)
+    assert (sent, errors) == (2000, [])
+    # The queue holds two chunks per sender, and every sender builds or sends one more
+    assert max(leads) <= 3 * chunk_size * thread_count + thread_count
+
+class RefusingElasticsearch(FakeElasticsearch):
+    def bulk(self, operations, **kwargs):
+        raise ConnectionError("cluster unavailable")
+
+def test_refresh_interval_is_restored_after_a_failed_load(monkeypatch):
+    monkeypatch.setattr(save_dsl, "RELAX_REFRESH_MIN_DOCS", 10)
+    es = RefusingElasticsearch()
+    monkeypatch.setattr(connections, "get_connection", lambda alias="default": es)
+    es.indices.put_settings(index=INDEX_NAME, settings={"index": {"refresh_interval": "5s"}})
+    seen = []
+    put_settings = es.indices.put_settings
+
+    def recording_put_settings(index, settings):
+        seen.append(settings["index"]["refresh_interval"])
+        return put_settings(index=index, settings=settings)
+
+    monkeypatch.setattr(es.indices, "put_settings", recording_put_settings)
+    df = pd.DataFrame({"tweet_id": [str(i) for i in range(20)], "likes": range(20)})
+    with pytest.raises(ConnectionError):
+        save_to_elasticsearch_dsl(df, chunk_size=5, thread_count=2)
+
+    assert seen == ["-1", "5s"]
+    assert es.indices.settings[INDEX_NAME]["refresh_interval"] == "5s"
+
+def test_relaxed_refresh_restores_the_default_interval():
+    es = FakeElasticsearch()
+    with pytest.raises(RuntimeError):
+        with relaxed_refresh(es):
+            assert es.indices.settings[INDEX_NAME]["refresh_interval"] == "-1"
+            raise RuntimeError("load failed")
+    assert es.indices.settings[INDEX_NAME]["refresh_interval"] is None     # None resets to the index default
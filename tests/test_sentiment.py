@@ -0,0 +1,58 @@
+from textblob import TextBlob
+
+from sentiment import ScoreCache, SentimentStage, TextBlobScorer
+
+TEXTS = [
+    "I love the new camera, great battery",
+    "awful update, the screen is terrible",
+    "just a phone",
+    "",
+    "I love the new camera, great battery",
+    "best purchase ever!!!",
+    "not bad, not good either",
+]
+
+class CountingScorer(TextBlobScorer):
+    def __init__(self):
+        self.scored = []
+
+    def score_batch(self, texts):
+        self.scored.extend(texts)
+        return super().score_batch(texts)
+
+def test_scores_match_textblob_polarity():
+    stage = SentimentStage(batch_size=2)
+    assert stage.score(TEXTS) == [TextBlob(text).sentiment.polarity for text in TEXTS]
+
+def test_cached_and_repeated_texts_are_scored_once():
+    scorer = CountingScorer()
+    stage = SentimentStage(scorer)
+
+    first = stage.score(TEXTS)
+    assert sorted(scorer.scored) == sorted(set(TEXTS))
+    assert len(stage.cache) == len(set(TEXTS))
+
+    scorer.scored.clear()
+    assert stage.score(list(reversed(TEXTS))) == list(reversed(first))
+    assert scorer.scored == []
+
+def test_cache_evicts_the_least_recently_used_score():
+    cache = ScoreCache(max_size=2)
+    a, b, c = (ScoreCache.key(text) for text in "abc")
+    cache.put(a, 0.1)
+    cache.put(b, 0.2)
+    assert cache.get(a) == 0.1          # a is now the most recently used
+    cache.put(c, 0.3)
+    assert cache.get(b) is None
+    assert (cache.get(a), cache.get(c)) == (0.1, 0.3)
+
+def test_process_pool_returns_scores_in_input_order():
+    texts = [f"{text} #{i}" for i in range(40) for text in TEXTS]
+    stage = SentimentStage(batch_size=7, max_workers=2, min_parallel_texts=1)
+    try:
+        scores = stage.score(texts)
+        assert stage._executor is not None
+    finally:
+        stage.close()
+    assert scores == SentimentStage(min_parallel_texts=len(texts) + 1).score(texts)
+    assert scores == [TextBlob(text).sentiment.polarity for text in texts]
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+from spans import NOOP_SPAN, SpanRecorder, summarize
+
+@pytest.fixture
+def recorder():
+    recorder = SpanRecorder()
+    yield recorder
+    recorder.stop_collecting()
+    recorder.close()
+
+def test_disabled_spans_are_noops(recorder):
+    with recorder.span("es.search", items=3) as timing:
+        timing.items = 10
+    assert timing is NOOP_SPAN
+    assert recorder.totals() == {}
+
+def test_collectors_are_isolated_per_task(recorder):
+    async def rerun(name, calls):
+        spans = recorder.collect()
+        for _ in range(calls):
+            with recorder.span(name):
+                await asyncio.sleep(0)
+        return spans
+
+    async def main():
+        return await asyncio.gather(rerun("page.a", 3), rerun("page.b", 2))
+
+    collected_a, collected_b = asyncio.run(main())
+    assert [recorded.name for recorded in collected_a] == ["page.a"] * 3
+    assert [recorded.name for recorded in collected_b] == ["page.b"] * 2
+    assert recorder.span("page.c") is NOOP_SPAN       # the tasks' collectors did not leak out
+    assert {name: values[0] for name, values in recorder.totals().items()} == {"page.a": 3, "page.b": 2}
+    assert [row["calls"] for row in summarize(collected_a)] == [3]
+
+def test_prometheus_export(recorder):
+    recorder.enabled = True
+    for items in (2, 3):
+        with recorder.span("es.hydrate", items=items) as timing:
+            timing.nbytes = 100
+
+    lines = recorder.prometheus().splitlines()
+    assert lines[:2] == [
+        "# HELP hype_span_calls_total Calls of each instrumented stage.",
+        "# TYPE hype_span_calls_total counter",
+    ]
+    assert 'hype_span_calls_total{span="es.hydrate"} 2' in lines
+    assert 'hype_span_items_total{span="es.hydrate"} 5' in lines
+    assert 'hype_span_bytes_total{span="es.hydrate"} 200' in lines
+    [seconds] = [line for line in lines if line.startswith('hype_span_seconds_total{span="es.hydrate"} ')]
+    assert float(seconds.split()[-1]) >= 0
+    assert sum(line.startswith("# TYPE ") for line in lines) == 4
+
+def test_jsonl_export_appends_one_object_per_span(recorder, tmp_path):
+    path = tmp_path / "spans.jsonl"
+    recorder.enabled = True
+    recorder.write_jsonl(str(path))
+    with recorder.span("archive.read", items=4, nbytes=64):
+        pass
+    with recorder.span("archive.hashtags"):
+        pass
+    recorder.close()
+
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(row["name"], row["items"], row["nbytes"]) for row in rows] == [("archive.read", 4, 64), ("archive.hashtags", 0, 0)]
+    assert all(set(row) == {"name", "start", "seconds", "items", "nbytes"} for row in rows)
+    assert rows[0]["start"] <= rows[1]["start"]
@@ -0,0 +1,79 @@
+import pytest
+
+from fakes import FakeClock, FakeTrendReq
+from trends import RETRY_BACKOFF, RequestSpacer, TrendsCache, TrendsFetcher, keyword_batches
+
+def make_fetcher(tmp_path, session, clock=None, **kwargs):
+    clock = clock or FakeClock()
+    return TrendsFetcher(
+        session=session,
+        spacer=RequestSpacer(min_interval=5, jitter=0, clock=clock, sleep=clock.sleep),
+        cache=TrendsCache(str(tmp_path / "cache"), clock=clock),
+        sleep=clock.sleep,
+        **kwargs,
+    )
+
+def test_keyword_batches_of_five_without_duplicates():
+    keywords = [f"k{i}" for i in range(12)] + ["k0"]
+    assert [len(batch) for batch in keyword_batches(keywords)] == [5, 5, 2]
+
+def test_interest_over_time_sends_one_payload_per_five_keywords(tmp_path):
+    session = FakeTrendReq()
+    keywords = [f"product {i}" for i in range(12)]
+    df = make_fetcher(tmp_path, session).interest_over_time(keywords, geo="DE")
+
+    assert [len(keywords) for keywords, _, _ in session.payloads] == [5, 5, 2]
+    assert list(df.columns) == keywords
+    assert session.requests == 6    # one payload and one request per batch
+
+def test_spacer_keeps_min_interval_between_requests():
+    clock = FakeClock()
+    spacer = RequestSpacer(min_interval=5, jitter=0, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        spacer.acquire()
+    assert clock.sleeps == [5, 5]
+
+def test_spacer_does_not_wait_after_a_pause():
+    clock = FakeClock()
+    spacer = RequestSpacer(min_interval=5, jitter=0, clock=clock, sleep=clock.sleep)
+    spacer.acquire()
+    clock.now += 60
+    spacer.acquire()
+    assert clock.sleeps == []
+
+def test_retries_with_backoff_on_429(tmp_path):
+    clock = FakeClock()
+    session = FakeTrendReq(rate_limited=2)
+    df = make_fetcher(tmp_path, session, clock).interest_over_time(["iPhone"])
+
+    assert not df.empty
+    assert [wait for wait in clock.sleeps if wait >= RETRY_BACKOFF] == [RETRY_BACKOFF, 2 * RETRY_BACKOFF]
+
+def test_gives_up_after_max_retries(tmp_path):
+    session = FakeTrendReq(rate_limited=10)
+    fetcher = make_fetcher(tmp_path, session, max_retries=1)
+    with pytest.raises(Exception) as raised:
+        fetcher.interest_over_time(["iPhone"])
+    assert raised.value.response.status_code == 429
+
+def test_cached_response_makes_no_upstream_request(tmp_path):
+    clock = FakeClock()
+    session = FakeTrendReq()
+    first = make_fetcher(tmp_path, session, clock).interest_over_time(["iPhone", "Pixel"], geo="US")
+    requests = session.requests
+
+    # A new fetcher on the same cache directory, as on the next run of the script
+    second = make_fetcher(tmp_path, session, clock).interest_over_time(["iPhone", "Pixel"], geo="US")
+    assert session.requests == requests
+    assert second.equals(first)
+
+def test_expired_response_is_fetched_again(tmp_path):
+    clock = FakeClock()
+    session = FakeTrendReq()
+    fetcher = make_fetcher(tmp_path, session, clock)
+    fetcher.interest_over_time(["iPhone"])
+    requests = session.requests
+
+    clock.now += fetcher.cache.ttl + 1
+    fetcher.interest_over_time(["iPhone"])
+    assert session.requests > requests
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trends_store import TrendsStore
+
+@pytest.fixture
+def store(tmp_path):
+    return TrendsStore(str(tmp_path / "trends.db"))
+
+def daily(start, columns):
+    days = len(next(iter(columns.values())))
+    return pd.DataFrame(columns, index=pd.date_range(start, periods=days, freq="D", name="date"))
+
+def test_appending_the_same_fetch_again_is_idempotent(store):
+    fetch = daily("2025-05-01", {"iPhone": [10.0, 20.0, 30.0], "Pixel": [5.0, np.nan, 7.0]})
+
+    assert store.append_interest(fetch, "DE") == 5
+    assert store.append_interest(fetch, "DE") == 5
+    series = store.list_series().set_index("product")
+    assert series["n_days"].to_dict() == {"Pixel": 2, "iPhone": 3}
+
+    # A later fetch rescales the overlapping dates and adds new ones
+    store.append_interest(daily("2025-05-03", {"iPhone": [60.0, 100.0]}), "DE")
+    store.append_interest(daily("2025-05-01", {"iPhone": [1.0]}), "US")
+    assert store.load_interest("iPhone", "DE")["y"].tolist() == [10.0, 20.0, 60.0, 100.0]
+    assert store.load_interest("iPhone", "US")["y"].tolist() == [1.0]
+    assert len(store.list_series()) == 3
+
+def test_matrix_aligns_products_on_the_union_of_dates(store):
+    store.append_interest(daily("2025-05-01", {"iPhone": [10.0, 20.0, 30.0]}), "DE")
+    store.append_interest(daily("2025-05-02", {"Pixel": [5.0, 6.0, 7.0]}), "DE")
+    store.append_interest(daily("2025-05-01", {"Galaxy": [99.0]}), "US")
+
+    matrix = store.load_matrix("DE")
+    expected = pd.DataFrame(
+        {"Pixel": [np.nan, 5.0, 6.0, 7.0], "iPhone": [10.0, 20.0, 30.0, np.nan]},
+        index=pd.date_range("2025-05-01", periods=4, freq="D"),
+    )
+    pd.testing.assert_frame_equal(matrix, expected, check_names=False, check_freq=False, check_index_type=False)
+
+    window = store.load_matrix("DE", start="2025-05-02", end="2025-05-04")
+    assert list(window.index) == list(pd.date_range("2025-05-02", periods=2, freq="D"))
+    assert window.loc["2025-05-03"].to_dict() == {"Pixel": 6.0, "iPhone": 30.0}
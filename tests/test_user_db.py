@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from benchmarks.bench_shared_plots import OFFSET_SENT_PLOTS, SQLITE_SCHEMA, seed
+from user_db import FIRST_PAGE, SELECT_RECEIVED_PLOTS, SELECT_SENT_PLOTS, decode_axes
+
+@pytest.fixture(scope="module")
+def db():
+    """The SQLite stand-in of the shared plots benchmark, running the statements of user_db."""
+    conn = sqlite3.connect(":memory:")
+    for statement in SQLITE_SCHEMA:
+        conn.execute(statement)
+    sent_by_user = seed(conn, "?", n_users=5, n_plots=500)
+    yield conn, sent_by_user
+    conn.close()
+
+def execute(conn, statement, params):
+    return conn.execute(statement.replace("%s", "?"), params).fetchall()
+
+def walk_pages(conn, statement, user_id, page_size):
+    pages = []
+    before = FIRST_PAGE
+    while True:
+        rows = execute(conn, statement, (user_id, before, page_size))
+        if not rows:
+            return pages
+        pages.append([row[0] for row in rows])
+        before = rows[-1][0]
+
+@pytest.mark.parametrize("statement, column", [(SELECT_SENT_PLOTS, "senderId"), (SELECT_RECEIVED_PLOTS, "receiverId")])
+def test_keyset_pages_cover_every_plot_once_newest_first(db, statement, column):
+    conn, _ = db
+    for user_id in range(1, 6):
+        expected = [row[0] for row in execute(conn, f"SELECT id FROM shared_plots WHERE {column} = %s ORDER BY id DESC", (user_id,))]
+        pages = walk_pages(conn, statement, user_id, page_size=20)
+        assert [plot_id for page in pages for plot_id in page] == expected
+        assert all(len(page) == 20 for page in pages[:-1])
+
+def test_keyset_pages_match_offset_pages(db):
+    conn, sent_by_user = db
+    pages = walk_pages(conn, SELECT_SENT_PLOTS, 1, page_size=20)
+    assert sum(len(page) for page in pages) == sent_by_user
+    for number, page in enumerate(pages):
+        assert [row[0] for row in execute(conn, OFFSET_SENT_PLOTS, (1, 20, number * 20))] == page
+
+def test_decode_axes_reads_json_arrays():
+    row = (b'["2025-05-01 10:00:00", "2025-05-01 10:00:30"]', "[1.0, 2.5]")
+    assert decode_axes(row) == (["2025-05-01 10:00:00", "2025-05-01 10:00:30"], [1.0, 2.5])
+
+@pytest.mark.parametrize("row", [
+    ("2025-05-01 10:00:00,2025-05-01 10:00:30", "1.0,2.5"),
+    ("['2025-05-01 10:00:00']", "[1.0]"),
+    ('"2025-05-01 10:00:00"', "1.0"),
+    ('["2025-05-01 10:00:00"]', "[1.0, 2.5]"),
+])
+def test_decode_axes_rejects_plots_not_stored_as_json_arrays(row):
+    with pytest.raises(ValueError):
+        decode_axes(row)
@@ -0,0 +1,124 @@
+# Time series helpers: epoch conversion, fixed-bin resampling and downsampling for plots
+import numpy as np
+import pandas as pd
+
+# --------------------
+# Configuration
+# --------------------
+
+BIN_SECONDS = [30, 60, 300, 900]    # Bin widths offered in the dashboard
+BIN_AGGREGATIONS = ["mean", "sum", "count"]
+MAX_PLOT_POINTS = 2000              # Line charts are downsampled above this many points
+
+# --------------------
+# Functions
+# --------------------
+
+def to_epoch(timestamps):
+    """Convert timestamps (naive values are taken as UTC) to integer epoch seconds."""
+    timestamps = pd.to_datetime(pd.Series(timestamps), utc=True)
+    return ((timestamps - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).astype("int64")
+
+def from_epoch(seconds):
+    return pd.to_datetime(seconds, unit="s")
+
+def resample_series(df, freq, how="mean"):
+    """Aggregate a (ds, y) frame into fixed bins of `freq` with mean, sum or count.
+
+    Bins without any points are dropped, like a date histogram with
+    min_doc_count=1.
+    """
+    if how not in BIN_AGGREGATIONS:
+        raise ValueError(f"Unknown bin aggregation: {how}")
+    if df.empty:
+        return pd.DataFrame({"ds": pd.Series(dtype="datetime64[ns]"), "y": pd.Series(dtype="float64")})
+
+    bins = df.set_index("ds")["y"].sort_index().resample(freq)
+    counts = bins.count()
+    values = counts if how == "count" else getattr(bins, how)()
+    values = values[counts > 0].astype("float64")
+    return values.rename("y").rename_axis("ds").reset_index()
+
+def bin_chunks(chunks, metrics, freq):
+    """Sum and count every metric per fixed time bin over frames of timestamp and metric columns.
+
+    The frames are consumed one at a time and only the running totals per
+    bin are kept, so memory grows with the number of bins, not of tweets.
+    Bins start at multiples of `freq` like resample_series. Returns one row
+    per bin with {metric}_sum and {metric}_count columns, indexed by ds.
+    """
+    totals = None
+    for chunk in chunks:
+        grouped = chunk[metrics].groupby(chunk["timestamp"].dt.floor(freq).rename("ds"))
+        part = pd.concat([grouped.sum().add_suffix("_sum"), grouped.count().add_suffix("_count")], axis=1)
+        totals = part if totals is None else totals.add(part, fill_value=0)
+
+    if totals is None:
+        columns = [f"{metric}_{total}" for total in ("sum", "count") for metric in metrics]
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name="ds"), dtype="float64")
+    return totals.sort_index()
+
+def series_from_bins(bins, metric, how="mean"):
+    """One metric of bin_chunks output as a (ds, y) frame, like resample_series of the raw tweets."""
+    if how not in BIN_AGGREGATIONS:
+        raise ValueError(f"Unknown bin aggregation: {how}")
+
+    counts = bins[f"{metric}_count"]
+    if how == "count":
+        values = counts
+    elif how == "sum":
+        values = bins[f"{metric}_sum"]
+    else:
+        values = bins[f"{metric}_sum"] / counts.where(counts > 0)
+    values = values[counts > 0].astype("float64")
+    return values.rename("y").rename_axis("ds").reset_index()
+
+def lttb_indices(x, y, n_out):
+    """Pick `n_out` point indices with Largest-Triangle-Three-Buckets.
+
+    Keeps the visual shape of a line (peaks and dips) while drawing far fewer points.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Boundaries of the n_out - 2 buckets between the fixed first and last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        # Area of the triangle (selected point, candidate, average of the next bucket)
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def minmax_indices(values, n_bins):
+    """Pick the indices of the minimum and maximum of `values` in each of `n_bins` equal slices."""
+    n = len(values)
+    if 2 * n_bins >= n:
+        return np.arange(n)
+
+    labels = np.arange(n) * n_bins // n
+    grouped = pd.Series(values).groupby(labels)
+    return np.unique(np.concatenate([grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy()]))
+
+def downsample_for_plot(df, y="y", max_points=MAX_PLOT_POINTS, method="lttb"):
+    """Thin a frame sorted by ds to at most `max_points` rows for drawing.
+
+    "lttb" keeps the overall shape of the line, "minmax" keeps every bin's extremes.
+    """
+    if len(df) <= max_points:
+        return df
+    values = np.nan_to_num(df[y].to_numpy(dtype="float64"))
+    if method == "minmax":
+        return df.iloc[minmax_indices(values, max_points // 2)]
+    x = df["ds"].to_numpy(dtype="datetime64[ns]").astype(np.int64).astype("float64")
+    return df.iloc[lttb_indices(x, values, max_points)]
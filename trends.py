@@ -0,0 +1,213 @@
+# Batched Google Trends fetching with a shared rate limiter and an on-disk response cache
+import hashlib
+import json
+import os
+import pickle
+import random
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+# --------------------
+# Configuration
+# --------------------
+
+KEYWORDS_PER_PAYLOAD = 5    # Most keywords Google Trends compares in one payload
+TIMEFRAME = "today 3-m"     # Long enough to get meaningful data
+CACHE_DIR = "trends_cache"
+CACHE_TTL = 6 * 3600        # Seconds a cached response is served before Google is asked again
+MIN_INTERVAL = 5            # Seconds between two requests to Google...
+JITTER = 10                 # ...plus a random wait of up to this many seconds
+MAX_RETRIES = 3             # Retries of a request answered with 429
+RETRY_BACKOFF = 60          # Seconds before the first retry, doubled on every further retry
+
+def keyword_batches(keywords, size=KEYWORDS_PER_PAYLOAD):
+    """Split keywords (without duplicates, order kept) into payloads of at most `size`."""
+    keywords = list(dict.fromkeys(keywords))
+    return [tuple(keywords[start:start + size]) for start in range(0, len(keywords), size)]
+
+def is_rate_limited(error):
+    # pytrends raises ResponseError subclasses that carry the HTTP response
+    return getattr(getattr(error, "response", None), "status_code", None) == 429
+
+# --------------------
+# Rate Limiting
+# --------------------
+
+class RequestSpacer:
+    """Keep a minimum, randomly stretched gap between requests to Google.
+
+    Google Trends publishes no rate limit headers, so requests are spaced
+    instead. Every caller reserves the next free slot under a lock, so one
+    spacer shared by all fetchers schedules every country and keyword batch.
+    """
+
+    def __init__(self, min_interval=MIN_INTERVAL, jitter=JITTER, clock=time.monotonic, sleep=time.sleep):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self.next_slot = None
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait for this caller's slot."""
+        with self._lock:
+            now = self._clock()
+            slot = now if self.next_slot is None else max(now, self.next_slot)
+            self.next_slot = slot + self.min_interval + random.uniform(0, self.jitter)
+        if slot > now:
+            self._sleep(slot - now)
+
+# --------------------
+# Response Cache
+# --------------------
+
+class TrendsCache:
+    """On-disk cache of Google Trends responses with a time to live.
+
+    Entries are keyed by the request kind, keywords, geo and timeframe.
+    Expired entries are ignored and replaced on the next fetch.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, clock=time.time):
+        self.directory = directory
+        self.ttl = ttl
+        self._clock = clock
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, kind, keywords, geo, timeframe):
+        return hashlib.sha256(json.dumps([kind, list(keywords), geo, timeframe]).encode()).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        """Return the cached response for `key`, or None if it is missing or expired."""
+        try:
+            with open(self._entry_path(key), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if self._clock() - entry["fetched_at"] > self.ttl:
+            return None
+        return entry["response"]
+
+    def put(self, key, response):
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({"fetched_at": self._clock(), "response": response}, f)
+        os.replace(tmp_path, self._entry_path(key))
+
+# --------------------
+# Fetcher
+# --------------------
+
+class TrendsFetcher:
+    """Fetch Google Trends data through one reused pytrends session.
+
+    Keywords are packed five per payload, the payload of the session is only
+    rebuilt when keywords, geo or timeframe change, and every response is
+    cached on disk. Note that Google scales each payload on its own (100 is
+    the peak within the payload), so values from different batches of the
+    same call are not directly comparable.
+    """
+
+    def __init__(self, session=None, spacer=None, cache=None, timeframe=TIMEFRAME,
+                 max_retries=MAX_RETRIES, sleep=time.sleep):
+        self._session = session
+        self.spacer = spacer or RequestSpacer()
+        self.cache = cache if cache is not None else TrendsCache()
+        self.timeframe = timeframe
+        self.max_retries = max_retries
+        self._sleep = sleep
+        self._payload = None
+        self._lock = threading.Lock()   # The session holds one payload at a time
+
+    @property
+    def session(self):
+        if self._session is None:
+            from pytrends.request import TrendReq
+
+            self._session = TrendReq(hl="en-US", tz=360)
+        return self._session
+
+    def _request(self, kind, keywords, geo, call, needs_payload=True):
+        """Serve one request from the cache, or send it to Google and cache the response."""
+        key = self.cache.key(kind, keywords, geo, self.timeframe)
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+
+        payload = (tuple(keywords), geo, self.timeframe)
+        with self._lock:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if needs_payload and self._payload != payload:
+                        self.spacer.acquire()
+                        self._payload = None
+                        self.session.build_payload(list(keywords), timeframe=self.timeframe, geo=geo)
+                        self._payload = payload
+                    self.spacer.acquire()
+                    response = call(self.session)
+                    break
+                except Exception as error:
+                    if not is_rate_limited(error) or attempt == self.max_retries:
+                        raise
+                    wait = RETRY_BACKOFF * 2 ** attempt
+                    print(f"⏱ Google Trends rate limit reached, waiting {wait}s…")
+                    self._sleep(wait)
+
+        self.cache.put(key, response)
+        return response
+
+    def interest_over_time(self, keywords, geo=""):
+        """Search interest of every keyword over time, one column per keyword."""
+        frames = []
+        for batch in keyword_batches(keywords):
+            df = self._request("interest_over_time", batch, geo, lambda session: session.interest_over_time())
+            frames.append(df.drop(columns="isPartial", errors="ignore"))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    def interest_by_region(self, keywords, geo=""):
+        """Search interest of every keyword per region of `geo`, one column per keyword."""
+        frames = [
+            self._request("interest_by_region", batch, geo, lambda session: session.interest_by_region())
+            for batch in keyword_batches(keywords)
+        ]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+    def related_queries(self, keywords, geo=""):
+        """Dict of keyword -> {"top": frame, "rising": frame} of related queries."""
+        related = {}
+        for batch in keyword_batches(keywords):
+            related.update(self._request("related_queries", batch, geo, lambda session: session.related_queries()))
+        return related
+
+    def trending_searches(self, pn):
+        """Today's trending searches of a country (pytrends expects a name like "germany")."""
+        return self._request(
+            "trending_searches", (), pn, lambda session: session.trending_searches(pn=pn), needs_payload=False
+        )
+
+    def interest_by_country(self, keywords, geos):
+        """Fetch interest over time of the keywords in every country of `geos`.
+
+        All countries go through the same session and spacer, and cached
+        responses are served without waiting. Returns a dict of geo -> frame;
+        countries whose request failed are reported and skipped.
+        """
+        results = {}
+        for geo in geos:
+            try:
+                results[geo] = self.interest_over_time(keywords, geo)
+            except Exception as error:
+                print(f"⚠️ Error fetching Google Trends for {geo}: {error}")
+        return results
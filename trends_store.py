@@ -0,0 +1,110 @@
+# SQLite store of Google Trends interest, appended incrementally and keyed by (product, geo, date)
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from timeseries import from_epoch, to_epoch
+
+DB_FILE = "trends_data.db"  # SQLite database file
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS trend_interest (
+        product TEXT NOT NULL,
+        geo TEXT NOT NULL,
+        date INTEGER NOT NULL,
+        interest REAL NOT NULL,
+        fetched_at INTEGER NOT NULL,
+        PRIMARY KEY (product, geo, date)
+    ) WITHOUT ROWID
+"""
+
+class TrendsStore:
+    """Interest over time per product and country, one row per (product, geo, date).
+
+    Appending a fetch upserts its rows: dates seen before take the newest
+    value (Google rescales every fetch to its own peak), new dates are added.
+    Rows are clustered by (product, geo, date), so a date range of one
+    product is one contiguous read.
+    """
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.execute(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append_interest(self, interest, geo):
+        """Upsert a wide interest frame (date index, one column per product) in one transaction."""
+        if interest.empty:
+            return 0
+        long = interest.rename_axis("date").reset_index().melt("date", var_name="product", value_name="interest")
+        long = long.dropna(subset=["interest"])
+        dates = to_epoch(long["date"]).tolist()
+        fetched_at = int(time.time())
+
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO trend_interest (product, geo, date, interest, fetched_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (product, geo, date) DO UPDATE SET
+                    interest = excluded.interest, fetched_at = excluded.fetched_at
+                """,
+                zip(long["product"].tolist(), [geo] * len(long), dates, long["interest"].astype(float).tolist(),
+                    [fetched_at] * len(long)),
+            )
+        return len(long)
+
+    def list_series(self):
+        """Every stored (product, geo) with its number of days and date range."""
+        df = pd.read_sql_query(
+            """
+            SELECT product, geo, COUNT(*) AS n_days, MIN(date) AS start, MAX(date) AS end
+            FROM trend_interest GROUP BY product, geo ORDER BY product, geo
+            """,
+            self._connection(),
+        )
+        df["start"] = from_epoch(df["start"])
+        df["end"] = from_epoch(df["end"])
+        return df
+
+    def load_interest(self, product, geo, start=None, end=None):
+        """Interest of one product in one country as a (ds, y) frame, limited to [start, end)."""
+        query = "SELECT date AS ds, interest AS y FROM trend_interest WHERE product = ? AND geo = ?"
+        params = [product, geo]
+        query, params = self._limit_range(query, params, start, end)
+        df = pd.read_sql_query(query + " ORDER BY date", self._connection(), params=params)
+        df["ds"] = from_epoch(df["ds"])
+        return df
+
+    def load_matrix(self, geo, start=None, end=None):
+        """Interest of every product in one country as a wide (date x product) frame."""
+        query, params = self._limit_range(
+            "SELECT product, date, interest FROM trend_interest WHERE geo = ?", [geo], start, end
+        )
+        df = pd.read_sql_query(query, self._connection(), params=params)
+        matrix = df.pivot(index="date", columns="product", values="interest").sort_index()
+        matrix.index = from_epoch(matrix.index)
+        return matrix
+
+    @staticmethod
+    def _limit_range(query, params, start, end):
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(int(to_epoch([start]).iloc[0]))
+        if end is not None:
+            query += " AND date < ?"
+            params.append(int(to_epoch([end]).iloc[0]))
+        return query, params
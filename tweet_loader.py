@@ -0,0 +1,110 @@
+# Streaming access to the tweet index
+import pandas as pd
+from elasticsearch_dsl import connections
+
+from models import INDEX_NAME
+from spans import span
+
+# --------------------
+# Configuration
+# --------------------
+
+CHUNK_SIZE = 5000         # Tweets per page / yielded chunk
+PIT_KEEP_ALIVE = "2m"     # How long the point-in-time stays open between pages
+
+# Fields stored as numbers in the tweet mapping
+NUMERIC_FIELDS = {
+    "sentiment_score",
+    "likes",
+    "retweets",
+    "replies",
+    "clicks",
+    "followers",
+    "regular_engagement",
+    "google_engagement",
+    "high_follower_engagement",
+    "adjusted_engagement",
+    "engagement_including_sentiment",
+    "engagement_final",
+}
+
+# --------------------
+# Functions
+# --------------------
+
+def build_time_query(start=None, end=None):
+    """Build a query restricted to tweets between start (inclusive) and end (exclusive)."""
+    if start is None and end is None:
+        return {"match_all": {}}
+
+    time_range = {}
+    if start is not None:
+        time_range["gte"] = pd.Timestamp(start).isoformat()
+    if end is not None:
+        time_range["lt"] = pd.Timestamp(end).isoformat()
+    return {"range": {"timestamp": time_range}}
+
+def sources_to_frame(sources, fields):
+    """Turn a list of _source dicts into a typed column frame."""
+    df = pd.DataFrame.from_records(sources, columns=fields)
+    if "timestamp" in df:
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce", format="ISO8601").dt.tz_localize(None)
+    numeric = [field for field in fields if field in NUMERIC_FIELDS]
+    if numeric:
+        df[numeric] = df[numeric].apply(pd.to_numeric, errors="coerce").astype("float64")
+    return df
+
+def response_size(response):
+    """Body size of a client response from its Content-Length header, 0 if unknown."""
+    meta = getattr(response, "meta", None)
+    headers = getattr(meta, "headers", None) or {}
+    return int(headers.get("content-length", 0))
+
+def iter_tweet_chunks(fields, start=None, end=None, chunk_size=CHUNK_SIZE, index=INDEX_NAME, es=None):
+    """Yield the whole index as frames of at most chunk_size tweets, oldest first.
+
+    Pages with a point-in-time and search_after, so there is no 10,000-hit cap
+    and only one page is held in memory at a time.
+    """
+    es = es or connections.get_connection()
+    query = build_time_query(start, end)
+
+    pit_id = es.open_point_in_time(index=index, keep_alive=PIT_KEEP_ALIVE)["id"]
+    search_after = None
+    try:
+        while True:
+            with span("es.search") as timing:
+                response = es.search(
+                    pit={"id": pit_id, "keep_alive": PIT_KEEP_ALIVE},
+                    query=query,
+                    size=chunk_size,
+                    source=fields,
+                    sort=[{"timestamp": "asc"}, {"_shard_doc": "asc"}],
+                    search_after=search_after,
+                    track_total_hits=False,
+                    filter_path=["pit_id", "hits.hits._source", "hits.hits.sort"],
+                )
+                hits = response.get("hits", {}).get("hits", [])
+                timing.items = len(hits)
+                timing.nbytes = response_size(response)
+            if not hits:
+                break
+
+            # The point-in-time id may change between pages
+            pit_id = response.get("pit_id", pit_id)
+            search_after = hits[-1]["sort"]
+            with span("es.hydrate", items=len(hits)):
+                chunk = sources_to_frame([hit.get("_source", {}) for hit in hits], fields)
+            yield chunk
+
+            if len(hits) < chunk_size:
+                break
+    finally:
+        es.close_point_in_time(id=pit_id)
+
+def load_tweet_frame(fields, start=None, end=None, chunk_size=CHUNK_SIZE, index=INDEX_NAME, es=None):
+    """Load the selected fields of every matching tweet into one frame."""
+    chunks = list(iter_tweet_chunks(fields, start, end, chunk_size, index, es))
+    if not chunks:
+        return sources_to_frame([], fields)
+    return pd.concat(chunks, ignore_index=True)
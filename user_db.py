@@ -0,0 +1,158 @@
+# MySQL access layer for users and shared plots (connection pool + prepared statements)
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# mysql-connector is imported on first use, so the statements below can also be
+# used without it (the benchmark runs them against SQLite as a stand-in)
+
+# --------------------
+# Configuration
+# --------------------
+
+MYSQL_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "",
+    "database": "user_plot_app",
+}
+POOL_NAME = "user_plot_app"
+POOL_SIZE = 8           # Connections shared by all sessions of the app
+POOL_TIMEOUT = 10       # Seconds to wait for a free connection before giving up
+PAGE_SIZE = 20          # Shared plots per page
+
+# Statements shared with the benchmark. The plot lists only read the small
+# columns; senderId/receiverId are secondary indexes, which in InnoDB also
+# hold the primary key, so "WHERE senderId = ? AND id < ? ORDER BY id DESC"
+# is answered by walking one index range backwards.
+INSERT_USER = """
+    INSERT INTO users (username, email, password_hash, created_at)
+    VALUES (%s, %s, %s, %s)
+"""
+SELECT_USER_ID = "SELECT id FROM users WHERE username = %s"
+INSERT_SHARED_PLOT = "INSERT INTO shared_plots (senderId, receiverId, xAxis, yAxis) VALUES (%s, %s, %s, %s)"
+SELECT_SENT_PLOTS = """
+    SELECT p.id, u.username, p.shared_at
+    FROM shared_plots p LEFT JOIN users u ON u.id = p.receiverId
+    WHERE p.senderId = %s AND p.id < %s
+    ORDER BY p.id DESC LIMIT %s
+"""
+SELECT_RECEIVED_PLOTS = """
+    SELECT p.id, u.username, p.shared_at
+    FROM shared_plots p JOIN users u ON u.id = p.senderId
+    WHERE p.receiverId = %s AND p.id < %s
+    ORDER BY p.id DESC LIMIT %s
+"""
+SELECT_PLOT = "SELECT xAxis, yAxis FROM shared_plots WHERE id = %s AND (senderId = %s OR receiverId = %s)"
+
+# Larger than every id, used as the cursor of the first page
+FIRST_PAGE = 2**31 - 1
+
+def create_pool(config=MYSQL_CONFIG, pool_size=POOL_SIZE):
+    from mysql.connector import pooling
+
+    return pooling.MySQLConnectionPool(pool_name=POOL_NAME, pool_size=pool_size, **config)
+
+class UserDB:
+    """Users and shared plots on top of a MySQL connection pool.
+
+    Connections are borrowed from the pool for one call and returned
+    afterwards, and every statement runs as a server-side prepared statement.
+    """
+
+    def __init__(self, pool, timeout=POOL_TIMEOUT):
+        self.pool = pool
+        self.timeout = timeout
+
+    def _get_connection(self):
+        from mysql.connector.errors import PoolError
+
+        # MySQLConnectionPool fails at once when all connections are in use, so wait for one
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                return self.pool.get_connection()
+            except PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+    @contextmanager
+    def cursor(self):
+        conn = self._get_connection()
+        cursor = conn.cursor(prepared=True)
+        try:
+            yield cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()    # Returns the connection to the pool
+
+    def register_user(self, username, email, password_hash):
+        import mysql.connector
+
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(INSERT_USER, (username, email, password_hash, datetime.now()))
+            return True, "User registered successfully!"
+        except mysql.connector.Error as err:
+            return False, f"Error: {err}"
+
+    def find_user_id(self, username):
+        with self.cursor() as cursor:
+            cursor.execute(SELECT_USER_ID, (username,))
+            row = cursor.fetchone()
+        return None if row is None else row[0]
+
+    def share_plot(self, sender_id, receiver_id, x_values, y_values):
+        """Share a plot; the axis values are stored as JSON arrays."""
+        with self.cursor() as cursor:
+            cursor.execute(
+                INSERT_SHARED_PLOT,
+                (sender_id, receiver_id, json.dumps([str(x) for x in x_values]), json.dumps([float(y) for y in y_values])),
+            )
+            return cursor.lastrowid
+
+    def list_sent_plots(self, user_id, before=None, limit=PAGE_SIZE):
+        """Plots shared by `user_id`, newest first, as (id, receiver, shared_at) rows.
+
+        Pass the smallest id of the previous page as `before` to get the next page.
+        """
+        return self._list(SELECT_SENT_PLOTS, user_id, before, limit)
+
+    def list_received_plots(self, user_id, before=None, limit=PAGE_SIZE):
+        """Plots shared with `user_id`, newest first, as (id, sender, shared_at) rows."""
+        return self._list(SELECT_RECEIVED_PLOTS, user_id, before, limit)
+
+    def _list(self, statement, user_id, before, limit):
+        with self.cursor() as cursor:
+            cursor.execute(statement, (user_id, FIRST_PAGE if before is None else before, limit))
+            return cursor.fetchall()
+
+    def load_plot(self, plot_id, user_id):
+        """Axis values of a plot the user sent or received, or None."""
+        with self.cursor() as cursor:
+            cursor.execute(SELECT_PLOT, (plot_id, user_id, user_id))
+            row = cursor.fetchone()
+        return None if row is None else decode_axes(row)
+
+def decode_axes(row):
+    """Decode the (xAxis, yAxis) JSON arrays of a shared plot row.
+
+    Raises ValueError for plots not stored as JSON arrays (shared before
+    share_plot wrote JSON).
+    """
+    x_axis, y_axis = (value.decode() if isinstance(value, (bytes, bytearray)) else value for value in row)
+    try:
+        x_values, y_values = json.loads(x_axis), json.loads(y_axis)
+    except ValueError as e:
+        raise ValueError(f"The axis values are not JSON arrays: {e}") from e
+    if not isinstance(x_values, list) or not isinstance(y_values, list):
+        raise ValueError("The axis values are not JSON arrays")
+    if len(x_values) != len(y_values):
+        raise ValueError(f"{len(x_values)} x values but {len(y_values)} y values")
+    return x_values, y_values